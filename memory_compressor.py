@@ -5,106 +5,302 @@ Runs at 4:30am UTC, after the 4am thinking session
 """
 
 import sqlite3
+import argparse
+import fnmatch
 import json
 import os
 import sys
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+from memory_fuzzy import ensure_fuzzy, refresh_vocabulary
+from memory_graph import ensure_graph, index_memory
+from memory_stats import ensure_stats, get_counts, get_total
+from workspace_catalog import WorkspaceCatalog
+
+BATCH_SIZE = 50  # files compressed per checkpoint commit
+COMPRESS_DIRS = ("", "security/logs")  # workspace directories holding daily files
+
+# One row per file (or 'step:<name>') of a day's run; lets a crashed run resume
+LEDGER_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS compression_ledger (
+    run_date TEXT NOT NULL,
+    item TEXT NOT NULL,                     -- file path, or 'step:<name>'
+    status TEXT NOT NULL DEFAULT 'pending', -- pending, done, skipped, error
+    byte_offset INTEGER NOT NULL DEFAULT 0, -- bytes of the file processed
+    size INTEGER,
+    memory_id INTEGER,
+    error TEXT,
+    updated_at TEXT,
+    PRIMARY KEY (run_date, item)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_memories_original_file_path ON memories(original_file_path);
+'''
+
 class DailyMemoryCompressor:
     """Daily compression job for memory optimization"""
     
-    def __init__(self, db_path="/home/openclaw/.openclaw/workspace/memory/memory.db"):
+    def __init__(self, db_path="/home/openclaw/.openclaw/workspace/memory/memory.db",
+                 workspace_path="/home/openclaw/.openclaw/workspace"):
         self.db_path = db_path
+        self.workspace_path = workspace_path
         self.conn = sqlite3.connect(db_path)
         self.cursor = self.conn.cursor()
         self.today = datetime.now(timezone.utc).date()
         self.yesterday = self.today - timedelta(days=1)
         
-    def compress_yesterday_files(self):
-        """Find and compress files from yesterday"""
-        print(f"Compressing files from {self.yesterday}")
+    def find_yesterday_files(self, dry_run=False):
+        """Files from yesterday in the workspace, in a stable order
         
-        # Look for yesterday's files in workspace
-        workspace_path = "/home/openclaw/.openclaw/workspace"
-        compressed_count = 0
+        Looked up in the workspace catalog by date. Without a running catalog
+        watcher, only COMPRESS_DIRS are rescanned first, not the workspace.
+        A dry run globs instead, since the rescan writes to the catalog.
+        """
+        if dry_run:
+            return self.glob_yesterday_files()
+        try:
+            catalog = WorkspaceCatalog(self.workspace_path)
+            try:
+                if not catalog.watcher_alive():
+                    catalog.scan(COMPRESS_DIRS)
+                paths = catalog.files_for_date(self.yesterday, COMPRESS_DIRS)
+            finally:
+                catalog.close()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Workspace catalog unavailable ({e}); scanning with glob")
+            return self.glob_yesterday_files()
         
-        # Common patterns for daily files
-        file_patterns = [
+        # The catalog dates every file by mtime; only daily-file names qualify
+        root = os.path.abspath(self.workspace_path)
+        return [Path(p) for p in paths if self._is_daily_file(os.path.relpath(p, root))]
+    
+    def daily_file_patterns(self):
+        """Workspace-relative glob patterns of yesterday's daily files"""
+        return [
             f"*{self.yesterday.strftime('%Y-%m-%d')}*",
             f"*{self.yesterday.strftime('%Y%m%d')}*",
             "today_thoughts*.md",
             "daily_*.log",
             "security/logs/*.log"
         ]
+    
+    def _is_daily_file(self, rel_path):
+        """Whether a workspace-relative path matches a daily pattern (glob semantics)"""
+        rel_dir, name = os.path.split(rel_path)
+        return any(os.path.dirname(pattern) == rel_dir and
+                   fnmatch.fnmatchcase(name, os.path.basename(pattern))
+                   for pattern in self.daily_file_patterns())
+    
+    def glob_yesterday_files(self):
+        """Files from yesterday found by globbing the workspace (catalog fallback)"""
+        workspace_path = self.workspace_path
+        found = {}
         
-        for pattern in file_patterns:
+        for pattern in self.daily_file_patterns():
             try:
                 for file_path in Path(workspace_path).glob(pattern):
                     if file_path.is_file():
-                        compressed = self.compress_file(file_path)
-                        if compressed:
-                            compressed_count += 1
+                        found[str(file_path)] = file_path
             except Exception as e:
                 print(f"Error processing pattern {pattern}: {e}")
         
+        return [found[key] for key in sorted(found)]
+    
+    def ensure_ledger(self):
+        """Create the checkpoint ledger (and the index resume relies on)"""
+        self.conn.executescript(LEDGER_SCHEMA)
+    
+    def _ledger_update(self, item, status, **fields):
+        fields.update(status=status, updated_at=datetime.now(timezone.utc).isoformat())
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        self.cursor.execute(f'''
+        UPDATE compression_ledger SET {assignments} WHERE run_date = ? AND item = ?
+        ''', (*fields.values(), self.yesterday.isoformat(), item))
+    
+    def _step_done(self, step):
+        self.cursor.execute('''
+        SELECT status FROM compression_ledger WHERE run_date = ? AND item = ?
+        ''', (self.yesterday.isoformat(), f"step:{step}"))
+        row = self.cursor.fetchone()
+        return row is not None and row[0] == 'done'
+    
+    def _mark_step(self, step):
+        self.cursor.execute('''
+        INSERT OR REPLACE INTO compression_ledger (run_date, item, status, updated_at)
+        VALUES (?, ?, 'done', ?)
+        ''', (self.yesterday.isoformat(), f"step:{step}", datetime.now(timezone.utc).isoformat()))
+    
+    def compress_yesterday_files(self, resume=False, dry_run=False, batch_size=BATCH_SIZE):
+        """Find and compress files from yesterday, checkpointing every batch
+        
+        Each file is stored and marked in the ledger inside one savepoint, and
+        the transaction is committed every `batch_size` files. With resume,
+        the file list and finished files from an earlier run are reused, so
+        only the remaining files are read.
+        """
+        print(f"Compressing files from {self.yesterday}")
+        
+        if dry_run:
+            return self.preview_yesterday_files()
+        
+        run_date = self.yesterday.isoformat()
+        self.ensure_ledger()  # fails here, before any write, without a memories table
+        ensure_graph(self.conn)
+        if not resume:
+            self.cursor.execute('DELETE FROM compression_ledger WHERE run_date = ?', (run_date,))
+        
+        if not self._step_done('plan'):
+            files = self.find_yesterday_files()
+            self.cursor.executemany('''
+            INSERT OR IGNORE INTO compression_ledger (run_date, item, size, updated_at)
+            VALUES (?, ?, ?, ?)
+            ''', [(run_date, str(p), p.stat().st_size, datetime.now(timezone.utc).isoformat())
+                  for p in files])
+            self._mark_step('plan')
+            self.conn.commit()
+        
+        self.cursor.execute('''
+        SELECT item FROM compression_ledger
+        WHERE run_date = ? AND status IN ('pending', 'error') AND item NOT LIKE 'step:%'
+        ORDER BY item
+        ''', (run_date,))
+        remaining = [row[0] for row in self.cursor.fetchall()]
+        if resume:
+            print(f"  Resuming: {len(remaining)} file(s) left")
+        
+        compressed_count = 0
+        for i, item in enumerate(remaining, 1):
+            if self.compress_checkpointed(Path(item)):
+                compressed_count += 1
+            if i % batch_size == 0:
+                self.conn.commit()
+                print(f"  Checkpoint: {i}/{len(remaining)} files")
+        self.conn.commit()
+        
+        self.cursor.execute('''
+        SELECT item FROM compression_ledger
+        WHERE run_date = ? AND status IN ('done', 'skipped') AND item NOT LIKE 'step:%'
+        ''', (run_date,))
+        self.mark_catalog([row[0] for row in self.cursor.fetchall()])
+        
         return compressed_count
     
-    def compress_file(self, file_path):
-        """Compress a single file into memory database"""
+    def mark_catalog(self, paths):
+        """Flag compressed files in the workspace catalog (advisory)"""
         try:
-            with open(file_path, 'r') as f:
-                content = f.read()
-            
-            # Skip if already compressed
+            catalog = WorkspaceCatalog(self.workspace_path)
+            try:
+                catalog.mark(paths, 'compressed')
+            finally:
+                catalog.close()
+        except (sqlite3.Error, OSError) as e:
+            print(f"  Could not update workspace catalog: {e}")
+    
+    def compress_checkpointed(self, file_path):
+        """Compress one file and record the outcome in the ledger atomically"""
+        if not self.conn.in_transaction:
+            self.cursor.execute('BEGIN')
+        self.cursor.execute('SAVEPOINT compress_file')
+        try:
+            memory_id, size = self._store_file(file_path)
+            self._ledger_update(str(file_path), 'done' if memory_id else 'skipped',
+                                byte_offset=size, size=size, memory_id=memory_id, error=None)
+            self.cursor.execute('RELEASE compress_file')
+            return memory_id is not None
+        except Exception as e:
+            # Drop this file's partial rows, keep the rest of the batch
+            self.cursor.execute('ROLLBACK TO compress_file')
+            self.cursor.execute('RELEASE compress_file')
+            self._ledger_update(str(file_path), 'error', error=str(e))
+            print(f"  Error compressing {file_path}: {e}")
+            return False
+    
+    def preview_yesterday_files(self):
+        """Dry run: report what would be compressed without writing anything"""
+        would_compress = 0
+        for file_path in self.find_yesterday_files(dry_run=True):
             self.cursor.execute('''
             SELECT COUNT(*) FROM memories WHERE original_file_path = ?
             ''', (str(file_path),))
             if self.cursor.fetchone()[0] > 0:
                 print(f"  Already compressed: {file_path.name}")
-                return False
-            
-            # Determine importance based on file type and content
-            importance = self.rate_file_importance(file_path, content)
-            
-            # Extract metadata
-            memory_type = self.determine_memory_type(file_path)
-            category = self.determine_category(content)
-            tags = self.extract_tags(content)
-            
-            # Store compressed memory
-            self.cursor.execute('''
-            INSERT INTO memories (
-                timestamp, user_id, memory_type, content, category,
-                tags, importance, compression_status, original_file_path
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                datetime.now(timezone.utc).isoformat(),
-                "jeff",
-                memory_type,
-                content[:2000],  # Compress to first 2000 chars
-                category,
-                json.dumps(tags),
-                importance,
-                "compressed",
-                str(file_path)
-            ))
-            
-            memory_id = self.cursor.lastrowid
-            
-            # Update FTS
-            self.cursor.execute('''
-            INSERT INTO memories_fts (rowid, content, tags)
-            VALUES (?, ?, ?)
-            ''', (memory_id, content[:2000], json.dumps(tags)))
-            
-            print(f"  Compressed: {file_path.name} -> importance {importance}")
-            return True
+                continue
+            try:
+                with open(file_path, 'r') as f:
+                    content = f.read()
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"  Would fail: {file_path.name} ({e})")
+                continue
+            print(f"  Would compress: {file_path.name} -> importance "
+                  f"{self.rate_file_importance(file_path, content)}")
+            would_compress += 1
+        return would_compress
+    
+    def compress_file(self, file_path):
+        """Compress a single file into memory database"""
+        try:
+            memory_id, _ = self._store_file(file_path)
+            return memory_id is not None
             
         except Exception as e:
             print(f"  Error compressing {file_path}: {e}")
             return False
     
+    def _store_file(self, file_path):
+        """Store one file as a compressed memory; (memory_id or None if done before, bytes read)"""
+        with open(file_path, 'r') as f:
+            content = f.read()
+        size = len(content.encode('utf-8'))
+        
+        # Skip if already compressed
+        self.cursor.execute('''
+        SELECT COUNT(*) FROM memories WHERE original_file_path = ?
+        ''', (str(file_path),))
+        if self.cursor.fetchone()[0] > 0:
+            print(f"  Already compressed: {file_path.name}")
+            return None, size
+        
+        # Determine importance based on file type and content
+        importance = self.rate_file_importance(file_path, content)
+        
+        # Extract metadata
+        memory_type = self.determine_memory_type(file_path)
+        category = self.determine_category(content)
+        tags = self.extract_tags(content)
+        
+        # Store compressed memory
+        self.cursor.execute('''
+        INSERT INTO memories (
+            timestamp, user_id, memory_type, content, category,
+            tags, importance, compression_status, original_file_path
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            datetime.now(timezone.utc).isoformat(),
+            "jeff",
+            memory_type,
+            content[:2000],  # Compress to first 2000 chars
+            category,
+            json.dumps(tags),
+            importance,
+            "compressed",
+            str(file_path)
+        ))
+        
+        memory_id = self.cursor.lastrowid
+        
+        # Update FTS
+        self.cursor.execute('''
+        INSERT INTO memories_fts (rowid, content, tags)
+        VALUES (?, ?, ?)
+        ''', (memory_id, content[:2000], json.dumps(tags)))
+
+        # Link from the whole file, not just the stored excerpt
+        index_memory(self.conn, memory_id, content)
+
+        print(f"  Compressed: {file_path.name} -> importance {importance}")
+        return memory_id, size
+    
     def rate_file_importance(self, file_path, content):
         """Rate file importance (0-5)"""
         importance = 2  # Default
@@ -208,18 +404,35 @@ class DailyMemoryCompressor:
         updated = self.cursor.rowcount
         print(f"Updated access patterns for {updated} memories")
     
-    def generate_compression_report(self):
-        """Generate report of compression activity"""
-        self.cursor.execute('''
-        SELECT 
-            COUNT(*) as total_memories,
-            COUNT(CASE WHEN compression_status = 'compressed' THEN 1 END) as compressed_count,
-            COUNT(CASE WHEN importance >= 4 THEN 1 END) as critical_count,
-            AVG(importance) as avg_importance
-        FROM memories
-        ''')
+    def generate_compression_report(self, dry_run=False):
+        """Generate report of compression activity
         
-        stats = self.cursor.fetchone()
+        A few primary-key lookups in the trigger-maintained stats table, so
+        it reads the live database (no replica copy needed). A dry run
+        doesn't install the stats table; without one it counts directly.
+        """
+        if dry_run and not self._has_stats():
+            self.cursor.execute('''
+            SELECT 
+                COUNT(*) as total_memories,
+                COUNT(CASE WHEN compression_status = 'compressed' THEN 1 END) as compressed_count,
+                COUNT(CASE WHEN importance >= 4 THEN 1 END) as critical_count,
+                COALESCE(AVG(importance), 0.0) as avg_importance
+            FROM memories
+            ''')
+            stats = self.cursor.fetchone()
+        else:
+            if not dry_run:
+                ensure_stats(self.conn)
+                self.conn.commit()
+            total, importance_sum, _ = get_total(self.conn, 'memories')
+            compressed = sum(count for status, count, _, _ in
+                             get_counts(self.conn, 'memories', 'compression_status')
+                             if status == 'compressed')
+            critical = sum(count for importance, count, _, _ in
+                           get_counts(self.conn, 'memories', 'importance')
+                           if importance != '' and importance >= 4)
+            stats = (total, compressed, critical, importance_sum / total if total else 0.0)
         
         report = f"""
         === Memory Compression Report ===
@@ -239,46 +452,97 @@ class DailyMemoryCompressor:
         
         return report
     
-    def run_daily_compression(self):
-        """Run full daily compression routine"""
+    def _has_stats(self):
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stats'")
+        return self.cursor.fetchone() is not None
+    
+    def run_daily_compression(self, resume=False, dry_run=False, batch_size=BATCH_SIZE,
+                              notify=None):
+        """Run full daily compression routine
+        
+        resume: continue yesterday's run from its last checkpoint
+        dry_run: report what would be compressed; write nothing
+        notify: Slack channel to queue the report for (via the outbox)
+        """
         print("=" * 60)
-        print(f"Daily Memory Compression - {self.today}")
+        print(f"Daily Memory Compression - {self.today}" + (" (dry run)" if dry_run else ""))
         print("=" * 60)
         
-        # Step 1: Compress yesterday's files
+        # Step 1: Compress yesterday's files (committed in batches)
         print("\n1. Compressing yesterday's files...")
-        compressed = self.compress_yesterday_files()
-        print(f"   Compressed {compressed} files")
+        compressed = self.compress_yesterday_files(resume, dry_run, batch_size)
+        print(f"   {'Would compress' if dry_run else 'Compressed'} {compressed} files")
         
-        # Step 2: Update access patterns
+        # Step 2: Update access patterns (once per day, even across resumes)
         print("\n2. Updating access patterns...")
-        self.update_access_patterns()
+        if dry_run:
+            print("   Skipped (dry run)")
+        elif resume and self._step_done('access_patterns'):
+            print("   Already done in an earlier run")
+        else:
+            self.update_access_patterns()
+            self._mark_step('access_patterns')
+            self.conn.commit()
+        
+        # Step 3: Let today's new words be suggested for misspelled searches
+        print("\n3. Refreshing search vocabulary...")
+        if dry_run:
+            print("   Skipped (dry run)")
+        else:
+            ensure_fuzzy(self.conn)
+            added, removed = refresh_vocabulary(self.conn)
+            print(f"   {added} new terms, {removed} gone")
         
-        # Step 3: Generate report
-        print("\n3. Generating compression report...")
-        report = self.generate_compression_report()
+        # Step 4: Generate report
+        print("\n4. Generating compression report...")
+        report = self.generate_compression_report(dry_run)
         print(report)
         
-        # Step 4: Commit changes
-        self.conn.commit()
-        print(f"\n4. Changes committed to database")
+        # Step 5: Commit changes
+        if not dry_run:
+            self.conn.commit()
+            print(f"\n5. Changes committed to database")
+            if notify:
+                self.notify(report, notify)
         
-        # Step 5: Cleanup (optional - in future phases)
+        # Step 6: Cleanup (optional - in future phases)
         # self.cleanup_old_files()
         
         return compressed
     
+    def notify(self, report, channel):
+        """Queue the report for Slack; the outbox dispatcher delivers it later"""
+        try:
+            import slack_outbox
+            slack_outbox.enqueue_message(report.strip(), channel,
+                                         coalesce_key=f"memory-compression-{self.today}")
+            print(f"   Report queued for {channel}")
+        except Exception as e:
+            print(f"   ⚠️ Could not queue report for {channel}: {e}")
+    
     def cleanup(self):
         """Cleanup database connection"""
         self.conn.close()
 
-def main():
+def main(argv=None):
     """Main function for cron job execution"""
+    parser = argparse.ArgumentParser(description="Daily memory compression")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue yesterday's run from its last checkpoint")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Show what would be compressed without writing")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"Files per checkpoint commit (default: {BATCH_SIZE})")
+    parser.add_argument("--notify", metavar="CHANNEL",
+                        help="Queue the report for this Slack channel in the outbox")
+    args = parser.parse_args(argv)
+    
     print("Starting memory compression job...")
     
     try:
         compressor = DailyMemoryCompressor()
-        compressed_count = compressor.run_daily_compression()
+        compressed_count = compressor.run_daily_compression(args.resume, args.dry_run,
+                                                            args.batch_size, args.notify)
         compressor.cleanup()
         
         # Return success code
@@ -289,4 +553,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Native Cron Scheduler for OpenClaw
+Runs deterministic jobs from cron/native_jobs.json directly, without an
+agent turn.
+
+Jobs whose payload kind is "python" (an importable "module:function" entry
+point) or "command" (an argv list) are run here in a worker pool. The file
+uses the jobs.json job format, but cron/jobs.json itself belongs to the
+OpenClaw gateway and is never read or written here. After every run the
+job's `state` block (lastRunAtMs, lastDurationMs, lastStatus,
+consecutiveErrors, nextRunAtMs) is written back to native_jobs.json.
+
+  "payload": {"kind": "python", "entry": "memory_compressor:main"}
+  "payload": {"kind": "python", "entry": "memory_compressor:DailyMemoryCompressor.run_daily_compression"}
+  "payload": {"kind": "command", "argv": ["bash", "scripts/backup_sqlite.sh"]}
+
+Optional per-job keys: schedule.jitterMs (random start delay),
+catchUp ("one" | "all" | "none", for runs missed while not running).
+
+Usage:
+  python3 cron_scheduler.py run             # schedule forever
+  python3 cron_scheduler.py list
+  python3 cron_scheduler.py run-now memory-compression-daily
+  python3 cron_scheduler.py next "30 4 * * *" [count]
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import fcntl
+import random
+import argparse
+import importlib
+import threading
+import traceback
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+from zoneinfo import ZoneInfo
+
+# Configuration
+SCRIPTS_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPTS_DIR.parent
+JOBS_PATH = os.environ.get("CLAW_CRON_JOBS", str(REPO_ROOT / "cron" / "native_jobs.json"))
+WORKERS = 4
+NATIVE_KINDS = ("python", "command")
+POLL_INTERVAL = 30.0  # seconds; the jobs file is re-read on every check
+CATCH_UP_GRACE_MS = 60_000  # a run later than this was missed, not just late
+MAX_CATCH_UP = 10  # runs replayed at most for catchUp "all"
+OUTPUT_TAIL = 3000  # characters of job output announced to Slack
+
+MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+MONTH_NAMES = {name: i for i, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1)}
+DAY_NAMES = {name: i for i, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])}
+
+
+class CronExpr:
+    """Five-field cron expression (minute hour day-of-month month day-of-week)"""
+
+    def __init__(self, expr: str, tz: str = None):
+        self.expr = expr
+        self.tz = ZoneInfo(tz) if tz else timezone.utc
+        fields = MACROS.get(expr.strip().lower(), expr).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expr!r}")
+
+        self.minutes = self._parse(fields[0], 0, 59)
+        self.hours = self._parse(fields[1], 0, 23)
+        self.days = self._parse(fields[2], 1, 31)
+        self.months = self._parse(fields[3], 1, 12, MONTH_NAMES)
+        self.weekdays = {d % 7 for d in self._parse(fields[4], 0, 7, DAY_NAMES)}
+        # Vixie cron: if both day fields are restricted, either may match
+        self.day_or = fields[2] != "*" and fields[4] != "*"
+
+    @staticmethod
+    def _parse(field: str, lo: int, hi: int, names: Dict[str, int] = None) -> set:
+        def value(token):
+            token = token.lower()
+            if names and token[:3] in names:
+                return names[token[:3]]
+            number = int(token)
+            if not lo <= number <= hi:
+                raise ValueError(f"{number} out of range {lo}-{hi}")
+            return number
+
+        values = set()
+        for part in field.split(","):
+            base, _, step = part.partition("/")
+            if base == "*":
+                start, end = lo, hi
+            elif "-" in base:
+                first, last = base.split("-", 1)
+                start, end = value(first), value(last)
+            else:
+                start = value(base)
+                end = hi if step else start
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+    def _day_matches(self, t: datetime) -> bool:
+        dom = t.day in self.days
+        dow = t.isoweekday() % 7 in self.weekdays
+        return (dom or dow) if self.day_or else (dom and dow)
+
+    def next_after(self, after: datetime) -> datetime:
+        """First matching minute strictly after `after` (aware datetime)"""
+        t = after.astimezone(self.tz).replace(tzinfo=None, second=0, microsecond=0)
+        t += timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(t):
+                t = (t + timedelta(days=1)).replace(hour=0, minute=0)
+            elif t.hour not in self.hours:
+                t = (t + timedelta(hours=1)).replace(minute=0)
+            else:
+                minute = min((m for m in self.minutes if m >= t.minute), default=None)
+                if minute is None:
+                    t = (t + timedelta(hours=1)).replace(minute=0)
+                else:
+                    return t.replace(minute=minute, tzinfo=self.tz)
+        raise ValueError(f"Cron expression never matches: {self.expr!r}")
+
+    def next_after_ms(self, after_ms: int) -> int:
+        after = datetime.fromtimestamp(after_ms / 1000, timezone.utc)
+        return int(self.next_after(after).timestamp() * 1000)
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+def next_run_ms(schedule: Dict[str, Any], after_ms: int) -> Optional[int]:
+    """Next fire time for a job's schedule block ("cron" or "every")"""
+    kind = schedule.get("kind", "cron")
+    if kind == "cron":
+        return CronExpr(schedule["expr"], schedule.get("tz")).next_after_ms(after_ms)
+    if kind == "every":
+        every = int(schedule["everyMs"])
+        anchor = int(schedule.get("anchorMs", 0))
+        return after_ms + every - (after_ms - anchor) % every
+    return None
+
+
+class _ThreadOutput:
+    """sys.stdout/stderr stand-in that routes writes from job threads to their buffers"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffers = {}
+
+    def write(self, text):
+        return self.buffers.get(threading.get_ident(), self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def install_output_capture():
+    """Make job entry points importable and route their output per thread"""
+    for path in (str(REPO_ROOT), str(SCRIPTS_DIR)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    for name in ("stdout", "stderr"):
+        if not isinstance(getattr(sys, name), _ThreadOutput):
+            setattr(sys, name, _ThreadOutput(getattr(sys, name)))
+
+def _resolve_entry(payload: Dict[str, Any]) -> tuple:
+    """(callable, instance) for "module:function" or "module:Class.method"
+
+    A class in the path is instantiated with payload["init"] as kwargs; the
+    instance is returned so its cleanup() can run afterwards.
+    """
+    module_name, _, path = payload["entry"].partition(":")
+    target = importlib.import_module(module_name)
+    instance = None
+    parts = (path or "main").split(".")
+    for i, part in enumerate(parts):
+        target = getattr(target, part)
+        if isinstance(target, type) and i < len(parts) - 1:
+            target = instance = target(**payload.get("init", {}))
+    return target, instance
+
+def execute_payload(payload: Dict[str, Any]) -> tuple:
+    """Run a python or command payload, returning (status, captured output, result)
+
+    Python entry points run on the calling thread; install_output_capture()
+    must have been called for their output to be captured.
+    """
+    if payload.get("kind") == "command":
+        try:
+            completed = subprocess.run(payload["argv"], cwd=payload.get("cwd", REPO_ROOT),
+                                       capture_output=True, text=True,
+                                       timeout=payload.get("timeoutSeconds"))
+        except (OSError, subprocess.TimeoutExpired) as e:
+            return "error", str(e), None
+        status = "ok" if completed.returncode == 0 else "error"
+        return status, completed.stdout + completed.stderr, completed.returncode
+
+    buffer = io.StringIO()
+    ident = threading.get_ident()
+    capture = isinstance(sys.stdout, _ThreadOutput) and isinstance(sys.stderr, _ThreadOutput)
+    if capture:
+        sys.stdout.buffers[ident] = buffer
+        sys.stderr.buffers[ident] = buffer
+    result = None
+    instance = None
+    try:
+        func, instance = _resolve_entry(payload)
+        result = func(*payload.get("args", []), **payload.get("kwargs", {}))
+        status = "ok"
+    except SystemExit as e:
+        status = "ok" if e.code in (None, 0) else "error"
+    except Exception:
+        traceback.print_exc()
+        status = "error"
+    finally:
+        if instance is not None and hasattr(instance, "cleanup"):
+            try:
+                instance.cleanup()
+            except Exception:
+                traceback.print_exc()
+        if capture:
+            sys.stdout.buffers.pop(ident, None)
+            sys.stderr.buffers.pop(ident, None)
+    return status, buffer.getvalue(), result
+
+
+class CronScheduler:
+    """Runs native jobs from native_jobs.json and keeps their state there"""
+
+    def __init__(self, jobs_path: str = None, workers: int = WORKERS, deliver: bool = True):
+        self.jobs_path = Path(jobs_path or JOBS_PATH)
+        self.log_dir = self.jobs_path.parent / "logs"
+        self.lock_dir = self.jobs_path.parent / ".locks"
+        self.deliver = deliver
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cron")
+        self.running = {}
+        self.jitter = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+        install_output_capture()
+
+    # --- native_jobs.json ------------------------------------------------
+
+    def load_jobs(self) -> List[Dict[str, Any]]:
+        with open(self.jobs_path) as f:
+            return json.load(f).get("jobs", [])
+
+    def native_jobs(self) -> List[Dict[str, Any]]:
+        return [job for job in self.load_jobs()
+                if job.get("enabled", True) and job.get("payload", {}).get("kind") in NATIVE_KINDS]
+
+    def update_state(self, job_id: str, **changes):
+        """Merge changes into one job's state block (read-modify-write under a file lock)"""
+        with self.lock, open(f"{self.jobs_path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            with open(self.jobs_path) as f:
+                data = json.load(f)
+            for job in data.get("jobs", []):
+                if job_key(job) == job_id:
+                    job.setdefault("state", {}).update(changes)
+            tmp_path = f"{self.jobs_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, indent=2)
+                f.write("\n")
+            os.replace(tmp_path, self.jobs_path)
+
+    # --- scheduling ------------------------------------------------------
+
+    def tick(self, current_ms: int = None) -> List[str]:
+        """Start every job that is due; returns the ids started"""
+        current_ms = current_ms or now_ms()
+        started = []
+        for job in self.native_jobs():
+            job_id = job_key(job)
+            schedule = job.get("schedule", {})
+            due = job.get("state", {}).get("nextRunAtMs")
+            if due is None:
+                due = next_run_ms(schedule, current_ms)
+                self.update_state(job_id, nextRunAtMs=due)
+            if due is None:
+                continue
+
+            # Jitter is drawn once per due time so restarts don't reshuffle it
+            if self.jitter.get(job_id, (None,))[0] != due:
+                self.jitter[job_id] = (due, random.randint(0, int(schedule.get("jitterMs", 0))))
+            if due + self.jitter[job_id][1] > current_ms:
+                continue
+
+            runs = 1
+            if current_ms - due > CATCH_UP_GRACE_MS + int(schedule.get("jitterMs", 0)):
+                missed = self._missed_runs(schedule, due, current_ms)
+                policy = job.get("catchUp", "one")
+                print(f"⏰ {job_id}: {missed} run(s) missed since "
+                      f"{datetime.fromtimestamp(due / 1000, timezone.utc):%Y-%m-%d %H:%M} UTC "
+                      f"(catchUp={policy})")
+                runs = {"none": 0, "all": missed}.get(policy, 1)
+            self.update_state(job_id, nextRunAtMs=next_run_ms(schedule, current_ms))
+
+            if runs and self.submit(job, runs):
+                started.append(job_id)
+        return started
+
+    def _missed_runs(self, schedule, due, current_ms) -> int:
+        missed = 0
+        while due is not None and due <= current_ms and missed < MAX_CATCH_UP:
+            missed += 1
+            due = next_run_ms(schedule, due)
+        return missed
+
+    def submit(self, job: Dict[str, Any], runs: int = 1) -> bool:
+        """Run a job on the pool unless a previous run is still going"""
+        job_id = job_key(job)
+        with self.lock:
+            future = self.running.get(job_id)
+            if future is not None and not future.done():
+                print(f"⏭️ {job_id}: previous run still in progress, skipping")
+                return False
+            self.running[job_id] = self.pool.submit(self._run_repeated, job, runs)
+        return True
+
+    def _run_repeated(self, job, runs):
+        for _ in range(runs):
+            result = self.run_job(job)
+            if result["status"] == "skipped":
+                break
+        return result
+
+    def run_forever(self, poll_interval: float = POLL_INTERVAL):
+        """Tick until stop() is called, sleeping until the next job is due"""
+        print(f"🕐 Cron scheduler watching {self.jobs_path}")
+        while not self.stop_event.is_set():
+            try:
+                self.tick()
+                wait = self._seconds_until_next(poll_interval)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"❌ Scheduler error: {e}")
+                wait = poll_interval
+            self.stop_event.wait(wait)
+
+    def _seconds_until_next(self, poll_interval) -> float:
+        wait = poll_interval
+        for job in self.native_jobs():
+            due = job.get("state", {}).get("nextRunAtMs")
+            if due is None:
+                continue
+            drawn_for, offset = self.jitter.get(job_key(job), (None, 0))
+            start = due + (offset if drawn_for == due else 0)
+            wait = min(wait, (start - now_ms()) / 1000)
+        return max(0.05, wait)
+
+    def stop(self, wait: bool = True):
+        self.stop_event.set()
+        self.pool.shutdown(wait=wait)
+
+    # --- execution -------------------------------------------------------
+
+    def run_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one job synchronously, record its state and announce the result"""
+        job_id = job_key(job)
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_dir / f"{job_id}.lock", "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                print(f"⏭️ {job_id}: already running in another process, skipping")
+                return {"status": "skipped", "output": ""}
+
+            started = now_ms()
+            status, output, _ = execute_payload(job.get("payload", {}))
+            duration = now_ms() - started
+
+        previous = job.get("state", {}).get("consecutiveErrors", 0)
+        self.update_state(job_id, lastRunAtMs=started, lastDurationMs=duration,
+                          lastStatus=status,
+                          consecutiveErrors=0 if status == "ok" else previous + 1)
+        job.setdefault("state", {})["consecutiveErrors"] = 0 if status == "ok" else previous + 1
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.log_dir / f"{job_id}.log", "w") as f:
+            f.write(output)
+        icon = "✅" if status == "ok" else "❌"
+        print(f"{icon} {job_id}: {status} in {duration / 1000:.1f}s")
+        self._announce(job, status, duration, output)
+        return {"status": status, "durationMs": duration, "output": output}
+
+    def _announce(self, job, status, duration, output):
+        """Queue the job result for Slack (never blocks on the network)"""
+        delivery = job.get("delivery", {})
+        if not self.deliver or delivery.get("mode") != "announce" or delivery.get("channel") != "slack":
+            return
+        try:
+            import slack_outbox
+            tail = output[-OUTPUT_TAIL:].strip() or "(no output)"
+            icon = "✅" if status == "ok" else "❌"
+            slack_outbox.enqueue_message(
+                f"{icon} *{job.get('name', job_key(job))}* {status} in {duration / 1000:.1f}s\n```\n{tail}\n```",
+                delivery.get("to"))
+        except Exception as e:
+            if not delivery.get("bestEffort"):
+                raise
+            print(f"⚠️ {job_key(job)}: announce failed: {e}")
+
+
+def job_key(job: Dict[str, Any]) -> str:
+    return job.get("id") or job["name"]
+
+def main():
+    """Command-line interface"""
+    parser = argparse.ArgumentParser(description="Native Cron Scheduler")
+    parser.add_argument("action", choices=["run", "list", "run-now", "next"], help="Action to perform")
+    parser.add_argument("target", nargs="*", help="Job id (run-now) or cron expression and count (next)")
+    parser.add_argument("--jobs", default=JOBS_PATH, help=f"Native jobs file (default: {JOBS_PATH})")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Concurrent jobs")
+    parser.add_argument("--no-deliver", action="store_true", help="Don't announce results to Slack")
+    parser.add_argument("--tz", help="Time zone for 'next'")
+
+    args = parser.parse_args()
+
+    if args.action == "next":
+        if not args.target:
+            print("❌ Error: cron expression required")
+            sys.exit(1)
+        expr = CronExpr(args.target[0], args.tz)
+        t = datetime.now(timezone.utc)
+        for _ in range(int(args.target[1]) if len(args.target) > 1 else 5):
+            t = expr.next_after(t)
+            print(f"  {t.isoformat()}")
+        return
+
+    scheduler = CronScheduler(args.jobs, args.workers, deliver=not args.no_deliver)
+    try:
+        if args.action == "list":
+            for job in scheduler.load_jobs():
+                kind = job.get("payload", {}).get("kind")
+                state = job.get("state", {})
+                due = state.get("nextRunAtMs")
+                due_text = (datetime.fromtimestamp(due / 1000, timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+                            if due else "-")
+                native = "native" if kind in NATIVE_KINDS else "agent"
+                enabled = "" if job.get("enabled", True) else " (disabled)"
+                print(f"  {job_key(job)} [{native}{enabled}] {job.get('schedule', {}).get('expr', '')} "
+                      f"next: {due_text} last: {state.get('lastStatus', '-')} "
+                      f"errors: {state.get('consecutiveErrors', 0)}")
+
+        elif args.action == "run-now":
+            if not args.target:
+                print("❌ Error: job id required for 'run-now'")
+                sys.exit(1)
+            job = next((j for j in scheduler.load_jobs() if job_key(j) == args.target[0]), None)
+            if job is None or job.get("payload", {}).get("kind") not in NATIVE_KINDS:
+                print(f"❌ Error: no native job named {args.target[0]}")
+                sys.exit(1)
+            result = scheduler.run_job(job)
+            sys.exit(0 if result["status"] == "ok" else 1)
+
+        elif args.action == "run":
+            try:
+                scheduler.run_forever()
+            except KeyboardInterrupt:
+                pass
+    finally:
+        scheduler.stop(wait=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Live Memory Ingestion
+Watches MEMORY.md, thoughts.md, journal.md and workspace logs and pushes
+what changed into chunks/chunks_fts within seconds, instead of waiting for
+the nightly compression run.
+
+Files are cut into chunks at headings and at content-defined paragraph (log:
+line) boundaries, so an edit only changes the chunks around it. The chunk
+hashes of every ingested file are kept in `ingest_chunks`; a re-ingest
+inserts new hashes, deletes vanished ones and only renumbers lines of
+chunks that moved. Grown logs are re-read from their last chunk on.
+
+Usage:
+  python3 live_ingest.py watch [--poll] [--debounce 2]
+  python3 live_ingest.py once [PATH ...]
+  python3 live_ingest.py status
+"""
+
+import os
+import re
+import sys
+import time
+import zlib
+import fnmatch
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from typing import Dict, List, Iterable, Optional
+
+import memory_metrics
+from workspace_catalog import WORKSPACE_PATH, WATCH_MASK, IN_MODIFY, IN_Q_OVERFLOW, IN_ISDIR, IN_CREATE, \
+    IN_MOVED_TO, Inotify, WorkspaceCatalog
+
+DB_PATH = "/home/openclaw/.openclaw/memory/main.sqlite"
+
+# basename pattern -> chunk source
+WATCH_PATTERNS = {
+    "MEMORY.md": "memory",
+    "thoughts.md": "thinking",
+    "journal.md": "journal",
+    "*.log": "logs",
+}
+MODEL = "live-ingest"  # chunks.model for rows owned by this ingester
+
+CHUNK_CHARS = 1600  # ~400 tokens
+MIN_CHUNK_CHARS = 400  # no content-defined cut before this
+ANCHOR_MODULUS = 4  # ~1 in 4 paragraphs past MIN_CHUNK_CHARS ends a chunk
+BATCH_SIZE = 64  # chunk writes per commit
+DEBOUNCE_SECONDS = 2.0  # quiet time after the last write
+MAX_DELAY_SECONDS = 10.0  # a file written continuously is ingested at least this often
+POLL_INTERVAL = 10.0  # seconds between scans without inotify
+HEAD_BYTES = 4096  # prefix hashed to tell an appended log from a rewritten one
+
+HEADING_RE = re.compile(rb"#{1,6}\s")
+FENCE = b"```"
+
+INGEST_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS ingest_files (
+    path TEXT PRIMARY KEY,     -- relative to the workspace
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    head_hash TEXT NOT NULL,   -- sha256 of the first HEAD_BYTES (or fewer)
+    ingested_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ingest_chunks (
+    path TEXT NOT NULL,
+    chunk_id TEXT NOT NULL,    -- chunks.id
+    hash TEXT NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    start_offset INTEGER NOT NULL,
+    fts_rowid INTEGER NOT NULL,
+    PRIMARY KEY (path, chunk_id)
+) WITHOUT ROWID;
+'''
+
+
+def _blocks(data: bytes, is_log: bool, first_line: int, base_offset: int):
+    """(start_line, end_line, start, end) byte spans of paragraphs (markdown) or lines (logs)"""
+    block = None
+    in_fence = False
+    offset = 0
+    for number, line in enumerate(data.splitlines(keepends=True), first_line):
+        start, offset = offset, offset + len(line)
+        stripped = line.strip()
+        if not is_log and stripped.startswith(FENCE):
+            in_fence = not in_fence
+        if not in_fence and not stripped:
+            if block:
+                yield block
+            block = None
+            continue
+        if block and (is_log or (not in_fence and HEADING_RE.match(stripped))):
+            yield block
+            block = None
+        if block:
+            block[1], block[3] = number, base_offset + offset
+        else:
+            block = [number, number, base_offset + start, base_offset + offset]
+    if block:
+        yield block
+
+
+def chunk_bytes(data: bytes, is_log: bool = False, first_line: int = 1,
+                base_offset: int = 0) -> List[tuple]:
+    """[(start_line, end_line, start_offset, text)] for a file's contents
+
+    A chunk ends before a heading, before it would outgrow CHUNK_CHARS, or
+    after a block whose hash hits the anchor once it has MIN_CHUNK_CHARS.
+    The anchor depends only on the block itself, so boundaries resync right
+    after an edit instead of shifting through the rest of the file.
+    """
+    chunks = []
+    current = None
+
+    def flush():
+        start, end = current[2] - base_offset, current[3] - base_offset
+        text = data[start:end].decode("utf-8", errors="replace").strip()
+        if text:
+            chunks.append((current[0], current[1], current[2], text))
+
+    for start_line, end_line, start, end in _blocks(data, is_log, first_line, base_offset):
+        body = data[start - base_offset:end - base_offset]
+        if current and ((not is_log and HEADING_RE.match(body.lstrip()))
+                        or end - current[2] > CHUNK_CHARS):
+            flush()
+            current = None
+        if current:
+            current[1], current[3] = end_line, end
+        else:
+            current = [start_line, end_line, start, end]
+        if current[3] - current[2] >= MIN_CHUNK_CHARS and zlib.crc32(body.strip()) % ANCHOR_MODULUS == 0:
+            flush()
+            current = None
+    if current:
+        flush()
+    return chunks
+
+
+class Debouncer:
+    """Coalesces bursts of events per path
+
+    A path is due `delay` seconds after its last event, but never later than
+    `max_delay` after its first, so a constantly growing log still flows.
+    """
+
+    def __init__(self, delay: float = DEBOUNCE_SECONDS, max_delay: float = MAX_DELAY_SECONDS):
+        self.delay = delay
+        self.max_delay = max_delay
+        self.pending = {}  # path -> (first event, due)
+
+    def touch(self, path: str, now: float = None):
+        now = time.monotonic() if now is None else now
+        first = self.pending.get(path, (now, None))[0]
+        self.pending[path] = (first, min(now + self.delay, first + self.max_delay))
+
+    def due(self, now: float = None) -> List[str]:
+        now = time.monotonic() if now is None else now
+        ready = [path for path, (_, due) in self.pending.items() if due <= now]
+        for path in ready:
+            del self.pending[path]
+        return ready
+
+    def timeout(self, now: float = None) -> Optional[float]:
+        """Seconds until the next path is due (None if nothing is pending)"""
+        if not self.pending:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, min(due for _, due in self.pending.values()) - now)
+
+
+class LiveIngestor:
+    """Incrementally mirrors watched workspace files into the chunk index"""
+
+    def __init__(self, db_path: str = None, workspace_path: str = None):
+        self.root = os.path.abspath(workspace_path or WORKSPACE_PATH)
+        self.conn = memory_metrics.connect(db_path or DB_PATH, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(INGEST_SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def source_for(rel_path: str) -> Optional[str]:
+        """Chunk source for a watched file, None for files we don't ingest"""
+        name = os.path.basename(rel_path)
+        for pattern, source in WATCH_PATTERNS.items():
+            if fnmatch.fnmatchcase(name, pattern):
+                return source
+        return None
+
+    def watched_files(self) -> Dict[str, os.stat_result]:
+        """{relative path: stat} for every watched file in the workspace"""
+        found = {}
+        for directory, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if not WorkspaceCatalog.skip(d)]
+            for name in files:
+                rel_path = os.path.relpath(os.path.join(directory, name), self.root)
+                if self.source_for(rel_path):
+                    try:
+                        found[rel_path] = os.stat(os.path.join(directory, name))
+                    except FileNotFoundError:
+                        continue
+        return found
+
+    def changed_files(self) -> List[str]:
+        """Watched files that differ from (or are missing since) their last ingest"""
+        on_disk = self.watched_files()
+        known = {path: (size, mtime_ns) for path, size, mtime_ns in
+                 self.conn.execute("SELECT path, size, mtime_ns FROM ingest_files")}
+        changed = [path for path, stat in on_disk.items()
+                   if known.get(path) != (stat.st_size, stat.st_mtime_ns)]
+        return changed + [path for path in known if path not in on_disk]
+
+    # --- ingest ----------------------------------------------------------
+
+    def ingest(self, rel_paths: Iterable[str]) -> Dict[str, int]:
+        """Bring the chunk index up to date for these files; returns totals"""
+        totals = Counter()
+        for rel_path in sorted(set(rel_paths)):
+            try:
+                totals.update(self.ingest_file(rel_path))
+            except OSError as e:
+                print(f"⚠️ Could not ingest {rel_path}: {e}", file=sys.stderr)
+        return dict(totals)
+
+    def ingest_file(self, rel_path: str) -> Dict[str, int]:
+        source = self.source_for(rel_path)
+        if source is None:
+            return {}
+        full_path = os.path.join(self.root, rel_path)
+        old = {row[0]: row[1:] for row in self.conn.execute('''
+            SELECT chunk_id, hash, start_line, end_line, start_offset, fts_rowid
+            FROM ingest_chunks WHERE path = ?
+        ''', (rel_path,))}
+
+        try:
+            with open(full_path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                head = f.read(HEAD_BYTES)
+                tail = self._append_tail(rel_path, source, stat, head, old)
+                f.seek(tail[0] if tail else 0)
+                data = f.read()
+        except FileNotFoundError:
+            counts = self._apply(rel_path, source, old, [])
+            self.conn.execute("DELETE FROM ingest_files WHERE path = ?", (rel_path,))
+            self.conn.commit()
+            return counts
+
+        if tail:
+            # Chunks before the last one are untouched by an append
+            offset, first_line = tail
+            new = chunk_bytes(data, True, first_line, offset)
+            kept = {cid: row for cid, row in old.items() if row[3] < offset}
+            old = {cid: row for cid, row in old.items() if row[3] >= offset}
+        else:
+            new = chunk_bytes(data, source == "logs")
+            kept = {}
+
+        counts = self._apply(rel_path, source, old, new, kept)
+        self.conn.execute('''
+            INSERT OR REPLACE INTO ingest_files (path, size, mtime_ns, inode, head_hash, ingested_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (rel_path, stat.st_size, stat.st_mtime_ns, stat.st_ino,
+              hashlib.sha256(head).hexdigest(), time.time()))
+        self.conn.commit()
+        return counts
+
+    def _append_tail(self, rel_path, source, stat, head, old) -> Optional[tuple]:
+        """(offset, line) of the last chunk if this log only grew since last time"""
+        if source != "logs" or not old:
+            return None
+        previous = self.conn.execute(
+            "SELECT size, inode, head_hash FROM ingest_files WHERE path = ?", (rel_path,)).fetchone()
+        if previous is None or previous[1] != stat.st_ino or stat.st_size < previous[0]:
+            return None
+        # Same inode and bigger, but rotated-and-refilled logs differ at the start
+        if hashlib.sha256(head[:previous[0]]).hexdigest() != previous[2]:
+            return None
+        _, start_line, _, start_offset, _ = max(old.values(), key=lambda row: row[3])
+        return start_offset, start_line
+
+    def _apply(self, rel_path, source, old, new, kept=None) -> Dict[str, int]:
+        """Diff new chunks against the stored ones and write only the difference"""
+        occurrences = Counter(row[0] for row in (kept or {}).values())
+        wanted = {}
+        for start_line, end_line, start_offset, text in new:
+            chunk_hash = hashlib.sha256(text.encode()).hexdigest()
+            chunk_id = f"live:{rel_path}:{chunk_hash[:16]}:{occurrences[chunk_hash]}"
+            occurrences[chunk_hash] += 1
+            wanted[chunk_id] = (chunk_hash, start_line, end_line, start_offset, text)
+
+        now_ms = int(time.time() * 1000)
+        writes = 0
+        counts = Counter()
+
+        def step():
+            nonlocal writes
+            writes += 1
+            if writes % BATCH_SIZE == 0:
+                self.conn.commit()
+
+        for chunk_id, (_, _, _, _, fts_rowid) in old.items():
+            if chunk_id not in wanted:
+                self.conn.execute("DELETE FROM chunks WHERE id = ?", (chunk_id,))
+                self.conn.execute("DELETE FROM chunks_fts WHERE rowid = ?", (fts_rowid,))
+                self.conn.execute("DELETE FROM ingest_chunks WHERE path = ? AND chunk_id = ?",
+                                  (rel_path, chunk_id))
+                counts["deleted"] += 1
+                step()
+
+        for chunk_id, (chunk_hash, start_line, end_line, start_offset, text) in wanted.items():
+            if chunk_id in old:
+                _, old_start, old_end, old_offset, fts_rowid = old[chunk_id]
+                if (old_start, old_end, old_offset) == (start_line, end_line, start_offset):
+                    counts["unchanged"] += 1
+                    continue
+                # Same text, shifted by an edit above it: renumber only
+                self.conn.execute("UPDATE chunks SET start_line = ?, end_line = ? WHERE id = ?",
+                                  (start_line, end_line, chunk_id))
+                self.conn.execute("UPDATE chunks_fts SET start_line = ?, end_line = ? WHERE rowid = ?",
+                                  (start_line, end_line, fts_rowid))
+                self.conn.execute('''
+                    UPDATE ingest_chunks SET start_line = ?, end_line = ?, start_offset = ?
+                    WHERE path = ? AND chunk_id = ?
+                ''', (start_line, end_line, start_offset, rel_path, chunk_id))
+                counts["moved"] += 1
+            else:
+                self.conn.execute('''
+                    INSERT OR REPLACE INTO chunks
+                    (id, path, source, start_line, end_line, hash, model, text, embedding, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, '', ?)
+                ''', (chunk_id, rel_path, source, start_line, end_line, chunk_hash, MODEL, text, now_ms))
+                fts_rowid = self.conn.execute('''
+                    INSERT INTO chunks_fts (text, id, path, source, model, start_line, end_line)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (text, chunk_id, rel_path, source, MODEL, start_line, end_line)).lastrowid
+                self.conn.execute('''
+                    INSERT OR REPLACE INTO ingest_chunks
+                    (path, chunk_id, hash, start_line, end_line, start_offset, fts_rowid)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (rel_path, chunk_id, chunk_hash, start_line, end_line, start_offset, fts_rowid))
+                counts["inserted"] += 1
+            step()
+        return dict(counts)
+
+    def catch_up(self) -> Dict[str, int]:
+        """Ingest everything that changed while nobody was watching"""
+        return self.ingest(self.changed_files())
+
+    # --- watching --------------------------------------------------------
+
+    def watch(self, use_inotify: bool = True, poll_interval: float = POLL_INTERVAL,
+              debounce: float = DEBOUNCE_SECONDS, stop_event: threading.Event = None):
+        """Ingest watched files shortly after they are written, until stop_event is set"""
+        stop_event = stop_event or threading.Event()
+        debouncer = Debouncer(debounce, max(debounce, MAX_DELAY_SECONDS))
+        watcher = None
+        if use_inotify:
+            try:
+                watcher = Inotify(self.root, WorkspaceCatalog.skip, WATCH_MASK | IN_MODIFY)
+            except OSError as e:
+                print(f"⚠️ inotify unavailable ({e}); polling every {poll_interval:g}s")
+        # Catch up after the watches exist, so nothing falls in between
+        self._report(self.catch_up())
+
+        try:
+            while not stop_event.is_set():
+                if watcher is None:
+                    # A poll already sees the settled state; nothing to debounce
+                    stop_event.wait(poll_interval)
+                    changed = self.changed_files()
+                    self._report(self.ingest(changed), changed)
+                    continue
+                timeout = debouncer.timeout()
+                for mask, rel_path in watcher.read(1.0 if timeout is None else min(timeout, 1.0)):
+                    if mask & (IN_Q_OVERFLOW | IN_ISDIR):
+                        # Lost events, or a whole directory came or went: diff against disk
+                        if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                            watcher.add_tree(rel_path)
+                        for changed in self.changed_files():
+                            debouncer.touch(changed)
+                    elif self.source_for(rel_path):
+                        debouncer.touch(rel_path)
+                due = debouncer.due()
+                if due:
+                    self._report(self.ingest(due), due)
+        finally:
+            if watcher is not None:
+                watcher.close()
+
+    @staticmethod
+    def _report(counts: Dict[str, int], paths: List[str] = None):
+        if counts.get("inserted") or counts.get("deleted") or counts.get("moved"):
+            where = f" ({', '.join(paths)})" if paths else ""
+            print(f"📥 +{counts.get('inserted', 0)} -{counts.get('deleted', 0)} "
+                  f"~{counts.get('moved', 0)} chunks{where}", flush=True)
+
+    def status(self) -> List[tuple]:
+        return self.conn.execute('''
+            SELECT f.path, f.size, f.ingested_at, COUNT(c.chunk_id)
+            FROM ingest_files f LEFT JOIN ingest_chunks c ON c.path = f.path
+            GROUP BY f.path ORDER BY f.path
+        ''').fetchall()
+
+
+def main():
+    """Command-line interface"""
+    parser = argparse.ArgumentParser(description="Near-real-time memory ingestion")
+    parser.add_argument("action", choices=["watch", "once", "status"], help="Action to perform")
+    parser.add_argument("paths", nargs="*", help="Workspace-relative files for 'once' (default: all changed)")
+    parser.add_argument("--db", default=DB_PATH, help=f"Memory database (default: {DB_PATH})")
+    parser.add_argument("--workspace", default=WORKSPACE_PATH, help=f"Workspace (default: {WORKSPACE_PATH})")
+    parser.add_argument("--poll", action="store_true", help="Poll instead of using inotify")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="Polling interval in seconds")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS,
+                        help="Seconds of quiet before a file is ingested")
+
+    args = parser.parse_args()
+    ingestor = LiveIngestor(args.db, args.workspace)
+
+    try:
+        if args.action == "watch":
+            try:
+                ingestor.watch(use_inotify=not args.poll, poll_interval=args.interval, debounce=args.debounce)
+            except KeyboardInterrupt:
+                pass
+
+        elif args.action == "once":
+            start = time.perf_counter()
+            counts = ingestor.ingest(args.paths) if args.paths else ingestor.catch_up()
+            print(f"✅ Ingested in {time.perf_counter() - start:.2f}s: {counts.get('inserted', 0)} inserted, "
+                  f"{counts.get('deleted', 0)} deleted, {counts.get('moved', 0)} moved, "
+                  f"{counts.get('unchanged', 0)} unchanged")
+
+        elif args.action == "status":
+            for path, size, ingested_at, chunks in ingestor.status():
+                when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ingested_at))
+                print(f"  {path:<40} {size:>10} bytes {chunks:>5} chunks  {when}")
+
+    finally:
+        ingestor.close()
+
+if __name__ == "__main__":
+    main()
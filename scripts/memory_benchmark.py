@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Memory Benchmark Suite
+Generates a synthetic markdown/log corpus and measures ingest throughput,
+FTS/vector query latency, compression-job wall time and database size.
+
+Usage:
+  python3 memory_benchmark.py run --chunks 10000 --output bench.json
+  python3 memory_benchmark.py run --chunks 1000000 --vectors --queries 500
+  python3 memory_benchmark.py compare baseline.json bench.json
+"""
+
+import argparse
+import hashlib
+import heapq
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+VOCABULARY = (
+    "memory sqlite thinking insight partnership research action integration "
+    "compression importance cron schedule database index query chunk token "
+    "assistant proactive reactive collaboration journal idea decision project "
+    "whisper raspberry linux slack report feedback loop evolution signal noise "
+    "vector embedding search recall context budget latency throughput backup"
+).split()
+
+CHUNKS_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS chunks (
+        id TEXT PRIMARY KEY,
+        path TEXT NOT NULL,
+        source TEXT NOT NULL DEFAULT 'memory',
+        start_line INTEGER NOT NULL,
+        end_line INTEGER NOT NULL,
+        hash TEXT NOT NULL,
+        model TEXT NOT NULL,
+        text TEXT NOT NULL,
+        embedding TEXT NOT NULL,
+        updated_at INTEGER NOT NULL
+    )
+    ''',
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+        text, id UNINDEXED, path UNINDEXED, source UNINDEXED,
+        model UNINDEXED, start_line UNINDEXED, end_line UNINDEXED
+    )
+    ''',
+]
+
+CHUNKS_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks(source)',
+    'CREATE INDEX IF NOT EXISTS idx_chunks_path ON chunks(path)',
+]
+
+MEMORIES_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS memories (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        memory_type TEXT NOT NULL,
+        content TEXT NOT NULL,
+        category TEXT,
+        tags TEXT,
+        importance INTEGER DEFAULT 1,
+        access_count INTEGER DEFAULT 0,
+        last_accessed TEXT,
+        compression_status TEXT DEFAULT 'raw',
+        original_file_path TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts
+    USING fts5(content, tags, content='memories', content_rowid='id')
+    ''',
+]
+
+
+class CorpusGenerator:
+    """Deterministic synthetic markdown and log chunks"""
+
+    SOURCES = ("core_memory_smart", "memory_integration", "thinking", "research", "logs")
+
+    def __init__(self, seed=42, words_per_chunk=107, dims=0):
+        self.rng = random.Random(seed)
+        self.words_per_chunk = words_per_chunk
+        self.dims = dims
+
+    def _sentence(self, words):
+        return " ".join(self.rng.choice(VOCABULARY) for _ in range(words))
+
+    def markdown(self, index):
+        """Return a markdown-style chunk body"""
+        heading = self._sentence(3).title()
+        body = self._sentence(self.words_per_chunk - 3)
+        return f"## {heading} {index}\n\n{body}"
+
+    def log(self, index):
+        """Return a log-style chunk body"""
+        lines = []
+        remaining = self.words_per_chunk
+        while remaining > 0:
+            words = min(remaining, self.rng.randint(6, 14))
+            level = self.rng.choice(("INFO", "INFO", "INFO", "WARN", "ERROR"))
+            lines.append(f"2026-02-27T04:{index % 60:02d}:00Z {level} {self._sentence(words)}")
+            remaining -= words
+        return "\n".join(lines)
+
+    def embedding(self):
+        """Return a unit-length random vector"""
+        vec = [self.rng.gauss(0, 1) for _ in range(self.dims)]
+        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+        return [v / norm for v in vec]
+
+    def chunks(self, count):
+        """Yield chunk rows in the chunks table column order"""
+        now_ms = int(time.time() * 1000)
+        for i in range(count):
+            source = self.SOURCES[i % len(self.SOURCES)]
+            text = self.log(i) if source == "logs" else self.markdown(i)
+            path = f"{source}/{i // 500:05d}.md"
+            chunk_hash = hashlib.sha256(text.encode()).hexdigest()
+            embedding = json.dumps([round(v, 5) for v in self.embedding()]) if self.dims else ""
+            yield (f"{chunk_hash[:16]}:{i}", path, source, i * 10, i * 10 + 9,
+                   chunk_hash, "bench", text, embedding, now_ms - i * 1000)
+
+    def queries(self, count):
+        """Yield FTS query strings of one to three terms"""
+        for _ in range(count):
+            terms = self.rng.sample(VOCABULARY, self.rng.randint(1, 3))
+            yield " ".join(terms)
+
+    def write_workspace(self, workspace, day, files):
+        """Write dated markdown/log files for the compression benchmark"""
+        stamp = day.strftime('%Y-%m-%d')
+        for i in range(files):
+            kind = ("thoughts", "journal", "ideas", "daily_log")[i % 4]
+            suffix = "log" if kind == "daily_log" else "md"
+            body = "\n\n".join(self.markdown(i * 10 + j) for j in range(5))
+            (Path(workspace) / f"{kind}_{stamp}_{i}.{suffix}").write_text(body)
+
+
+def percentiles(samples):
+    """Return p50/p95/p99/max in milliseconds (nearest rank)"""
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None, "max": None, "count": 0}
+    ordered = sorted(samples)
+
+    def rank(p):
+        return round(ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] * 1000, 4)
+
+    return {"p50": rank(50), "p95": rank(95), "p99": rank(99),
+            "max": round(ordered[-1] * 1000, 4), "count": len(ordered)}
+
+
+def bench_ingest(conn, generator, count, batch_size):
+    """Insert chunks and FTS rows in batches; return timing dict"""
+    cursor = conn.cursor()
+    batch = []
+    start = time.perf_counter()
+
+    def flush():
+        cursor.executemany('INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', batch)
+        cursor.executemany('''
+            INSERT INTO chunks_fts (text, id, path, source, model, start_line, end_line)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [(r[7], r[0], r[1], r[2], r[6], r[3], r[4]) for r in batch])
+        conn.commit()
+        batch.clear()
+
+    for row in generator.chunks(count):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    index_start = time.perf_counter()
+    for statement in CHUNKS_INDEXES:
+        cursor.execute(statement)
+    conn.commit()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "chunks": count,
+        "seconds": round(elapsed, 4),
+        "index_seconds": round(time.perf_counter() - index_start, 4),
+        "chunks_per_second": round(count / elapsed, 1) if elapsed else None,
+    }
+
+
+def bench_fts(conn, generator, queries, limit):
+    """Time snippet queries the way memory_query.query_memory issues them"""
+    samples = []
+    hits = 0
+    for term in generator.queries(queries):
+        start = time.perf_counter()
+        rows = conn.execute('''
+            SELECT snippet(chunks_fts, 0, '[', ']', '...', 2) as snippet, source, path
+            FROM chunks_fts
+            WHERE chunks_fts MATCH ?
+            LIMIT ?
+        ''', (term, limit)).fetchall()
+        samples.append(time.perf_counter() - start)
+        hits += len(rows)
+    result = percentiles(samples)
+    result["avg_hits"] = round(hits / queries, 2) if queries else 0
+    return result
+
+
+def bench_vector(conn, generator, queries, limit, max_rows):
+    """Brute-force cosine scan over JSON embeddings (there is no vector index yet)"""
+    samples = []
+    for _ in range(queries):
+        probe = generator.embedding()
+        start = time.perf_counter()
+        rows = conn.execute(
+            "SELECT id, embedding FROM chunks WHERE embedding != '' LIMIT ?", (max_rows,))
+        heapq.nlargest(limit, (
+            (sum(a * b for a, b in zip(probe, json.loads(embedding))), chunk_id)
+            for chunk_id, embedding in rows))
+        samples.append(time.perf_counter() - start)
+    result = percentiles(samples)
+    result["rows_scanned"] = max_rows
+    return result
+
+
+def bench_compression(workdir, generator, files):
+    """Run DailyMemoryCompressor.compress_yesterday_files over a generated workspace"""
+    from memory_compressor import DailyMemoryCompressor
+
+    workspace = Path(workdir) / "workspace"
+    workspace.mkdir()
+    db_path = str(Path(workdir) / "compression.sqlite")
+    conn = sqlite3.connect(db_path)
+    for statement in MEMORIES_SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+    conn.close()
+
+    yesterday = datetime.now(timezone.utc).date() - timedelta(days=1)
+    generator.write_workspace(workspace, yesterday, files)
+
+    compressor = DailyMemoryCompressor(db_path, workspace_path=str(workspace))
+    start = time.perf_counter()
+    devnull = open(os.devnull, 'w')
+    stdout, sys.stdout = sys.stdout, devnull
+    try:
+        compressed = compressor.run_daily_compression()
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+    elapsed = time.perf_counter() - start
+    compressor.cleanup()
+
+    return {"files": files, "compressed": compressed, "seconds": round(elapsed, 4)}
+
+
+def run(args):
+    """Run the full benchmark and return the result dict"""
+    workdir = args.workdir or tempfile.mkdtemp(prefix="claw_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    db_path = os.path.join(workdir, "bench.sqlite")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    dims = args.dims if args.vectors else 0
+    generator = CorpusGenerator(seed=args.seed, words_per_chunk=args.words, dims=dims)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute(f'PRAGMA journal_mode={args.journal_mode}')
+    for statement in CHUNKS_SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("func",)},
+        }
+    }
+
+    print(f"⏱️  Ingesting {args.chunks} chunks...", file=sys.stderr)
+    results["ingest"] = bench_ingest(conn, generator, args.chunks, args.batch_size)
+
+    print(f"⏱️  Running {args.queries} FTS queries...", file=sys.stderr)
+    results["fts_query_ms"] = bench_fts(conn, generator, args.queries, args.limit)
+
+    if args.vectors:
+        print(f"⏱️  Running {args.vector_queries} vector queries...", file=sys.stderr)
+        results["vector_query_ms"] = bench_vector(
+            conn, generator, args.vector_queries, args.limit, min(args.chunks, args.vector_rows))
+
+    conn.close()
+    results["db_size_bytes"] = os.path.getsize(db_path)
+
+    if args.compress_files:
+        print(f"⏱️  Compressing {args.compress_files} files...", file=sys.stderr)
+        results["compression"] = bench_compression(workdir, generator, args.compress_files)
+
+    if not args.workdir and not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def _flatten(data, prefix=""):
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline_path, current_path):
+    """Print per-metric deltas between two result files"""
+    with open(baseline_path) as f:
+        baseline = _flatten(json.load(f))
+    with open(current_path) as f:
+        current = _flatten(json.load(f))
+
+    print(f"{'Metric':<36} {'Baseline':>14} {'Current':>14} {'Change':>9}")
+    print("-" * 76)
+    for name in sorted(set(baseline) & set(current)):
+        if name.startswith("meta."):
+            continue
+        old, new = baseline[name], current[name]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{name:<36} {old:>14} {new:>14} {change:>9}")
+
+
+def main():
+    """Command-line interface"""
+    parser = argparse.ArgumentParser(description="Memory ingest/search benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Generate a corpus and run the benchmark")
+    run_parser.add_argument("--chunks", type=int, default=10000, help="Chunks to ingest (default: 10000)")
+    run_parser.add_argument("--words", type=int, default=107, help="Words per chunk (default: 107)")
+    run_parser.add_argument("--batch-size", type=int, default=5000, help="Rows per ingest transaction")
+    run_parser.add_argument("--queries", type=int, default=200, help="FTS queries to time")
+    run_parser.add_argument("--limit", type=int, default=10, help="Result limit per query")
+    run_parser.add_argument("--vectors", action="store_true", help="Also store embeddings and time vector scans")
+    run_parser.add_argument("--dims", type=int, default=64, help="Embedding dimensions (with --vectors)")
+    run_parser.add_argument("--vector-queries", type=int, default=20, help="Vector queries to time")
+    run_parser.add_argument("--vector-rows", type=int, default=50000, help="Max rows per vector scan")
+    run_parser.add_argument("--compress-files", type=int, default=50,
+                            help="Dated files for the compression job (0 to skip)")
+    run_parser.add_argument("--journal-mode", default="WAL", help="SQLite journal mode")
+    run_parser.add_argument("--seed", type=int, default=42, help="Corpus random seed")
+    run_parser.add_argument("--workdir", help="Directory for the benchmark database (kept)")
+    run_parser.add_argument("--keep", action="store_true", help="Keep the temporary workdir")
+    run_parser.add_argument("--output", "-o", help="Write JSON results to this file")
+
+    compare_parser = sub.add_parser("compare", help="Compare two JSON result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        compare(args.baseline, args.current)
+        return
+
+    results = run(args)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+        print(f"✅ Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Token-Budgeted Context Assembly
+Agents used to paste the top 5 search hits into the prompt, duplicates and
+all. This takes a query and a token budget, pulls a few dozen FTS
+candidates from chunks and memories, drops exact and near duplicates,
+re-ranks for diversity (MMR) and fills the budget greedily by
+importance-weighted relevance. The result is a ready-to-insert block
+where every entry says where it came from.
+
+Tokens are counted locally (words and punctuation, long words split), which
+errs slightly high against BPE tokenizers, so the block stays inside the
+budget without a tokenizer dependency.
+
+Usage:
+  python3 memory_context.py "sqlite wal checkpoint" [--budget 1000]
+  python3 memory_context.py "cron schedule" --json     # block + provenance + timings
+"""
+
+import re
+import json
+import time
+import hashlib
+import argparse
+
+import memory_metrics
+from memory_fts_query import fts_phrase
+from memory_fuzzy import QueryExpander, ensure_fuzzy
+from memory_time import format_ms, time_sql
+
+DB_PATH = "/home/openclaw/.openclaw/memory/main.sqlite"
+
+BUDGET = 1000            # tokens for the whole block, headers included
+CANDIDATES = 30          # FTS hits fetched per source
+SCAN_ROWS = 2000         # newest matches per source that get bm25-ranked
+MMR_LAMBDA = 0.7         # 1.0 = pure relevance, 0.0 = pure novelty
+DUPLICATE_SIMILARITY = 0.8  # token-set Jaccard at which two candidates are the same text
+IMPORTANCE_WEIGHT = 0.25    # score multiplier per importance point above 1
+CHUNK_IMPORTANCE = 2     # chunks have no importance column
+MIN_PART_TOKENS = 40     # smallest truncated entry worth including
+
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+WORD_RE = re.compile(r"\w+")
+WORD_CHARS_PER_TOKEN = 6
+
+
+def count_tokens(text):
+    """Local token estimate: one per punctuation mark, one per 6 word characters"""
+    return sum(1 + (len(t) - 1) // WORD_CHARS_PER_TOKEN for t in TOKEN_RE.findall(text))
+
+
+def truncate_tokens(text, max_tokens):
+    """Prefix of text holding at most max_tokens tokens (cut at a token boundary)"""
+    used = 0
+    end = 0
+    for match in TOKEN_RE.finditer(text):
+        token = match.group()
+        used += 1 + (len(token) - 1) // WORD_CHARS_PER_TOKEN
+        if used > max_tokens:
+            break
+        end = match.end()
+    return text[:end]
+
+
+def match_terms(query, expand=None):
+    """FTS5 MATCH string OR-ing the query's words (quoted, so punctuation can't break it)
+
+    expand(word) adds alternatives (synonyms, spelling fixes) to the OR.
+    """
+    words = dict.fromkeys(w.lower() for w in WORD_RE.findall(query))
+    if expand:
+        for word in list(words):
+            words.update(dict.fromkeys(expand(word)))
+    return " OR ".join(fts_phrase(w) for w in words if fts_phrase(w))
+
+
+def _has_table(conn, name):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def fetch_candidates(conn, query, limit=CANDIDATES, scan_rows=SCAN_ROWS, expand=None):
+    """Best-ranked chunks and memories for query as dicts (text, relevance, importance, source...)
+
+    bm25 is computed for the newest scan_rows matches per table only (FTS5
+    walks rowids newest-first and stops there), so a query matching most of
+    the store costs the same as a narrow one. Relevance is bm25 normalized
+    per table (best hit = 1.0), so the two sources are comparable without a
+    shared scale.
+    """
+    terms = match_terms(query, expand)
+    if not terms:
+        return []
+    candidates = []
+
+    if _has_table(conn, 'chunks_fts'):
+        rows = conn.execute('''
+            WITH hits AS (
+                SELECT chunks_fts.rowid AS hit, bm25(chunks_fts) AS rank
+                FROM chunks_fts WHERE chunks_fts MATCH ?
+                ORDER BY chunks_fts.rowid DESC LIMIT ?)
+            SELECT f.id, f.path, f.source, f.start_line, f.end_line, f.text, hits.rank
+            FROM hits JOIN chunks_fts f ON f.rowid = hits.hit
+            ORDER BY hits.rank LIMIT ?
+        ''', (terms, scan_rows, limit)).fetchall()
+        candidates += _normalized([
+            {'kind': 'chunk', 'id': chunk_id, 'text': text, 'rank': rank,
+             'importance': CHUNK_IMPORTANCE,
+             'ref': f'{path}:{start_line}-{end_line}', 'source': source}
+            for chunk_id, path, source, start_line, end_line, text, rank in rows])
+
+    if _has_table(conn, 'memories_fts'):
+        rows = conn.execute(f'''
+            WITH hits AS (
+                SELECT memories_fts.rowid AS hit, bm25(memories_fts) AS rank
+                FROM memories_fts WHERE memories_fts MATCH ?
+                ORDER BY memories_fts.rowid DESC LIMIT ?)
+            SELECT m.id, m.memory_type, m.importance, {time_sql(conn, 'memories', 'm')},
+                   m.content, hits.rank
+            FROM hits JOIN memories m ON m.id = hits.hit
+            ORDER BY hits.rank LIMIT ?
+        ''', (terms, scan_rows, limit)).fetchall()
+        candidates += _normalized([
+            {'kind': 'memory', 'id': memory_id, 'text': content, 'rank': rank,
+             'importance': importance or 1,
+             'ref': f'memory #{memory_id}',
+             'source': f'{memory_type}, {format_ms(time_ms, "%Y-%m-%d")}' if time_ms else memory_type}
+            for memory_id, memory_type, importance, time_ms, content, rank in rows])
+
+    return candidates
+
+
+def _normalized(candidates):
+    """Add relevance (bm25 / best bm25, so 1.0 for the top hit) and the weighted score"""
+    best = min((c['rank'] for c in candidates), default=0) or -1.0
+    for c in candidates:
+        c['relevance'] = c['rank'] / best
+        c['score'] = c['relevance'] * (1 + IMPORTANCE_WEIGHT * (c['importance'] - 1))
+    return candidates
+
+
+def _similarity(a, b):
+    """Jaccard similarity of two token sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def deduplicate(candidates, threshold=DUPLICATE_SIMILARITY):
+    """(kept, dropped): best-scored copy of each exact or near-duplicate text
+
+    Adds each candidate's lowercase word set as 'words' for the MMR pass.
+    """
+    kept = []
+    seen = set()
+    dropped = 0
+    for c in sorted(candidates, key=lambda c: -c['score']):
+        text = " ".join(str(c['text']).split())
+        digest = hashlib.blake2b(text.lower().encode(), digest_size=16).digest()
+        c['text'] = text
+        c['words'] = set(WORD_RE.findall(text.lower()))
+        if digest in seen or any(_similarity(c['words'], k['words']) >= threshold for k in kept):
+            dropped += 1
+            continue
+        seen.add(digest)
+        kept.append(c)
+    return kept, dropped
+
+
+def _header(position, candidate):
+    return f"[{position}] {candidate['ref']} ({candidate['source']})"
+
+
+def select(candidates, budget, mmr_lambda=MMR_LAMBDA):
+    """MMR-ordered candidates that fit in budget tokens, as (candidate, text, tokens)
+
+    Each step takes the candidate with the best
+    lambda * score - (1 - lambda) * max similarity to what's already chosen;
+    one that doesn't fit is cut to the remaining budget if at least
+    MIN_PART_TOKENS remain, otherwise skipped.
+    """
+    redundancy = {id(c): 0.0 for c in candidates}
+    remaining = list(candidates)
+    chosen = []
+    left = budget
+    while remaining and left > 0:
+        best = max(remaining, key=lambda c: mmr_lambda * c['score'] - (1 - mmr_lambda) * redundancy[id(c)])
+        remaining.remove(best)
+        for c in remaining:
+            redundancy[id(c)] = max(redundancy[id(c)], _similarity(c['words'], best['words']))
+
+        header_tokens = count_tokens(_header(len(chosen) + 1, best)) + 1
+        text = best['text']
+        tokens = count_tokens(text)
+        if header_tokens + tokens > left:
+            if left - header_tokens < MIN_PART_TOKENS:
+                continue
+            text = truncate_tokens(text, left - header_tokens - 1) + "…"
+            tokens = count_tokens(text)
+        chosen.append((best, text, tokens))
+        left -= header_tokens + tokens
+    return chosen
+
+
+def assemble_context(query, budget=BUDGET, db_path=DB_PATH, candidates=CANDIDATES,
+                     mmr_lambda=MMR_LAMBDA, conn=None, fuzzy=True):
+    """Prompt-ready memory block for query within budget tokens
+
+    Returns a dict: 'text' (the block, '' if nothing matched), 'tokens',
+    'budget', 'items' (provenance of each entry in block order: kind, id,
+    ref, source, score, tokens, truncated), 'candidates', 'duplicates'
+    and 'ms'. With fuzzy, query words also pull in their synonyms and
+    spelling fixes (memory_fuzzy).
+    """
+    started = time.perf_counter()
+    own_conn = conn is None
+    if own_conn:
+        conn = memory_metrics.connect(db_path)
+    try:
+        expand = None
+        if fuzzy:
+            ensure_fuzzy(conn)
+            expand = QueryExpander(conn)
+        found = fetch_candidates(conn, query, candidates, expand=expand)
+    finally:
+        if own_conn:
+            conn.close()
+
+    unique, duplicates = deduplicate(found)
+    title = f'Relevant memory for "{" ".join(query.split())}":'
+    chosen = select(unique, budget - count_tokens(title) - 1, mmr_lambda)
+
+    lines = [title] if chosen else []
+    items = []
+    for position, (candidate, text, tokens) in enumerate(chosen, 1):
+        lines += [_header(position, candidate), text]
+        items.append({'kind': candidate['kind'], 'id': candidate['id'],
+                      'ref': candidate['ref'], 'source': candidate['source'],
+                      'score': round(candidate['score'], 3), 'tokens': tokens,
+                      'truncated': text != candidate['text']})
+    block = "\n".join(lines)
+    return {
+        'text': block,
+        'tokens': count_tokens(block),
+        'budget': budget,
+        'items': items,
+        'candidates': len(found),
+        'duplicates': duplicates,
+        'ms': round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def main():
+    """Command-line interface"""
+    parser = argparse.ArgumentParser(description="Assemble a token-budgeted memory context block")
+    parser.add_argument("query", help="What the agent is working on")
+    parser.add_argument("--budget", type=int, default=BUDGET, help=f"Token budget (default: {BUDGET})")
+    parser.add_argument("--candidates", type=int, default=CANDIDATES,
+                        help=f"FTS hits per source (default: {CANDIDATES})")
+    parser.add_argument("--lambda", dest="mmr_lambda", type=float, default=MMR_LAMBDA,
+                        help=f"MMR relevance/diversity balance (default: {MMR_LAMBDA})")
+    parser.add_argument("--json", action="store_true", help="Print block, provenance and timings as JSON")
+    parser.add_argument("--db", default=DB_PATH, help=f"Database (default: {DB_PATH})")
+
+    args = parser.parse_args()
+    context = assemble_context(args.query, args.budget, args.db, args.candidates,
+                               args.mmr_lambda)
+    if args.json:
+        print(json.dumps(context, indent=2, ensure_ascii=False))
+    elif context['text']:
+        print(context['text'])
+        print(f"\n🧩 {context['tokens']}/{context['budget']} tokens, {len(context['items'])} of "
+              f"{context['candidates']} candidates ({context['duplicates']} duplicates), "
+              f"{context['ms']:.1f} ms")
+    else:
+        print(f'🔍 Nothing in memory matches "{args.query}"')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Search Query Compiler
+User search text used to go straight into `MATCH ?`, so `sqlite-utils`
+(a column filter in FTS5 syntax), an unbalanced quote or a stray `*` raised
+an error, and every structured condition had to be written as FTS text.
+This parses the text once and compiles it into a quoted FTS5 MATCH
+expression plus SQL predicates on indexed columns:
+
+  sqlite-utils              -> "sqlite utils"        (phrase, like the tokenizer splits it)
+  "4am run" backup*         -> "4am run" AND "backup" *
+  wal OR journal -draft     -> ("wal" OR "journal") NOT "draft"
+  cron NEAR/5 backup        -> NEAR("cron" "backup", 5)   (also NEAR(a b, 5))
+  type:insight importance>=4 tag:sqlite since:7d
+                            -> m.memory_type IN (?) AND m.importance >= ? AND
+                               m.id IN (memory_tags ...) AND m.time_ms >= ?
+
+Filters are per target (see TARGETS); an unknown `name:value` is searched
+as text. A query with filters only needs no FTS at all.
+
+Usage:
+  python3 memory_fts_query.py compile 'sqlite-utils type:insight importance>=4'
+  python3 memory_fts_query.py search 'source:research "4am" backup*' --target chunks
+"""
+
+import re
+import argparse
+from typing import NamedTuple
+
+import memory_metrics
+from memory_tags import tag_filter_sql
+from memory_time import range_sql, to_epoch_ms
+
+DB_PATH = "/home/openclaw/.openclaw/memory/main.sqlite"
+
+NEAR_DISTANCE = 10  # FTS5's default for NEAR
+
+# Filter name -> (SQL column, kind). 'eq' matches any of the given values,
+# 'number' also takes comparisons, 'prefix' is an index range on the
+# column, 'time' bounds the epoch-ms column and 'tag' goes through memory_tags.
+TARGETS = {
+    'memories': {
+        'fts': 'memories_fts', 'key': 'm.id', 'fts_key': 'rowid',
+        'fields': {
+            'type': ('m.memory_type', 'eq'),
+            'category': ('m.category', 'eq'),
+            'user': ('m.user_id', 'eq'),
+            'importance': ('m.importance', 'number'),
+            'tag': ('m.id', 'tag'),
+            'since': ('m.time_ms', 'time'),
+            'until': ('m.time_ms', 'time'),
+        },
+    },
+    'chunks': {
+        'fts': 'chunks_fts', 'key': 'c.id', 'fts_key': 'id',
+        'fields': {
+            'source': ('c.source', 'eq'),
+            'path': ('c.path', 'prefix'),
+            'model': ('c.model', 'eq'),
+            'since': ('c.time_ms', 'time'),
+            'until': ('c.time_ms', 'time'),
+        },
+    },
+}
+
+QUERY_RE = re.compile(r'''
+    (?P<neg>-)?
+    (?:
+        (?P<field>[A-Za-z_]+)(?P<op>:|>=|<=|>|<|=)(?:"(?P<quoted>[^"]*)"?|(?P<value>[^\s"]+))
+      | NEAR\((?P<near>[^)]*)\)
+      | "(?P<phrase>[^"]*)"?(?P<phrase_prefix>\*)?
+      | (?P<word>[^\s"]+)
+    )''', re.X)
+PART_RE = re.compile(r'[^\W_]+')  # what FTS5's unicode61 tokenizer keeps
+NEAR_OP_RE = re.compile(r'^NEAR(?:/(\d+))?$')
+NUMBER_OPS = {':': '=', '=': '=', '>=': '>=', '<=': '<=', '>': '>', '<': '<'}
+
+
+class SearchQuery(NamedTuple):
+    """A compiled search: FTS5 MATCH text ('' = no text) and (' AND ...', params) predicates"""
+    match: str
+    where: str
+    params: list
+
+
+def fts_phrase(text, prefix=False):
+    """Quoted FTS5 phrase of text's words ('' if it has none); prefix adds the trailing *"""
+    parts = PART_RE.findall(text)
+    if not parts:
+        return ''
+    return '"' + ' '.join(parts) + '"' + (' *' if prefix else '')
+
+
+def _near(phrases, distance):
+    phrases = [p for p in phrases if p]
+    if len(phrases) < 2:
+        return phrases[0] if phrases else ''
+    return f"NEAR({' '.join(phrases)}, {int(distance)})"
+
+
+def _near_group(body):
+    """NEAR(a "b c", 5) body -> FTS5 NEAR with each item re-quoted"""
+    body, _, distance = body.partition(',')
+    distance = distance.strip()
+    items = re.findall(r'"[^"]*"|\S+', body)
+    phrases = [fts_phrase(item.strip('"'), prefix=item.endswith('*')) for item in items]
+    return _near(phrases, distance if distance.isdigit() else NEAR_DISTANCE)
+
+
+def _predicate(condition, column, negated):
+    """' AND condition', or its negation keeping rows where column is NULL"""
+    if negated:
+        return f' AND ({column} IS NULL OR NOT ({condition}))'
+    return f' AND {condition}'
+
+
+def compile_query(text, target='memories', schema=None, expand=None, time_column=None):
+    """Compile user search text for target ('memories' or 'chunks') into a SearchQuery
+
+    Never raises on odd input: punctuation splits words the way the FTS
+    tokenizer does, unbalanced quotes close at the end, anything that
+    isn't a known filter is searched as text and a filter with an unusable
+    value (importance:high, since:someday) is dropped. A leading - (or NOT)
+    negates a term or filter. Columns are aliased m.* (memories) / c.*
+    (chunks); schema qualifies the FTS and tag tables (e.g. an attached
+    shard). expand(word) may return alternatives for a plain query word
+    (synonyms, spelling fixes, see memory_fuzzy); the word then matches
+    ("word" OR "alt" ...) within the same MATCH. time_column replaces the
+    time_ms column in since:/until: (e.g. memory_time.time_sql on a table
+    not migrated yet).
+    """
+    spec = TARGETS[target]
+    fields = spec['fields']
+    positive = []      # FTS expressions, implicitly AND-ed
+    negative = []
+    values = {}        # (field, negated) -> [values] for 'eq' filters
+    tags = {False: [], True: []}
+    where = ''
+    params = []
+    start = end = None
+    pending_or = False
+    pending_near = None
+    pending_not = False
+    last_plain = None  # unexpanded phrase of positive[-1], for NEAR
+
+    for match in QUERY_RE.finditer(text or ''):
+        negated = bool(match.group('neg')) or pending_not
+        pending_not = False
+        field = match.group('field')
+        expr = ''
+
+        if field is not None and field.lower() in fields:
+            column, kind = fields[field.lower()]
+            op = match.group('op')
+            value = match.group('quoted') if match.group('quoted') is not None else match.group('value')
+            if kind == 'number':
+                try:
+                    number = float(value)
+                except ValueError:
+                    continue
+                where += _predicate(f'{column} {NUMBER_OPS[op]} ?', column, negated)
+                params.append(int(number) if number.is_integer() else number)
+            elif op not in (':', '='):
+                continue
+            elif kind == 'eq':
+                values.setdefault((column, negated), []).append(value)
+            elif kind == 'prefix':
+                # [value, value + U+10FFFF) is the index range of strings starting with value
+                where += _predicate(f'{column} >= ? AND {column} < ?', column, negated)
+                params += [value, value + '\U0010ffff']
+            elif kind == 'tag':
+                tags[negated].append(value)
+            elif kind == 'time':
+                try:
+                    ms = to_epoch_ms(value)
+                except ValueError:
+                    continue
+                if field.lower() == 'since':
+                    start = ms if start is None else max(start, ms)
+                else:
+                    end = ms if end is None else min(end, ms)
+            continue
+
+        word = match.group('word')
+        if word is not None and not negated:
+            if word == 'OR':
+                pending_or = bool(positive)
+                continue
+            if word == 'AND':
+                continue
+            if word == 'NOT':
+                pending_not = True
+                continue
+            near = NEAR_OP_RE.match(word)
+            if near and positive:
+                pending_near = int(near.group(1) or NEAR_DISTANCE)
+                continue
+
+        if field is not None:
+            expr = fts_phrase(match.group(0).lstrip('-'))
+        elif match.group('near') is not None:
+            expr = _near_group(match.group('near'))
+        elif match.group('phrase') is not None:
+            expr = fts_phrase(match.group('phrase'), prefix=bool(match.group('phrase_prefix')))
+        else:
+            word = match.group('word')
+            expr = fts_phrase(word.rstrip('*'), prefix=word.endswith('*'))
+        if not expr:
+            continue
+
+        plain = expr
+        parts = PART_RE.findall(word or '')
+        if (expand and word is not None and not negated and pending_near is None
+                and not word.endswith('*') and len(parts) == 1):
+            alternatives = [a for a in map(fts_phrase, expand(parts[0])) if a and a != expr]
+            if alternatives:
+                expr = '(' + ' OR '.join([expr, *alternatives]) + ')'
+
+        if negated:
+            negative.append(expr)
+        elif pending_near is not None and last_plain:
+            positive[-1] = _near([last_plain, expr], pending_near)
+            last_plain = None
+        elif pending_or:
+            positive[-1] = f'({positive[-1]} OR {expr})'
+            last_plain = None
+        else:
+            positive.append(expr)
+            last_plain = plain
+        pending_or = False
+        pending_near = None
+
+    for (column, negated), names in values.items():
+        marks = ', '.join('?' * len(names))
+        where += _predicate(f'{column} IN ({marks})', column, negated)
+        params += names
+
+    if tags[False] or tags[True]:
+        tag_sql, tag_params = tag_filter_sql(tags_all=tags[False], tags_none=tags[True],
+                                             column=spec['key'], schema=schema)
+        where += tag_sql
+        params += tag_params
+    if start is not None or end is not None:
+        column = time_column or fields['since'][0]
+        time_sql, time_params = range_sql(start, end, column=column)
+        where += time_sql
+        params += time_params
+
+    match_text = ' AND '.join(positive)
+    if negative:
+        if match_text:
+            if len(positive) > 1:
+                match_text = f'({match_text})'
+            match_text += ''.join(f' NOT {expr}' for expr in negative)
+        else:
+            # FTS5 NOT needs a left-hand side; exclude the matches in SQL instead
+            fts = f"{schema}.{spec['fts']}" if schema else spec['fts']
+            where += (f" AND {spec['key']} NOT IN (SELECT {spec['fts_key']} FROM {fts} "
+                      f"WHERE {fts} MATCH ?)")
+            params.append(' OR '.join(negative))
+    return SearchQuery(match_text, where, params)
+
+
+def main():
+    """Command-line interface"""
+    parser = argparse.ArgumentParser(description="Compile search text into FTS5 MATCH + SQL filters")
+    parser.add_argument("action", choices=["compile", "search"], help="Action to perform")
+    parser.add_argument("query", help="Search text, e.g. 'sqlite-utils type:insight importance>=4'")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="memories",
+                        help="Table the query is for (default: memories)")
+    parser.add_argument("--limit", type=int, default=10, help="'search': maximum results (default: 10)")
+    parser.add_argument("--db", default=DB_PATH, help=f"Database (default: {DB_PATH})")
+
+    args = parser.parse_args()
+    compiled = compile_query(args.query, args.target)
+
+    if args.action == "compile":
+        print(f"MATCH  {compiled.match or '(none)'}")
+        print(f"WHERE  {compiled.where.removeprefix(' AND ') or '(none)'}")
+        print(f"PARAMS {compiled.params}")
+        return
+
+    conn = memory_metrics.connect(args.db)
+    try:
+        if args.target == "memories":
+            select = "SELECT m.id, m.memory_type, m.importance, m.content FROM memories m"
+            fts_join, order = "JOIN memories_fts ON memories_fts.rowid = m.id", "rank"
+        else:
+            select = "SELECT c.id, c.source, c.path, c.text FROM chunks c"
+            fts_join, order = "JOIN chunks_fts ON chunks_fts.id = c.id", "rank"
+        if compiled.match:
+            sql = f"{select} {fts_join} WHERE {TARGETS[args.target]['fts']} MATCH ?{compiled.where}"
+            params = [compiled.match, *compiled.params]
+        else:
+            sql, params, order = f"{select} WHERE 1=1{compiled.where}", compiled.params, "1"
+        rows = conn.execute(f"{sql} ORDER BY {order} LIMIT ?", [*params, args.limit]).fetchall()
+        print(f'🔍 {len(rows)} results:')
+        for row in rows:
+            print(f'  {row[0]} [{row[1]}, {row[2]}] {" ".join(str(row[3]).split())[:80]}')
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Spell-Tolerant, Synonym-Expanded Search
+A misspelled recall query ("sqlte backpu") matched nothing, so the agent
+retried variants, one process launch each. This expands every plain query
+word inside the single FTS5 MATCH instead:
+
+  sqlte   -> ("sqlte" OR "sqlite")              unknown word: vocabulary
+                                                terms within edit distance
+  db      -> ("db" OR "database" OR "sqlite")   configured synonyms
+
+The vocabulary comes from fts5vocab tables over chunks_fts / memories_fts.
+fuzzy_terms / fuzzy_trigrams keep a trigram index of it, so a suggestion is
+an index lookup plus an edit-distance check on a few hundred candidates.
+Terms indexed since the last refresh are matched exactly; when the index
+has no suggestion for a word, the live vocab rows it doesn't know yet are
+scanned instead, so today's terms are suggested before the next `refresh`.
+
+Usage:
+  python3 memory_fuzzy.py refresh                  # sync the trigram index with the FTS vocabulary
+  python3 memory_fuzzy.py suggest sqlte            # spelling suggestions for a word
+  python3 memory_fuzzy.py synonym add db database sqlite
+  python3 memory_fuzzy.py synonym remove db database
+  python3 memory_fuzzy.py synonym list
+  python3 memory_fuzzy.py expand 'sqlte db backpu' [--target chunks]
+"""
+
+import time
+import argparse
+
+import memory_metrics
+from memory_fts_query import compile_query
+
+DB_PATH = "/home/openclaw/.openclaw/memory/main.sqlite"
+
+FTS_TABLES = ("chunks_fts", "memories_fts")
+MAX_SUGGESTIONS = 3
+MAX_CANDIDATES = 200     # trigram matches checked for edit distance
+MIN_TERM_LENGTH = 3      # shorter words are never corrected
+
+FUZZY_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS fuzzy_terms (
+    term TEXT PRIMARY KEY,
+    length INTEGER NOT NULL,
+    docs INTEGER NOT NULL           -- documents containing it, over all FTS tables
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS fuzzy_trigrams (
+    trigram TEXT NOT NULL,
+    length INTEGER NOT NULL,        -- of term, so a lookup only reads plausible lengths
+    term TEXT NOT NULL,
+    PRIMARY KEY (trigram, length, term)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS synonyms (
+    term TEXT NOT NULL,
+    synonym TEXT NOT NULL,
+    PRIMARY KEY (term, synonym)
+) WITHOUT ROWID;
+'''
+
+
+def trigrams(term):
+    """Distinct trigrams of term padded with '$' at both ends"""
+    padded = f'${term}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance (adjacent swaps count 1), or limit + 1 once past limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def max_distance(term):
+    """Edits allowed when correcting term"""
+    return 1 if len(term) <= 4 else 2
+
+
+def _correctable(term):
+    return len(term) >= MIN_TERM_LENGTH and term.isalpha()
+
+
+def _fts_tables(conn):
+    """FTS tables that exist and have their {fts}_vocab table"""
+    names = [f'{fts}_vocab' for fts in FTS_TABLES] + list(FTS_TABLES)
+    present = {name for (name,) in conn.execute(
+        f"SELECT name FROM sqlite_master WHERE name IN ({', '.join('?' * len(names))})", names)}
+    return [fts for fts in FTS_TABLES if fts in present and f'{fts}_vocab' in present]
+
+
+def _create_vocab_tables(conn):
+    """Add {fts}_vocab for every FTS table, including ones created after install; True if any was new"""
+    created = False
+    for (fts,) in conn.execute(
+            f"SELECT name FROM sqlite_master WHERE name IN ({', '.join('?' * len(FTS_TABLES))})",
+            FTS_TABLES).fetchall():
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (f'{fts}_vocab',)).fetchone():
+            conn.execute(f"CREATE VIRTUAL TABLE {fts}_vocab USING fts5vocab({fts}, 'row')")
+            created = True
+    if created:
+        conn.commit()
+    return created
+
+
+def install_fuzzy(conn):
+    """Create the vocab views, trigram index and synonym table, then refresh (idempotent)"""
+    conn.executescript(FUZZY_SCHEMA)
+    _create_vocab_tables(conn)
+    return refresh_vocabulary(conn)
+
+
+def ensure_fuzzy(conn):
+    """Install fuzzy search on first use, and vocab tables for FTS tables added since; cheap no-op afterwards"""
+    installed = conn.execute('''
+        SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'fuzzy_terms'
+    ''').fetchone()[0]
+    if not installed:
+        install_fuzzy(conn)
+    elif _create_vocab_tables(conn):
+        refresh_vocabulary(conn)
+
+
+def refresh_vocabulary(conn):
+    """Sync fuzzy_terms / fuzzy_trigrams with the FTS vocabulary; returns (added, removed)"""
+    _create_vocab_tables(conn)
+    docs = {}
+    for fts in _fts_tables(conn):
+        for term, count in conn.execute(f'SELECT term, doc FROM {fts}_vocab'):
+            if _correctable(term):
+                docs[term] = docs.get(term, 0) + count
+    known = set(term for (term,) in conn.execute('SELECT term FROM fuzzy_terms'))
+    added = docs.keys() - known
+    removed = known - docs.keys()
+
+    conn.executemany('DELETE FROM fuzzy_terms WHERE term = ?', ((t,) for t in removed))
+    conn.executemany('DELETE FROM fuzzy_trigrams WHERE trigram = ? AND length = ? AND term = ?',
+                     ((g, len(t), t) for t in removed for g in trigrams(t)))
+    conn.executemany('INSERT OR REPLACE INTO fuzzy_terms (term, length, docs) VALUES (?, ?, ?)',
+                     ((t, len(t), n) for t, n in docs.items()))
+    conn.executemany('INSERT OR IGNORE INTO fuzzy_trigrams (trigram, length, term) VALUES (?, ?, ?)',
+                     ((g, len(t), t) for t in added for g in trigrams(t)))
+    conn.commit()
+    return len(added), len(removed)
+
+
+def is_known(conn, term):
+    """Whether term is in the FTS vocabulary (the index, or the live vocab tables for new terms)"""
+    if conn.execute('SELECT 1 FROM fuzzy_terms WHERE term = ?', (term,)).fetchone():
+        return True
+    return any(conn.execute(f'SELECT 1 FROM {fts}_vocab WHERE term = ?', (term,)).fetchone()
+               for fts in _fts_tables(conn))
+
+
+def suggest(conn, term, limit=MAX_SUGGESTIONS):
+    """Vocabulary terms within max_distance(term) edits, closest then most common first
+
+    Falls back to terms added to the FTS tables since the last refresh
+    when the trigram index has none close enough.
+    """
+    term = term.lower()
+    if not _correctable(term):
+        return []
+    grams = trigrams(term)
+    distance = max_distance(term)
+    marks = ', '.join('?' * len(grams))
+    rows = conn.execute(f'''
+        WITH candidates AS (
+            SELECT term, COUNT(*) AS shared FROM fuzzy_trigrams
+            WHERE trigram IN ({marks}) AND length BETWEEN ? AND ?
+            GROUP BY term ORDER BY shared DESC LIMIT ?)
+        SELECT t.term, t.docs FROM candidates c JOIN fuzzy_terms t ON t.term = c.term
+    ''', [*grams, len(term) - distance, len(term) + distance, MAX_CANDIDATES]).fetchall()
+    scored = _scored(term, rows, distance)
+    if not scored:
+        scored = _scored(term, _unindexed_terms(conn, len(term) - distance, len(term) + distance),
+                         distance)
+    return [candidate for _, _, candidate in sorted(scored)[:limit]]
+
+
+def _scored(term, rows, distance):
+    """(distance, -docs, candidate) for the (candidate, docs) rows within distance of term"""
+    scored = []
+    for candidate, docs in rows:
+        d = edit_distance(term, candidate, distance)
+        if candidate != term and d <= distance:
+            scored.append((d, -docs, candidate))
+    return scored
+
+
+def _unindexed_terms(conn, min_length, max_length):
+    """(term, docs) from the live vocab tables not in fuzzy_terms yet (a full vocab scan)"""
+    docs = {}
+    for fts in _fts_tables(conn):
+        for term, count in conn.execute(f'''
+            SELECT v.term, v.doc FROM {fts}_vocab v
+            WHERE length(v.term) BETWEEN ? AND ?
+              AND NOT EXISTS (SELECT 1 FROM fuzzy_terms t WHERE t.term = v.term)
+        ''', (min_length, max_length)):
+            if _correctable(term):
+                docs[term] = docs.get(term, 0) + count
+    return docs.items()
+
+
+def synonyms(conn, term):
+    """Configured synonyms of term"""
+    return [s for (s,) in conn.execute(
+        'SELECT synonym FROM synonyms WHERE term = ? ORDER BY synonym', (term.lower(),))]
+
+
+def add_synonyms(conn, terms):
+    """Make every term in the group a synonym of every other (lowercased)"""
+    terms = list(dict.fromkeys(t.strip().lower() for t in terms if t.strip()))
+    conn.executemany('INSERT OR IGNORE INTO synonyms (term, synonym) VALUES (?, ?)',
+                     [(a, b) for a in terms for b in terms if a != b])
+    conn.commit()
+
+
+def remove_synonyms(conn, terms):
+    """Drop the synonym links between the given terms"""
+    terms = [t.strip().lower() for t in terms]
+    conn.executemany('DELETE FROM synonyms WHERE term = ? AND synonym = ?',
+                     [(a, b) for a in terms for b in terms if a != b])
+    conn.commit()
+
+
+class QueryExpander:
+    """compile_query(expand=...) hook: a word's synonyms, plus spelling suggestions if it's unknown
+
+    expansions records {word: [alternatives]} for the queries compiled with
+    it, e.g. to show "searched for sqlite instead of sqlte".
+    """
+
+    def __init__(self, conn, fuzzy=True, use_synonyms=True):
+        self.conn = conn
+        self.fuzzy = fuzzy
+        self.use_synonyms = use_synonyms
+        self.expansions = {}
+
+    def __call__(self, word):
+        word = word.lower()
+        alternatives = synonyms(self.conn, word) if self.use_synonyms else []
+        if self.fuzzy and _correctable(word) and not is_known(self.conn, word):
+            alternatives += [s for s in suggest(self.conn, word) if s not in alternatives]
+        if alternatives:
+            self.expansions[word] = alternatives
+        return alternatives
+
+
+def main():
+    """Command-line interface"""
+    parser = argparse.ArgumentParser(description="Spell-tolerant, synonym-expanded search")
+    parser.add_argument("action", choices=["refresh", "suggest", "synonym", "expand"], help="Action to perform")
+    parser.add_argument("words", nargs="*", help="'suggest': a word; 'synonym': add|remove|list and terms; "
+                                                 "'expand': search text")
+    parser.add_argument("--target", choices=["memories", "chunks"], default="memories",
+                        help="'expand': table the query is for (default: memories)")
+    parser.add_argument("--db", default=DB_PATH, help=f"Database (default: {DB_PATH})")
+
+    args = parser.parse_args()
+    conn = memory_metrics.connect(args.db)
+
+    try:
+        if args.action == "refresh":
+            start = time.perf_counter()
+            added, removed = install_fuzzy(conn)
+            terms = conn.execute('SELECT COUNT(*) FROM fuzzy_terms').fetchone()[0]
+            print(f"✅ {terms} terms (+{added}, -{removed}) ({time.perf_counter() - start:.2f}s)")
+
+        elif args.action == "suggest":
+            ensure_fuzzy(conn)
+            for word in args.words:
+                print(f"🔤 {word}: {', '.join(suggest(conn, word)) or '(no suggestions)'}")
+
+        elif args.action == "synonym":
+            ensure_fuzzy(conn)
+            command, terms = (args.words[0], args.words[1:]) if args.words else ("list", [])
+            if command == "add" and len(terms) > 1:
+                add_synonyms(conn, terms)
+                print(f"✅ Synonyms: {', '.join(terms)}")
+            elif command == "remove" and len(terms) > 1:
+                remove_synonyms(conn, terms)
+                print(f"🗑️ Unlinked: {', '.join(terms)}")
+            elif command == "list":
+                for term, group in conn.execute('''
+                    SELECT term, group_concat(synonym, ', ') FROM synonyms GROUP BY term ORDER BY term
+                '''):
+                    print(f"  {term}: {group}")
+            else:
+                parser.error("synonym takes: add TERM TERM..., remove TERM TERM..., or list")
+
+        elif args.action == "expand":
+            ensure_fuzzy(conn)
+            expander = QueryExpander(conn)
+            start = time.perf_counter()
+            compiled = compile_query(" ".join(args.words), args.target, expand=expander)
+            elapsed = (time.perf_counter() - start) * 1000
+            for word, alternatives in expander.expansions.items():
+                print(f"🔤 {word} -> {', '.join(alternatives)}")
+            print(f"MATCH  {compiled.match or '(none)'}  ({elapsed:.1f} ms)")
+
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
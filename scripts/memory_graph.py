@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Memory Knowledge Graph
+Extracts entities from memories at ingest (wiki-style [[links]], task IDs,
+file paths, proper nouns) into an entities table and a memory <-> entity
+adjacency table indexed in both directions. Memories that mention the same
+entity are neighbours, so "everything related to X" is one recursive CTE
+instead of repeated FTS queries.
+
+Extraction is local and regex-based. Writers call index_memory() right
+after inserting a memory; `index` catches up on memories written by
+anything else. Triggers unlink deleted memories and queue edited ones for
+re-indexing.
+
+Usage:
+  python3 memory_graph.py index [--rebuild]   # index memories not indexed yet
+  python3 memory_graph.py related "SQLite" [--hops 2]    # or a memory id: 42
+  python3 memory_graph.py neighbors "SQLite"  # entities mentioned alongside
+  python3 memory_graph.py extract "text"      # show what would be extracted
+  python3 memory_graph.py stats
+"""
+
+import re
+import json
+import time
+import argparse
+
+import memory_metrics
+
+DB_PATH = "/home/openclaw/.openclaw/memory/main.sqlite"
+
+HOPS = 1
+MAX_DEGREE = 200  # entities in more memories than this are hubs: not walked through
+WALK_ROWS = 2000  # rows a related_memories walk may visit before it stops
+INDEX_BATCH = 500
+
+GRAPH_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entities (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,                  -- 'link', 'task', 'path', 'name'
+    norm TEXT NOT NULL,                  -- lowercased form entities are matched on
+    name TEXT NOT NULL,                  -- as first seen
+    mentions INTEGER NOT NULL DEFAULT 0, -- memories mentioning it (its degree)
+    UNIQUE (kind, norm)
+);
+CREATE INDEX IF NOT EXISTS idx_entities_norm ON entities(norm);
+CREATE TABLE IF NOT EXISTS memory_entities (
+    memory_id INTEGER NOT NULL,
+    entity_id INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 1,    -- occurrences in the memory
+    PRIMARY KEY (memory_id, entity_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_memory_entities_entity ON memory_entities(entity_id, memory_id);
+CREATE TABLE IF NOT EXISTS memory_graph (
+    memory_id INTEGER PRIMARY KEY,       -- memories whose entities are indexed
+    entities INTEGER NOT NULL
+);
+'''
+
+UNLINK_SQL = '''
+    UPDATE entities SET mentions = mentions - 1
+    WHERE id IN (SELECT entity_id FROM memory_entities WHERE memory_id = {id});
+    DELETE FROM memory_entities WHERE memory_id = {id};
+    DELETE FROM memory_graph WHERE memory_id = {id};
+'''
+
+URL_RE = re.compile(r'\b[a-z][a-z0-9+.-]*://\S+', re.IGNORECASE)
+LINK_RE = re.compile(r'\[\[([^\[\]|#\n]+)(?:[|#][^\]\n]*)?\]\]')
+TASK_RE = re.compile(r'\b(?:task|todo)s?\s*#?\s*(\d+)\b|(?<![\w&#/])#(\d+)\b', re.IGNORECASE)
+PATH_RE = re.compile(
+    r'(?<![\w/.~])(?:~|\.{1,2})?/(?:[\w.-]+/)*[\w-][\w.-]*'  # rooted: /x/y, ~/x, ./x
+    r'|(?<![\w/.])(?:[\w.-]+/)+[\w-]+\.[A-Za-z0-9]{1,8}\b'   # relative with extension: a/b.py
+    r'|\b[\w-]+\.(?:py|md|sh|json|jsonl|sqlite|db|log|txt|ya?ml|toml|js|ts|csv|html)\b')
+NAME_RE = re.compile(r"\b[A-Z][A-Za-z0-9]*(?:['.+-][A-Za-z0-9]+)*(?:[ \t]+[A-Z][A-Za-z0-9]*(?:['.+-][A-Za-z0-9]+)*)*")
+
+# Capitalized words that are not names on their own: trimmed off both ends of a name
+STOPWORDS = {
+    'a', 'an', 'the', 'this', 'that', 'these', 'those', 'it', 'its', 'i', 'we', 'you', 'he',
+    'she', 'they', 'my', 'our', 'your', 'in', 'on', 'at', 'of', 'for', 'to', 'from', 'by',
+    'with', 'and', 'or', 'but', 'if', 'when', 'then', 'so', 'as', 'is', 'are', 'was', 'be',
+    'do', 'not', 'no', 'yes', 'all', 'some', 'each', 'every', 'any', 'what', 'why', 'how',
+    'who', 'which', 'where', 'there', 'here', 'also', 'just', 'new', 'next', 'first', 'last',
+    'key', 'finding', 'insight', 'important', 'conclusion', 'learned', 'note', 'notes',
+    'summary', 'today', 'yesterday', 'tomorrow', 'daily', 'task', 'todo', 'status', 'done',
+    'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday',
+    'january', 'february', 'march', 'april', 'may', 'june', 'july', 'august',
+    'september', 'october', 'november', 'december',
+}
+
+
+def _blank(text, spans):
+    """text with the given (start, end) spans replaced by spaces"""
+    chars = list(text)
+    for start, end in spans:
+        chars[start:end] = ' ' * (end - start)
+    return ''.join(chars)
+
+
+def _sentence_start(text, pos):
+    """True if pos starts a sentence, line or markdown list item"""
+    pos -= 1
+    while pos >= 0 and text[pos] in ' \t#*->0123456789':
+        pos -= 1
+    return pos < 0 or text[pos] in '\n.!?:"('
+
+
+def _distinctive(word):
+    """SQLite, FTS5, WAL: capitals or digits past the first letter"""
+    return any(c.isupper() or c.isdigit() for c in word[1:])
+
+
+def extract_entities(text):
+    """{(kind, norm): [name, count]} for the links, tasks, paths and names in text"""
+    found = {}
+
+    def add(kind, name):
+        name = ' '.join(name.split())
+        entry = found.setdefault((kind, name.lower()), [name, 0])
+        entry[1] += 1
+
+    spans = [m.span() for m in URL_RE.finditer(text)]
+    for match in LINK_RE.finditer(text):
+        add('link', match.group(1).strip())
+        spans.append(match.span())
+    for match in TASK_RE.finditer(text):
+        add('task', str(int(match.group(1) or match.group(2))))
+        spans.append(match.span())
+    rest = _blank(text, spans)
+    spans = []
+    for match in PATH_RE.finditer(rest):
+        path = match.group(0).rstrip('.-')
+        if len(path.strip('/.~')) > 1:
+            add('path', path)
+            spans.append(match.span())
+    rest = _blank(rest, spans)
+
+    candidates = []
+    capitalized_mid_sentence = set()
+    for match in NAME_RE.finditer(rest):
+        words = match.group(0).split()
+        start = _sentence_start(rest, match.start())
+        while words and words[0].lower() in STOPWORDS:
+            words.pop(0)
+            start = False
+        while words and words[-1].lower() in STOPWORDS:
+            words.pop()
+        if not words:
+            continue
+        if not start:
+            capitalized_mid_sentence.update(w.lower() for w in words)
+        candidates.append((words, start))
+
+    for words, start in candidates:
+        if start and not _distinctive(words[0]) and words[0].lower() not in capitalized_mid_sentence:
+            # May only be capitalized for opening the sentence ("Moved OpenClaw
+            # ..."): a lone word is skipped, a longer one also counts without it
+            if len(words) == 1:
+                continue
+            add('name', ' '.join(words[1:]))
+        if len(words) == 1 and len(words[0]) < 2:
+            continue
+        add('name', ' '.join(words))
+    return found
+
+
+def install_graph(conn):
+    """Create the graph tables, indexes and maintenance triggers (idempotent)"""
+    conn.executescript(GRAPH_SCHEMA)
+    conn.execute('DROP TRIGGER IF EXISTS graph_memories_delete')
+    conn.execute('DROP TRIGGER IF EXISTS graph_memories_update')
+    conn.execute(f'''
+        CREATE TRIGGER graph_memories_delete AFTER DELETE ON memories BEGIN
+            {UNLINK_SQL.format(id='OLD.id')}
+        END''')
+    # Edited memories drop out of memory_graph; `index` picks them up again
+    conn.execute(f'''
+        CREATE TRIGGER graph_memories_update AFTER UPDATE OF content ON memories BEGIN
+            {UNLINK_SQL.format(id='OLD.id')}
+        END''')
+    conn.commit()
+
+
+def ensure_graph(conn):
+    """Install the graph on first use; cheap no-op afterwards"""
+    installed = conn.execute('''
+        SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name = 'graph_memories_delete'
+    ''').fetchone()[0]
+    if not installed:
+        install_graph(conn)
+
+
+def index_memory(conn, memory_id, text):
+    """Link memory_id to the entities in text, replacing earlier links; returns the entity count
+
+    Does not commit, so it joins the caller's insert transaction.
+    """
+    for statement in UNLINK_SQL.format(id='?').split(';')[:-1]:
+        conn.execute(statement, (memory_id,))
+    found = extract_entities(text or '')
+    links = []
+    for (kind, norm), (name, count) in found.items():
+        entity_id = conn.execute('''
+            INSERT INTO entities (kind, norm, name, mentions) VALUES (?, ?, ?, 1)
+            ON CONFLICT (kind, norm) DO UPDATE SET mentions = mentions + 1
+            RETURNING id
+        ''', (kind, norm, name)).fetchone()[0]
+        links.append((memory_id, entity_id, count))
+    conn.executemany('INSERT INTO memory_entities (memory_id, entity_id, count) VALUES (?, ?, ?)', links)
+    conn.execute('INSERT INTO memory_graph (memory_id, entities) VALUES (?, ?)', (memory_id, len(found)))
+    return len(found)
+
+
+def index_pending(conn, batch=INDEX_BATCH):
+    """Index every memory not in the graph yet (new or edited), committing per batch"""
+    ensure_graph(conn)
+    indexed = 0
+    while True:
+        rows = conn.execute('''
+            SELECT id, content FROM memories
+            WHERE id NOT IN (SELECT memory_id FROM memory_graph)
+            ORDER BY id LIMIT ?
+        ''', (batch,)).fetchall()
+        if not rows:
+            return indexed
+        for memory_id, content in rows:
+            index_memory(conn, memory_id, content)
+        conn.commit()
+        indexed += len(rows)
+
+
+def rebuild_graph(conn):
+    """Drop every link and re-extract all memories"""
+    ensure_graph(conn)
+    conn.execute('DELETE FROM memory_entities')
+    conn.execute('DELETE FROM memory_graph')
+    conn.execute('DELETE FROM entities')
+    return index_pending(conn)
+
+
+def related_memories(conn, memory_ids=(), entities=(), hops=HOPS, limit=20, max_degree=MAX_DEGREE,
+                     max_rows=WALK_ROWS):
+    """[(id, depth, importance, timestamp, content)] within `hops` of the seeds, in one query
+
+    Seeds are memory ids and/or entity names (any kind, case-insensitive);
+    memories mentioning a seed entity are at depth 0, seed memory ids are
+    not returned themselves. Each hop moves to the
+    memories sharing an entity with the previous ones, skipping entities
+    mentioned by more than max_degree memories. The walk is breadth-first
+    and stops after max_rows rows, so a dense neighbourhood costs no more
+    than a sparse one. Nearest first, then by importance and recency.
+    """
+    return conn.execute('''
+        WITH RECURSIVE
+        seed(memory_id) AS (
+            SELECT value FROM json_each(:ids)
+            UNION
+            SELECT me.memory_id FROM entities e
+            JOIN memory_entities me ON me.entity_id = e.id
+            WHERE e.norm IN (SELECT lower(value) FROM json_each(:names))
+        ),
+        walk(memory_id, depth) AS (
+            SELECT memory_id, 0 FROM seed
+            UNION
+            SELECT b.memory_id, walk.depth + 1
+            FROM walk
+            JOIN memory_entities a ON a.memory_id = walk.memory_id
+            JOIN entities e ON e.id = a.entity_id AND e.mentions <= :max_degree
+            JOIN memory_entities b ON b.entity_id = a.entity_id
+            WHERE walk.depth < :hops
+            ORDER BY 2
+            LIMIT :max_rows
+        )
+        SELECT m.id, MIN(walk.depth) AS depth, m.importance, m.timestamp, m.content
+        FROM walk JOIN memories m ON m.id = walk.memory_id
+        WHERE m.id NOT IN (SELECT value FROM json_each(:ids))
+        GROUP BY m.id
+        ORDER BY depth, m.importance DESC, m.id DESC
+        LIMIT :limit
+    ''', {'ids': json.dumps([int(i) for i in memory_ids]), 'names': json.dumps(list(entities)),
+          'hops': hops, 'max_degree': max_degree, 'limit': limit, 'max_rows': max_rows}).fetchall()
+
+
+def related_entities(conn, name, limit=20):
+    """[(kind, name, shared memories)] mentioned together with entity `name`, most shared first"""
+    return conn.execute('''
+        SELECT e2.kind, e2.name, COUNT(*) AS shared
+        FROM entities e
+        JOIN memory_entities a ON a.entity_id = e.id
+        JOIN memory_entities b ON b.memory_id = a.memory_id AND b.entity_id != a.entity_id
+        JOIN entities e2 ON e2.id = b.entity_id
+        WHERE e.norm = lower(?)
+        GROUP BY e2.id
+        ORDER BY shared DESC, e2.name
+        LIMIT ?
+    ''', (name, limit)).fetchall()
+
+
+def main():
+    """Command-line interface"""
+    parser = argparse.ArgumentParser(description="Entity/link graph over memories")
+    parser.add_argument("action", choices=["index", "related", "neighbors", "extract", "stats"],
+                        help="Action to perform")
+    parser.add_argument("target", nargs="?", help="Entity name or memory id (related, neighbors), text (extract)")
+    parser.add_argument("--hops", type=int, default=HOPS, help=f"Hops for 'related' (default: {HOPS})")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum results (default: 20)")
+    parser.add_argument("--rebuild", action="store_true", help="Re-extract every memory ('index')")
+    parser.add_argument("--db", default=DB_PATH, help=f"Database (default: {DB_PATH})")
+
+    args = parser.parse_args()
+    if args.action in ("related", "neighbors", "extract") and not args.target:
+        parser.error(f"'{args.action}' needs a target")
+
+    if args.action == "extract":
+        for (kind, _), (name, count) in sorted(extract_entities(args.target).items()):
+            print(f"  {kind:<5} {name}" + (f" (x{count})" if count > 1 else ""))
+        return
+
+    conn = memory_metrics.connect(args.db)
+    try:
+        if args.action == "index":
+            start = time.perf_counter()
+            indexed = rebuild_graph(conn) if args.rebuild else index_pending(conn)
+            print(f"✅ Indexed {indexed} memories in {time.perf_counter() - start:.2f}s")
+
+        elif args.action == "related":
+            ensure_graph(conn)
+            if args.target.isdigit():
+                rows = related_memories(conn, memory_ids=[int(args.target)], hops=args.hops, limit=args.limit)
+            else:
+                rows = related_memories(conn, entities=[args.target], hops=args.hops, limit=args.limit)
+            print(f"🕸️ Related to {args.target} ({args.hops} hop{'s' if args.hops != 1 else ''}):")
+            for memory_id, depth, importance, timestamp, content in rows:
+                print(f"  [{depth}] #{memory_id} ⭐{importance} {timestamp}")
+                print(f"      {' '.join(str(content).split())[:100]}")
+
+        elif args.action == "neighbors":
+            ensure_graph(conn)
+            print(f"🕸️ Mentioned with {args.target}:")
+            for kind, name, shared in related_entities(conn, args.target, args.limit):
+                print(f"  {shared:>5}  {kind:<5} {name}")
+
+        elif args.action == "stats":
+            ensure_graph(conn)
+            indexed, links = conn.execute(
+                'SELECT COUNT(*), IFNULL(SUM(entities), 0) FROM memory_graph').fetchone()
+            pending = conn.execute(
+                'SELECT COUNT(*) FROM memories WHERE id NOT IN (SELECT memory_id FROM memory_graph)').fetchone()[0]
+            print('🕸️ Memory graph:')
+            print(f'  Memories indexed: {indexed} ({pending} pending)')
+            print(f'  Links: {links}')
+            for kind, count in conn.execute(
+                    'SELECT kind, COUNT(*) FROM entities WHERE mentions > 0 GROUP BY kind ORDER BY kind'):
+                print(f'  {kind} entities: {count}')
+            print('  Most mentioned:')
+            for kind, name, mentions in conn.execute(
+                    'SELECT kind, name, mentions FROM entities ORDER BY mentions DESC LIMIT ?', (args.limit,)):
+                print(f'    {mentions:>6}  {kind:<5} {name}')
+
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Memory Tool Instrumentation
+Per-operation timers and counters around SQLite calls, slow-query logging
+with query plans, and Prometheus text-format export.
+
+Instrumentation is off unless enabled, so the tools pay nothing by default:
+  CLAW_METRICS=1                    - time every SQLite call
+  CLAW_SLOW_QUERY_MS=50             - log statements slower than this (with plan)
+  CLAW_METRICS_EXPORT=/path/to.prom - write Prometheus text on exit
+                      unix:/path/to.sock or tcp:host:port also work
+
+Usage:
+  python3 memory_metrics.py show /path/to/metrics.prom
+"""
+
+import atexit
+import os
+import re
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_TABLE_KEYWORDS = ("from", "into", "update", "table", "exists", "index")
+_PLANNABLE = ("select", "with", "insert", "update", "delete")
+
+
+def _process_start_time():
+    """Wall-clock process start time (Linux /proc), or None if unavailable"""
+    try:
+        with open('/proc/self/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        start_ticks = int(fields[19])
+        with open('/proc/stat') as f:
+            boot = next(int(line.split()[1]) for line in f if line.startswith('btime'))
+        return boot + start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, StopIteration):
+        return None
+
+
+class Metrics:
+    """Thread-safe registry of operation timers and counters"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timers = {}
+        self.counters = {}
+        self.slow_queries = []
+        self.enabled = False
+        self.slow_query_seconds = None
+        self.export_target = None
+
+    def observe(self, op, seconds):
+        """Record one timed operation"""
+        with self.lock:
+            timer = self.timers.get(op)
+            if timer is None:
+                timer = self.timers[op] = {"count": 0, "sum": 0.0, "max": 0.0,
+                                           "buckets": [0] * len(BUCKETS)}
+            timer["count"] += 1
+            timer["sum"] += seconds
+            if seconds > timer["max"]:
+                timer["max"] = seconds
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    timer["buckets"][i] += 1
+
+    def incr(self, name, value=1):
+        """Increment a counter"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def timed(self, op):
+        """Time a block of code under the given operation name"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(op, time.perf_counter() - start)
+
+    def reset(self):
+        with self.lock:
+            self.timers.clear()
+            self.counters.clear()
+            self.slow_queries.clear()
+
+    def summary(self):
+        """Return [(op, count, total_ms, avg_ms, max_ms)] sorted by total time"""
+        with self.lock:
+            rows = [(op, t["count"], t["sum"] * 1000, t["sum"] / t["count"] * 1000, t["max"] * 1000)
+                    for op, t in self.timers.items()]
+        return sorted(rows, key=lambda r: r[2], reverse=True)
+
+    def to_prometheus(self):
+        """Render all metrics in Prometheus text exposition format"""
+        lines = [
+            "# HELP claw_memory_op_seconds Time spent in memory tool operations.",
+            "# TYPE claw_memory_op_seconds histogram",
+        ]
+        with self.lock:
+            for op, t in sorted(self.timers.items()):
+                label = op.replace('\\', '\\\\').replace('"', '\\"')
+                for bound, count in zip(BUCKETS, t["buckets"]):
+                    lines.append(f'claw_memory_op_seconds_bucket{{op="{label}",le="{bound}"}} {count}')
+                lines.append(f'claw_memory_op_seconds_bucket{{op="{label}",le="+Inf"}} {t["count"]}')
+                lines.append(f'claw_memory_op_seconds_sum{{op="{label}"}} {t["sum"]:.6f}')
+                lines.append(f'claw_memory_op_seconds_count{{op="{label}"}} {t["count"]}')
+
+            lines.append("# HELP claw_memory_events_total Memory tool event counters.")
+            lines.append("# TYPE claw_memory_events_total counter")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'claw_memory_events_total{{event="{name}"}} {value}')
+
+            lines.append("# HELP claw_memory_slow_queries_total Statements over the slow-query threshold.")
+            lines.append("# TYPE claw_memory_slow_queries_total counter")
+            lines.append(f"claw_memory_slow_queries_total {len(self.slow_queries)}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, target=None):
+        """Write Prometheus text to a file, unix:<path> socket or tcp:<host>:<port>"""
+        target = target or self.export_target
+        if not target:
+            return False
+        payload = self.to_prometheus().encode()
+
+        if target.startswith("unix:"):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(target[5:])
+                sock.sendall(payload)
+        elif target.startswith("tcp:"):
+            host, port = target[4:].rsplit(":", 1)
+            with socket.create_connection((host, int(port)), timeout=5) as sock:
+                sock.sendall(payload)
+        else:
+            # Atomic replace so a scraper never sees a half-written file
+            tmp_path = f"{target}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, target)
+        return True
+
+
+metrics = Metrics()
+
+
+def statement_label(sql):
+    """Collapse a SQL statement to 'verb:table' for use as a metric name"""
+    words = re.findall(r"[\w.]+", sql[:200].lower())
+    if not words:
+        return "other"
+    verb = words[0]
+    for keyword, following in zip(words, words[1:]):
+        if keyword in _TABLE_KEYWORDS and following not in ("if", "not", "exists", "or"):
+            return f"{verb}:{following}"
+    return verb
+
+
+def _log_slow_query(conn, sql, params, seconds):
+    plan = []
+    if statement_label(sql).split(":")[0] in _PLANNABLE:
+        try:
+            plan_cursor = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params or ())
+            plan = [row[-1] for row in plan_cursor.fetchall()]
+        except sqlite3.Error:
+            pass
+    entry = {"sql": " ".join(sql.split()), "ms": round(seconds * 1000, 3), "plan": plan}
+    metrics.slow_queries.append(entry)
+    print(f"🐢 Slow query ({entry['ms']} ms): {entry['sql'][:200]}", file=sys.stderr)
+    for step in plan:
+        print(f"   plan: {step}", file=sys.stderr)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times execute and fetch calls"""
+
+    def _timed(self, op, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.observe(op, elapsed)
+            if (op.startswith("execute ") and metrics.slow_query_seconds is not None
+                    and elapsed >= metrics.slow_query_seconds):
+                _log_slow_query(self.connection, args[0], args[1] if len(args) > 1 else None, elapsed)
+
+    def execute(self, sql, parameters=()):
+        metrics.incr("statements")
+        return self._timed(f"execute {statement_label(sql)}", super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        metrics.incr("statements")
+        return self._timed(f"executemany {statement_label(sql)}", super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        metrics.incr("statements")
+        return self._timed("executescript", super().executescript, sql_script)
+
+    def fetchone(self):
+        return self._timed("fetch", super().fetchone)
+
+    def fetchmany(self, size=None):
+        if size is None:
+            return self._timed("fetch", super().fetchmany)
+        return self._timed("fetch", super().fetchmany, size)
+
+    def fetchall(self):
+        rows = self._timed("fetch", super().fetchall)
+        metrics.incr("rows_fetched", len(rows))
+        return rows
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors and shortcuts are all instrumented"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            metrics.observe("commit", time.perf_counter() - start)
+
+    def count_vm_steps(self, every=100):
+        """Install a progress handler counting SQLite VM steps (in units of `every`)"""
+        def handler():
+            metrics.incr("vm_steps", every)
+            return 0
+        self.set_progress_handler(handler, every)
+
+
+def configure(enabled=None, slow_query_ms=None, export_target=None):
+    """Configure instrumentation explicitly or from CLAW_METRICS* env vars"""
+    if enabled is None:
+        enabled = os.environ.get("CLAW_METRICS", "") not in ("", "0", "false")
+    if slow_query_ms is None and os.environ.get("CLAW_SLOW_QUERY_MS"):
+        slow_query_ms = float(os.environ["CLAW_SLOW_QUERY_MS"])
+    if export_target is None:
+        export_target = os.environ.get("CLAW_METRICS_EXPORT")
+
+    metrics.slow_query_seconds = slow_query_ms / 1000 if slow_query_ms is not None else None
+    metrics.export_target = export_target
+    metrics.enabled = bool(enabled or slow_query_ms is not None or export_target)
+    return metrics.enabled
+
+
+def connect(db_path, **kwargs):
+    """sqlite3.connect() that returns an instrumented connection when enabled"""
+    if not metrics.enabled:
+        return sqlite3.connect(db_path, **kwargs)
+    start = time.perf_counter()
+    conn = sqlite3.connect(db_path, factory=InstrumentedConnection, **kwargs)
+    metrics.observe("connect", time.perf_counter() - start)
+    metrics.incr("connections")
+    return conn
+
+
+def startup_seconds():
+    """Seconds between process start and now (interpreter startup + imports)"""
+    started = _process_start_time()
+    return time.time() - started if started is not None else None
+
+
+def _export_at_exit():
+    if metrics.enabled and metrics.export_target:
+        try:
+            metrics.export()
+        except OSError as e:
+            print(f"⚠️ Metrics export failed: {e}", file=sys.stderr)
+
+
+configure()
+atexit.register(_export_at_exit)
+
+
+def main():
+    """Command-line interface"""
+    if len(sys.argv) < 3 or sys.argv[1] != "show":
+        print("Usage: python3 memory_metrics.py show <metrics.prom>")
+        return
+    with open(sys.argv[2]) as f:
+        for line in f:
+            if not line.startswith("#") and "_bucket" not in line:
+                print(line.rstrip())
+
+if __name__ == "__main__":
+    main()
@@ -7,49 +7,133 @@ Replaces MEMORY.md file access with SQLite queries
 import sqlite3
 import sys
 
+import memory_metrics
+import memory_stats
+from memory_context import BUDGET, assemble_context
+from memory_fts_query import compile_query
+from memory_fuzzy import QueryExpander, ensure_fuzzy
+from memory_records import CHARS_PER_TOKEN, Chunk, Task, apply_budget, record_factory, sql_literal
+from memory_time import format_ms, range_sql, resolve_range, time_sql
+
 DB_PATH = "/home/openclaw/.openclaw/memory/main.sqlite"
 
-def query_memory(search_term=None, source=None, limit=10):
-    """Query memory chunks from SQLite"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    if search_term:
+CHUNK_COLUMNS = ("id", "path", "source", "start_line", "end_line", "hash", "model",
+                 "text", "embedding", "updated_at", "time_ms")
+FTS_COLUMNS = ("snippet", "text", "id", "path", "source", "start_line", "end_line")
+
+def _compile_search(conn, search_term, fuzzy=True, time_column=None):
+    """compile_query for chunks, expanding words with memory_fuzzy when fuzzy"""
+    expand = None
+    if fuzzy and search_term:
+        ensure_fuzzy(conn)
+        expand = QueryExpander(conn)
+    return compile_query(search_term, target='chunks', expand=expand, time_column=time_column)
+
+def _chunk_sql(match, where, where_params, limit, columns=None, snippet_tokens=2,
+               highlight=('[', ']'), source=None, time_column="time_ms"):
+    """(sql, params) of a chunk query: FTS when match is set, newest chunks otherwise
+
+    time_column is the SQL for chunk time (memory_time.time_sql); it is
+    selected as time_ms.
+    """
+    start, end = highlight or ('', '')
+    if match:
         # Use FTS for full-text search
-        cursor.execute('''
-            SELECT snippet(chunks_fts, 0, '[', ']', '...', 2) as snippet,
-                   source, path
-            FROM chunks_fts
-            WHERE chunks_fts MATCH ?
-            LIMIT ?
-        ''', (search_term, limit))
-    else:
-        # Simple query
-        query = "SELECT * FROM chunks WHERE 1=1"
-        params = []
-        
-        if source:
-            query += " AND source = ?"
-            params.append(source)
+        columns = columns or ("snippet", "source", "path")
+        unknown = [c for c in columns if c not in FTS_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown search columns: {', '.join(unknown)}")
+        select_list = ", ".join(
+            "snippet(chunks_fts, 0, {}, {}, '...', {}) as snippet".format(
+                sql_literal(start), sql_literal(end), int(snippet_tokens))
+            if c == "snippet" else f"chunks_fts.{c}"
+            for c in columns)
+        # The FTS table has no time; join chunks only when a window or filter is asked for
+        join = "JOIN chunks c ON c.id = chunks_fts.id" if where else ""
         
-        query += " ORDER BY updated_at DESC LIMIT ?"
-        params.append(limit)
-        
-        cursor.execute(query, params)
+        sql = f'''
+            SELECT {select_list}
+            FROM chunks_fts {join}
+            WHERE chunks_fts MATCH ?{where}
+            LIMIT ?
+        '''
+        return sql, [match, *where_params, limit]
+    
+    # Simple query
+    columns = columns or ("*",)
+    unknown = [c for c in columns if c not in CHUNK_COLUMNS + ("*", "snippet")]
+    if unknown:
+        raise ValueError(f"Unknown chunk columns: {', '.join(unknown)}")
+    computed = time_column != "time_ms"  # chunks not migrated to time_ms yet
+    select_list = ", ".join(
+        f"substr(text, 1, {int(snippet_tokens) * CHARS_PER_TOKEN}) as snippet" if c == "snippet"
+        else f"{time_column} as time_ms" if c == "time_ms" and computed
+        else f"*, {time_column} as time_ms" if c == "*" and computed
+        else c
+        for c in columns)
+    
+    query = f"SELECT {select_list} FROM chunks c WHERE 1=1{where}"
+    params = list(where_params)
+    
+    if source:
+        query += " AND source = ?"
+        params.append(source)
+    
+    query += f" ORDER BY {time_column} DESC LIMIT ?"
+    params.append(limit)
+    return query, params
+
+def query_memory(search_term=None, source=None, limit=10, columns=None,
+                 snippet_tokens=2, highlight=('[', ']'), max_bytes=None, max_tokens=None,
+                 as_tuples=False, since=None, until=None, last_days=None, fuzzy=True):
+    """Query memory chunks from SQLite
+    
+    columns picks the projection, snippet_tokens/highlight shape the FTS
+    snippet (or the text prefix for non-search queries when columns asks
+    for 'snippet'), and max_bytes/max_tokens cap the total response size.
+    since/until/last_days limit chunks to a window of chunks.time_ms (or
+    updated_at, before `memory_time.py migrate`).
+    Rows are Chunk records, or plain tuples with as_tuples=True.
+    
+    search_term is compiled by memory_fts_query: punctuation is escaped,
+    "phrases", prefix*, OR, -exclusions and NEAR work, and source:/path:/
+    since: filters become SQL predicates (a term of filters only skips FTS).
+    With fuzzy, each plain word also matches its synonyms and, when it isn't
+    in the index, its closest spellings (memory_fuzzy), in the same MATCH.
+    """
+    conn = memory_metrics.connect(DB_PATH)
+    if not as_tuples:
+        conn.row_factory = record_factory(Chunk)
+    cursor = conn.cursor()
+    time_column = time_sql(conn, 'chunks', 'c')
+    time_clause, time_params = range_sql(*resolve_range(since, until, last_days), column=time_column)
+    compiled = _compile_search(conn, search_term, fuzzy, time_column)
+    if search_term and not (compiled.match or compiled.where):
+        conn.close()
+        return []  # nothing searchable in it (e.g. only punctuation)
+    time_clause += compiled.where
+    time_params += compiled.params
+    
+    sql, params = _chunk_sql(compiled.match, time_clause, time_params, limit, columns,
+                             snippet_tokens, highlight, source, time_column)
+    cursor.execute(sql, params)
     
     results = cursor.fetchall()
     conn.close()
+    
+    if max_bytes is not None or max_tokens is not None:
+        results = apply_budget(results, max_bytes, max_tokens)
     return results
 
-def show_todos(status=None, priority=None):
-    """Show todos from SQLite"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+def show_todos(status=None, priority=None, since=None, until=None, last_days=None):
+    """Show todos from SQLite (since/until/last_days filter by creation time)"""
+    conn = memory_metrics.connect(DB_PATH)
+    conn.row_factory = record_factory(Task)
     cursor = conn.cursor()
     
-    query = "SELECT * FROM todos WHERE 1=1"
-    params = []
+    time_clause, params = range_sql(*resolve_range(since, until, last_days),
+                                    column=time_sql(conn, 'todos'))
+    query = f"SELECT * FROM todos WHERE 1=1{time_clause}"
     
     if status:
         query += " AND status = ?"
@@ -66,22 +150,78 @@ def show_todos(status=None, priority=None):
     conn.close()
     return todos
 
+def profile_search(search_term, limit=5, export_target=None):
+    """Break a search down into startup, connect, FTS match, fetch and decode time
+
+    Profiles the query query_memory() runs for search_term (compiled and
+    fuzzy-expanded the same way).
+    """
+    startup = memory_metrics.startup_seconds()
+    memory_metrics.configure(enabled=True, export_target=export_target)
+    metrics = memory_metrics.metrics
+
+    conn = memory_metrics.connect(DB_PATH)
+    conn.row_factory = record_factory(Chunk)
+    conn.count_vm_steps()
+    time_column = time_sql(conn, 'chunks', 'c')
+    compiled = _compile_search(conn, search_term, time_column=time_column)
+    if not (compiled.match or compiled.where):
+        conn.close()
+        print(f'❌ Nothing searchable in "{search_term}"')
+        return
+    sql, params = _chunk_sql(compiled.match, compiled.where, compiled.params, limit,
+                             ("snippet", "source", "path"), time_column=time_column)
+    try:
+        plan = [row[-1] for row in sqlite3.Connection.execute(
+            conn, f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    except sqlite3.OperationalError as e:
+        conn.close()
+        print(f'❌ Search failed: {e}')
+        return
+
+    with metrics.timed("decode rows"):
+        decoded = [dict(row) for row in rows]
+        rendered = "\n".join(f'{r["snippet"]} {r["source"]} {r["path"]}' for r in decoded)
+    conn.close()
+
+    print(f'⏱️  Profile for "{search_term}" ({len(decoded)} rows, {len(rendered)} chars)')
+    if startup is not None:
+        print(f'  Process startup + imports: {startup * 1000:.2f} ms')
+    print(f"  {'Operation':<32} {'Calls':>6} {'Total ms':>10} {'Avg ms':>9} {'Max ms':>9}")
+    for op, count, total_ms, avg_ms, max_ms in metrics.summary():
+        print(f"  {op:<32} {count:>6} {total_ms:>10.3f} {avg_ms:>9.3f} {max_ms:>9.3f}")
+    print(f'  SQLite VM steps: ~{metrics.counters.get("vm_steps", 0)}')
+    print('  Query plan:')
+    for step in plan:
+        print(f'    {step}')
+
+    if export_target:
+        metrics.export(export_target)
+        print(f'📈 Metrics exported to {export_target}')
+
 def main():
     """Command-line interface"""
     if len(sys.argv) < 2:
         print("Usage: python3 memory_query.py [command] [options]")
         print("\nCommands:")
-        print("  search [term] - Search memory (full-text)")
-        print("  recent [N] - Show recent memory entries")
+        print("  search [term] [days] - Search memory (full-text), optionally the last N days")
+        print("  context [term] [tokens] - Deduplicated, diverse memory block sized for a prompt")
+        print("  recent [N] [days] - Show recent memory entries")
         print("  todos [status] [priority] - Show todos")
         print("  stats - Show database statistics")
+        print("  profile [term] [export] - Time a search and show its query plan")
         return
     
     command = sys.argv[1]
     
     if command == "search":
         term = sys.argv[2] if len(sys.argv) > 2 else ""
-        results = query_memory(search_term=term, limit=5)
+        days = float(sys.argv[3]) if len(sys.argv) > 3 else None
+        results = query_memory(search_term=term, limit=5, last_days=days)
         
         print(f'🔍 Search results for "{term}":')
         for i, row in enumerate(results, 1):
@@ -93,14 +233,21 @@ def main():
                 print(f'   Source: {row["source"]} | Lines: {row["start_line"]}-{row["end_line"]}')
             print()
     
+    elif command == "context":
+        term = sys.argv[2] if len(sys.argv) > 2 else ""
+        budget = int(sys.argv[3]) if len(sys.argv) > 3 else BUDGET
+        context = assemble_context(term, budget, DB_PATH)
+        print(context['text'] or f'🔍 Nothing in memory matches "{term}"')
+    
     elif command == "recent":
         limit = int(sys.argv[2]) if len(sys.argv) > 2 else 10
-        results = query_memory(limit=limit)
+        days = float(sys.argv[3]) if len(sys.argv) > 3 else None
+        results = query_memory(limit=limit, last_days=days)
         
         print(f'📝 Recent memory entries ({limit} most recent):')
         for i, row in enumerate(results, 1):
             print(f'{i}. {row["text"][:80]}...')
-            print(f'   Source: {row["source"]} | Updated: {row["updated_at"][:19]}')
+            print(f'   Source: {row["source"]} | Updated: {format_ms(row["time_ms"])}')
             print()
     
     elif command == "todos":
@@ -118,34 +265,35 @@ def main():
             print()
     
     elif command == "stats":
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        # O(1) lookups in the trigger-maintained stats table; cheap on the live file
+        conn = memory_metrics.connect(DB_PATH)
+        memory_stats.ensure_stats(conn)
         
-        cursor.execute('SELECT COUNT(*) FROM chunks')
-        chunks = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM todos WHERE status != "completed"')
-        active_todos = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM memories')
-        memories = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT source, COUNT(*) FROM chunks GROUP BY source')
-        sources = cursor.fetchall()
+        chunks = memory_stats.get_total(conn, 'chunks')[0]
+        active_todos = sum(count for status, count, _, _ in
+                           memory_stats.get_counts(conn, 'todos', 'status')
+                           if status != 'completed')
+        memories = memory_stats.get_total(conn, 'memories')[0]
+        sources = memory_stats.get_counts(conn, 'chunks', 'source')
         
         print('📊 SQLite Memory Database Statistics:')
         print(f'  Total chunks: {chunks}')
         print(f'  Active todos: {active_todos}')
         print(f'  Memory entries: {memories}')
         print(f'  Sources:')
-        for source, count in sources:
+        for source, count, _, _ in sources:
             print(f'    - {source}: {count} chunks')
         
         conn.close()
     
+    elif command == "profile":
+        term = sys.argv[2] if len(sys.argv) > 2 else ""
+        export_target = sys.argv[3] if len(sys.argv) > 3 else None
+        profile_search(term, export_target=export_target)
+    
     else:
         print(f"Unknown command: {command}")
-        print("Use: search, recent, todos, stats")
+        print("Use: search, context, recent, todos, stats, profile")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
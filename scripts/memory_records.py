@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Compact Record Types for Memory Rows
+__slots__ records that wrap the tuple SQLite already built, so a bulk scan
+allocates one small object per row instead of a dict (plus a parsed tags
+list) per row.
+
+Also the helpers every search entry point shares for shaping results:
+sql_literal (for snippet() markers) and apply_budget (byte/token caps).
+
+Usage:
+  conn.row_factory = record_factory(Memory)
+  for memory in conn.execute('SELECT * FROM memories'):
+      print(memory.content, memory.tags)   # tags parsed on first access
+"""
+
+import json
+
+MEMORY_FIELDS = ("id", "timestamp", "user_id", "memory_type", "content", "category",
+                 "tags", "importance", "access_count", "last_accessed",
+                 "compression_status", "original_file_path", "created_at",
+                 "source", "content_type", "updated_at", "time_ms")
+CHUNK_FIELDS = ("id", "path", "source", "start_line", "end_line", "hash", "model",
+                "text", "embedding", "updated_at", "snippet", "time_ms")
+TASK_FIELDS = ("id", "title", "description", "category", "priority", "status",
+               "due_date", "created_at", "last_updated", "completed_at", "assigned_to",
+               "project_path", "project_file", "tags", "progress_percent", "notes",
+               "blocked_by", "time_ms")
+CHARS_PER_TOKEN = 4  # rough local estimate, good enough for budgeting
+
+
+def _field(name):
+    def get(self):
+        i = self._index.get(name)
+        return None if i is None else self._row[i]
+    get.__name__ = name
+    return property(get)
+
+
+class Record:
+    """Read-only view over a row tuple; column positions are shared per query"""
+
+    __slots__ = ("_row", "_index")
+    FIELDS = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in cls.FIELDS:
+            if name not in cls.__dict__:
+                setattr(cls, name, _field(name))
+
+    def __init__(self, row, index):
+        self._row = row
+        self._index = index
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, slice)):
+            return self._row[key]
+        if key not in self._index:
+            raise IndexError(f"No column named {key}")
+        return getattr(self, key) if key in self.FIELDS else self._row[self._index[key]]
+
+    def __iter__(self):
+        return iter(self._row)
+
+    def __len__(self):
+        return len(self._row)
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return self._row == other._row and self.keys() == other.keys()
+        return NotImplemented
+
+    __hash__ = None
+
+    def keys(self):
+        """Column names in query order (sqlite3.Row compatible)"""
+        return list(self._index)
+
+    def get(self, key, default=None):
+        return self[key] if key in self._index else default
+
+    def as_tuple(self):
+        return self._row
+
+    def as_dict(self):
+        return {key: self[key] for key in self._index}
+
+    def __repr__(self):
+        shown = ", ".join(f"{k}={self._row[i]!r:.40}" for k, i in list(self._index.items())[:4])
+        return f"{type(self).__name__}({shown})"
+
+
+class Memory(Record):
+    """Row of the memories table; tags (JSON or CSV) are parsed lazily"""
+
+    __slots__ = ("_tags",)
+    FIELDS = MEMORY_FIELDS
+
+    def __init__(self, row, index):
+        self._row = row
+        self._index = index
+        self._tags = None
+
+    @property
+    def tags(self):
+        if self._tags is None:
+            i = self._index.get("tags")
+            self._tags = parse_tags(self._row[i] if i is not None else None)
+        return self._tags
+
+    @property
+    def raw_tags(self):
+        """Tags exactly as stored, without parsing"""
+        i = self._index.get("tags")
+        return None if i is None else self._row[i]
+
+
+class Chunk(Record):
+    """Row of the chunks table (or a chunks_fts search result)"""
+
+    __slots__ = ()
+    FIELDS = CHUNK_FIELDS
+
+
+class Task(Record):
+    """Row of the todos table"""
+
+    __slots__ = ()
+    FIELDS = TASK_FIELDS
+
+
+def parse_tags(raw):
+    """Parse a JSON array or comma-separated tag string into a list"""
+    if not raw:
+        return []
+    if raw.lstrip().startswith("["):
+        try:
+            return json.loads(raw)
+        except ValueError:
+            pass
+    return [tag.strip() for tag in raw.split(",") if tag.strip()]
+
+
+def record_factory(record_type):
+    """Build a row_factory that wraps rows in record_type
+
+    Column positions are computed once per cursor result set and shared by
+    every record, so each row costs a single slotted object.
+    """
+    cache = {"description": None, "index": None}
+
+    def factory(cursor, row):
+        description = cursor.description
+        if description is not cache["description"]:
+            cache["description"] = description
+            cache["index"] = {col[0]: i for i, col in enumerate(description)}
+        return record_type(row, cache["index"])
+
+    return factory
+
+
+def sql_literal(text):
+    """Quote a string for inlining into SQL (snippet() markers cannot be bound)"""
+    return "'" + str(text).replace("'", "''") + "'"
+
+
+def estimate_tokens(text):
+    """Approximate token count of a string"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def apply_budget(rows, max_bytes=None, max_tokens=None):
+    """Keep rows (in rank order) whose text fits in the byte/token budget
+
+    A row's text is its non-NULL values joined by spaces. Rows that don't
+    fit are skipped, so a later, shorter row can still be kept.
+    """
+    kept = []
+    used_bytes = used_tokens = 0
+    for row in rows:
+        text = " ".join(str(v) for v in tuple(row) if v is not None)
+        size = len(text.encode())
+        tokens = estimate_tokens(text)
+        if max_bytes is not None and used_bytes + size > max_bytes:
+            continue
+        if max_tokens is not None and used_tokens + tokens > max_tokens:
+            continue
+        kept.append(row)
+        used_bytes += size
+        used_tokens += tokens
+    return kept
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Read Replica for Analytics
+Heavy scans (histograms, ad-hoc analytics) read from a copy of the memory
+database instead of the file the agent writes to. The copy is taken with
+the SQLite online backup API (one read transaction in WAL mode, so writers
+are never blocked) and swapped in atomically; readers open it immutable,
+so they take no locks at all and never touch the primary.
+
+Staleness is how far the replica may lag the primary: zero while the
+primary hasn't been written since the snapshot was taken, otherwise the
+snapshot's age. open_replica() refreshes a replica that lags more than the
+caller's bound (or whose schema differs from the primary's) before
+returning a connection. The snapshot time is the replica file's mtime.
+
+Usage:
+  python3 memory_replica.py refresh            # take a new snapshot now
+  python3 memory_replica.py watch [--interval 300]   # refresh whenever the primary changed
+  python3 memory_replica.py status
+"""
+
+import os
+import time
+import fcntl
+import sqlite3
+import argparse
+from contextlib import contextmanager
+
+import memory_metrics
+
+DB_PATH = "/home/openclaw/.openclaw/memory/main.sqlite"
+
+MAX_STALENESS = 15 * 60  # seconds an analytics read may lag the primary
+WATCH_INTERVAL = 5 * 60  # seconds between checks in `watch`
+BACKUP_STEP_PAGES = 1024  # per step when the source isn't in WAL mode
+CHANGE_MARGIN = 1.0  # seconds; writes this close to a snapshot count as after it
+
+
+def replica_path(db_path):
+    """Default replica location: main.sqlite -> main.replica.sqlite"""
+    root, ext = os.path.splitext(db_path)
+    return f"{root}.replica{ext or '.sqlite'}"
+
+
+def backup_copy(db_path, copy_path):
+    """Consistent copy of a live database via the online backup API; True if it is in WAL mode"""
+    src = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=30)
+    dest = sqlite3.connect(copy_path)
+    try:
+        wal = src.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+        # WAL: one read transaction, writers keep going. Otherwise step, so
+        # the shared lock is dropped between batches of pages.
+        src.backup(dest, pages=-1 if wal else BACKUP_STEP_PAGES, sleep=0.005)
+    finally:
+        dest.close()
+        src.close()
+    return wal
+
+
+def _source_mtime(db_path):
+    """Last time the primary (or its WAL) was written"""
+    mtimes = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            mtimes.append(os.stat(path).st_mtime)
+        except FileNotFoundError:
+            pass
+    if not mtimes:
+        raise FileNotFoundError(db_path)
+    return max(mtimes)
+
+
+def _schema(uri):
+    # Not PRAGMA schema_version: backup bumps the copy's own cookie instead
+    conn = sqlite3.connect(uri, uri=True, timeout=30)
+    try:
+        return conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY type, name").fetchall()
+    finally:
+        conn.close()
+
+
+def replica_status(db_path=DB_PATH, path=None):
+    """{'path', 'exists', 'snapshot', 'age', 'lag', 'schema_matches'} for a replica (times in seconds)"""
+    path = path or replica_path(db_path)
+    status = {"path": path, "exists": os.path.exists(path), "snapshot": None,
+              "age": None, "lag": None, "schema_matches": False}
+    if not status["exists"]:
+        return status
+    snapshot = os.stat(path).st_mtime
+    status["snapshot"] = snapshot
+    status["age"] = max(0.0, time.time() - snapshot)
+    status["lag"] = 0.0 if _source_mtime(db_path) < snapshot - CHANGE_MARGIN else status["age"]
+    status["schema_matches"] = (_schema(f"file:{db_path}?mode=ro")
+                                == _schema(f"file:{path}?mode=ro&immutable=1"))
+    return status
+
+
+def _is_stale(status, max_staleness):
+    return not status["exists"] or not status["schema_matches"] or status["lag"] > max_staleness
+
+
+def refresh_replica(db_path=DB_PATH, path=None):
+    """Take a new snapshot of db_path and swap it in; returns seconds taken
+
+    Connections already open on the old replica keep reading it until
+    they are closed.
+    """
+    path = path or replica_path(db_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    started = time.time()
+    try:
+        backup_copy(db_path, tmp_path)
+        # A WAL-mode copy would need -wal/-shm files next to it to be read
+        conn = sqlite3.connect(tmp_path)
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.close()
+        os.utime(tmp_path, (started, started))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return time.time() - started
+
+
+@contextmanager
+def _refresh_lock(path):
+    """One refresher at a time per replica (across processes)"""
+    with open(f"{path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def ensure_fresh(db_path=DB_PATH, max_staleness=MAX_STALENESS, path=None):
+    """Refresh the replica if it lags more than max_staleness seconds; True if refreshed"""
+    path = path or replica_path(db_path)
+    if not _is_stale(replica_status(db_path, path), max_staleness):
+        return False
+    with _refresh_lock(path):
+        # Another process may have refreshed it while we waited
+        if not _is_stale(replica_status(db_path, path), max_staleness):
+            return False
+        refresh_replica(db_path, path)
+    return True
+
+
+def open_replica(db_path=DB_PATH, max_staleness=MAX_STALENESS, path=None):
+    """Read-only connection to a replica lagging db_path by at most max_staleness seconds
+
+    max_staleness=0 means "everything committed so far" and copies the
+    database whenever it has changed; O(1) lookups (e.g. the stats table)
+    are cheaper on the primary.
+    """
+    path = path or replica_path(db_path)
+    ensure_fresh(db_path, max_staleness, path)
+    return memory_metrics.connect(f"file:{path}?mode=ro&immutable=1", uri=True)
+
+
+def watch(db_path=DB_PATH, interval=WATCH_INTERVAL, path=None):
+    """Refresh the replica every interval seconds while the primary changes"""
+    path = path or replica_path(db_path)
+    print(f"👀 Refreshing {path} every {interval:g}s when {db_path} changes")
+    while True:
+        started = time.perf_counter()
+        if ensure_fresh(db_path, 0, path):
+            print(f"🔄 Replica refreshed in {time.perf_counter() - started:.2f}s")
+        time.sleep(interval)
+
+
+def main():
+    """Command-line interface"""
+    parser = argparse.ArgumentParser(description="Read replica of the memory database for analytics")
+    parser.add_argument("action", choices=["refresh", "watch", "status"], help="Action to perform")
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL,
+                        help=f"Seconds between checks for 'watch' (default: {WATCH_INTERVAL})")
+    parser.add_argument("--db", default=DB_PATH, help=f"Primary database (default: {DB_PATH})")
+    parser.add_argument("--replica", help="Replica path (default: main.replica.sqlite next to --db)")
+
+    args = parser.parse_args()
+    path = args.replica or replica_path(args.db)
+
+    if args.action == "refresh":
+        with _refresh_lock(path):
+            seconds = refresh_replica(args.db, path)
+        size = os.path.getsize(path) / 1024 / 1024
+        print(f"✅ Replica {path} refreshed in {seconds:.2f}s ({size:.1f} MB)")
+
+    elif args.action == "watch":
+        try:
+            watch(args.db, args.interval, path)
+        except KeyboardInterrupt:
+            pass
+
+    elif args.action == "status":
+        status = replica_status(args.db, path)
+        if not status["exists"]:
+            print(f"❌ No replica at {path} (run: memory_replica.py refresh)")
+            return
+        print(f"📸 Replica {path}")
+        print(f"  Snapshot: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(status['snapshot']))}"
+              f" ({status['age']:.0f}s ago)")
+        print(f"  Lag behind primary: {status['lag']:.0f}s"
+              + ("" if status["lag"] else " (primary unchanged since)"))
+        print(f"  Schema matches primary: {'yes' if status['schema_matches'] else 'no'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+SQLite Memory Shard Router
+Routes each user_id to its own SQLite file, with a shared-knowledge shard
+attached for cross-partition queries (users/jeff/, users/cari/, shared/)
+"""
+
+import sqlite3
+import datetime
+import json
+import os
+import sys
+
+from memory_fts_query import compile_query
+from memory_records import apply_budget, sql_literal
+from memory_tags import ensure_tags, tag_filter_sql
+from memory_time import ensure_time_columns
+
+SHARD_ROOT = "/home/openclaw/.openclaw/memory/shards"
+SHARED_USER = "shared"
+SHARED_USERS = ("shared", "system")
+
+SHARD_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS memories (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        memory_type TEXT NOT NULL,
+        content TEXT NOT NULL,
+        category TEXT,
+        tags TEXT,
+        importance INTEGER DEFAULT 1,
+        access_count INTEGER DEFAULT 0,
+        last_accessed TEXT,
+        compression_status TEXT DEFAULT 'raw',
+        original_file_path TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_user_type ON memories(user_id, memory_type)',
+    'CREATE INDEX IF NOT EXISTS idx_timestamp ON memories(timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_category ON memories(category)',
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts
+    USING fts5(content, tags, content='memories', content_rowid='id')
+    ''',
+]
+
+MEMORY_COLUMNS = ("timestamp", "user_id", "memory_type", "content", "category",
+                  "tags", "importance", "access_count", "last_accessed",
+                  "compression_status", "original_file_path", "created_at")
+
+
+class MemoryShardRouter:
+    """Maps user_id -> shard file, kept in a small catalog database"""
+
+    def __init__(self, root=SHARD_ROOT):
+        self.root = root
+        os.makedirs(os.path.join(self.root, "users"), exist_ok=True)
+        self.catalog = sqlite3.connect(os.path.join(self.root, "catalog.sqlite"))
+        self.catalog.execute('''
+        CREATE TABLE IF NOT EXISTS shard_map (
+            user_id TEXT PRIMARY KEY,
+            shard_path TEXT NOT NULL,
+            row_count INTEGER DEFAULT 0,
+            updated_at TEXT
+        )
+        ''')
+        self.catalog.commit()
+        self._connections = {}
+
+    def shard_path(self, user_id):
+        """Return the shard file for user_id, registering it on first use"""
+        if user_id in SHARED_USERS:
+            user_id = SHARED_USER
+
+        row = self.catalog.execute(
+            'SELECT shard_path FROM shard_map WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        if row:
+            return row[0]
+
+        if user_id == SHARED_USER:
+            path = os.path.join(self.root, "shared.sqlite")
+        else:
+            safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in user_id)
+            path = os.path.join(self.root, "users", f"{safe_id}.sqlite")
+
+        self.catalog.execute('''
+            INSERT INTO shard_map (user_id, shard_path, updated_at) VALUES (?, ?, ?)
+        ''', (user_id, path, datetime.datetime.now().isoformat()))
+        self.catalog.commit()
+        return path
+
+    def _open_shard(self, path):
+        """Open a shard file in WAL mode and make sure the schema exists"""
+        conn = sqlite3.connect(path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        for statement in SHARD_SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        ensure_tags(conn)
+        ensure_time_columns(conn, ['memories'])
+        return conn
+
+    def connect(self, user_id, attach_shared=True):
+        """Get a cached connection to the user's shard with shared attached"""
+        path = self.shard_path(user_id)
+        key = (path, attach_shared)
+        if key in self._connections:
+            return self._connections[key]
+
+        conn = self._open_shard(path)
+        shared_path = self.shard_path(SHARED_USER)
+        if attach_shared and path != shared_path:
+            # Ensure the shared shard has its schema before attaching
+            self._open_shard(shared_path).close()
+            conn.execute('ATTACH DATABASE ? AS shared', (shared_path,))
+
+        self._connections[key] = conn
+        return conn
+
+    def store_memory(self, user_id, memory_type, content, category=None, tags=None, importance=1):
+        """Store a memory in the user's own shard"""
+        conn = self.connect(user_id, attach_shared=False)
+        timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        tags_json = json.dumps(tags) if tags else '[]'
+
+        cursor = conn.cursor()
+        cursor.execute('''
+        INSERT INTO memories (timestamp, user_id, memory_type, content, category, tags, importance)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (timestamp, user_id, memory_type, content, category, tags_json, importance))
+        memory_id = cursor.lastrowid
+        cursor.execute('''
+        INSERT INTO memories_fts (rowid, content, tags) VALUES (?, ?, ?)
+        ''', (memory_id, content, tags_json))
+        conn.commit()
+        return memory_id
+
+    def search(self, user_id, query, include_shared=True, limit=10,
+               snippet_tokens=None, highlight=('[', ']'), max_bytes=None, max_tokens=None,
+               tags_all=None, tags_any=None, tags_none=None):
+        """Full-text search the user's shard, plus the shared shard if requested
+        
+        snippet_tokens swaps full content for an FTS5 snippet of that width;
+        max_bytes/max_tokens cap the total size of the returned rows.
+        tags_all/tags_any/tags_none filter on each shard's memory_tags.
+        query is compiled by memory_fts_query (phrases, prefix*, OR,
+        -exclusions, NEAR, type:/tag:/importance>=N filters as SQL).
+        """
+        compiled = compile_query(query, schema='main')
+        if not (compiled.match or compiled.where):
+            return []
+        conn = self.connect(user_id, attach_shared=include_shared)
+        own_shard = self.shard_path(user_id) == self.shard_path(SHARED_USER)
+
+        if snippet_tokens and compiled.match:
+            start, end = highlight or ('', '')
+            content = "snippet(fts.memories_fts, 0, {}, {}, '...', {})".format(
+                sql_literal(start), sql_literal(end), int(snippet_tokens))
+        else:
+            content = "m.content"
+
+        # A query of filters only has no FTS rank; rank by importance instead
+        match, rank = ("fts.memories_fts MATCH ?", "fts.rank") if compiled.match else ("1=1", "-m.importance")
+        match_params = [compiled.match] if compiled.match else []
+        tag_clause, tag_params = tag_filter_sql(tags_all, tags_any, tags_none, schema='main')
+        sql = f'''
+        SELECT 'own' AS partition, m.id, m.user_id, m.memory_type, {content} AS content,
+               m.importance, {rank} AS rank
+        FROM main.memories_fts fts JOIN main.memories m ON m.id = fts.rowid
+        WHERE {match}{tag_clause}{compiled.where}
+        '''
+        params = [*match_params, *tag_params, *compiled.params]
+        if include_shared and not own_shard:
+            shared_tag_clause, _ = tag_filter_sql(tags_all, tags_any, tags_none, schema='shared')
+            shared = compile_query(query, schema='shared')
+            sql += f'''
+            UNION ALL
+            SELECT 'shared', m.id, m.user_id, m.memory_type, {content},
+                   m.importance, {rank}
+            FROM shared.memories_fts fts JOIN shared.memories m ON m.id = fts.rowid
+            WHERE {match}{shared_tag_clause}{shared.where}
+            '''
+            params.extend([*match_params, *tag_params, *shared.params])
+        sql += ' ORDER BY rank LIMIT ?'
+        params.append(limit)
+
+        rows = conn.execute(sql, params).fetchall()
+        if max_bytes is not None or max_tokens is not None:
+            rows = apply_budget(rows, max_bytes, max_tokens)
+        return rows
+
+    def list_shards(self):
+        """Return (user_id, shard_path, row_count, size_bytes) for every shard"""
+        shards = []
+        for user_id, path, row_count in self.catalog.execute(
+                'SELECT user_id, shard_path, row_count FROM shard_map ORDER BY user_id'):
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            shards.append((user_id, path, row_count, size))
+        return shards
+
+    def _refresh_row_count(self, user_id):
+        conn = self.connect(user_id, attach_shared=False)
+        count = conn.execute('SELECT COUNT(*) FROM memories').fetchone()[0]
+        self.catalog.execute('''
+            UPDATE shard_map SET row_count = ?, updated_at = ? WHERE user_id = ?
+        ''', (count, datetime.datetime.now().isoformat(),
+              SHARED_USER if user_id in SHARED_USERS else user_id))
+        self.catalog.commit()
+        return count
+
+    def migrate_from_db(self, source_db, batch_size=1000):
+        """Split a monolithic memories table into per-user shards"""
+        src = sqlite3.connect(source_db)
+        available = {row[1] for row in src.execute('PRAGMA table_info(memories)')}
+        columns = [c for c in MEMORY_COLUMNS if c in available]
+        cursor = src.execute(f'SELECT {", ".join(columns)} FROM memories ORDER BY id')
+
+        migrated = 0
+        touched = set()
+        placeholders = ", ".join("?" for _ in columns)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+
+            by_user = {}
+            for row in rows:
+                record = dict(zip(columns, row))
+                by_user.setdefault(record.get("user_id") or SHARED_USER, []).append(row)
+
+            for user_id, user_rows in by_user.items():
+                conn = self.connect(user_id, attach_shared=False)
+                with conn:
+                    for row in user_rows:
+                        cur = conn.execute(
+                            f'INSERT INTO memories ({", ".join(columns)}) VALUES ({placeholders})',
+                            row)
+                        record = dict(zip(columns, row))
+                        conn.execute(
+                            'INSERT INTO memories_fts (rowid, content, tags) VALUES (?, ?, ?)',
+                            (cur.lastrowid, record.get("content"), record.get("tags")))
+                migrated += len(user_rows)
+                touched.add(user_id)
+
+        src.close()
+        for user_id in touched:
+            self._refresh_row_count(user_id)
+        return migrated
+
+    def move_shard(self, user_id, new_path):
+        """Relocate a user's shard (e.g. to another disk) with the online backup API"""
+        old_path = self.shard_path(user_id)
+        src = self.connect(user_id, attach_shared=False)
+        os.makedirs(os.path.dirname(new_path) or ".", exist_ok=True)
+        dest = sqlite3.connect(new_path)
+        src.backup(dest)
+        dest.close()
+
+        self.close_shard(old_path)
+        self.catalog.execute('''
+            UPDATE shard_map SET shard_path = ?, updated_at = ? WHERE user_id = ?
+        ''', (new_path, datetime.datetime.now().isoformat(),
+              SHARED_USER if user_id in SHARED_USERS else user_id))
+        self.catalog.commit()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(old_path + suffix):
+                os.remove(old_path + suffix)
+        return new_path
+
+    def rebalance(self, vacuum_threshold_bytes=64 * 1024 * 1024):
+        """Refresh row counts, checkpoint WAL files and compact oversized shards"""
+        report = []
+        for user_id, path, _, size in self.list_shards():
+            conn = self.connect(user_id, attach_shared=False)
+            count = self._refresh_row_count(user_id)
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            action = "ok"
+            if size >= vacuum_threshold_bytes:
+                conn.execute('VACUUM')
+                action = "vacuumed"
+            conn.execute('ANALYZE')
+            report.append((user_id, count, size, action))
+        return report
+
+    def close_shard(self, path):
+        """Close any cached connections to the given shard file"""
+        for key in [k for k in self._connections if k[0] == path]:
+            self._connections.pop(key).close()
+
+    def close(self):
+        """Close all shard connections and the catalog"""
+        for conn in self._connections.values():
+            conn.close()
+        self._connections = {}
+        self.catalog.close()
+
+
+def main():
+    """Command-line interface"""
+    if len(sys.argv) < 2:
+        print("Usage: python3 memory_shard_router.py [command] [options]")
+        print("\nCommands:")
+        print("  list - Show shards and their sizes")
+        print("  migrate <source.sqlite> - Split a monolithic memories table into shards")
+        print("  search <user_id> \"term\" - Search a user's shard plus the shared shard")
+        print("  move <user_id> <new_path> - Relocate a user's shard")
+        print("  rebalance - Refresh counts and compact oversized shards")
+        return
+
+    command = sys.argv[1]
+    router = MemoryShardRouter()
+
+    try:
+        if command == "list":
+            print('🗂️  Memory shards:')
+            for user_id, path, count, size in router.list_shards():
+                print(f'  - {user_id}: {count} memories, {size / 1024:.1f} KB ({path})')
+
+        elif command == "migrate":
+            if len(sys.argv) < 3:
+                print("Usage: migrate <source.sqlite>")
+                return
+            migrated = router.migrate_from_db(sys.argv[2])
+            print(f"✅ Migrated {migrated} memories into per-user shards")
+
+        elif command == "search":
+            if len(sys.argv) < 4:
+                print("Usage: search <user_id> \"term\"")
+                return
+            for i, row in enumerate(router.search(sys.argv[2], sys.argv[3]), 1):
+                print(f'{i}. [{row[0]}] {row[4][:80]}...')
+                print(f'   User: {row[2]} | Type: {row[3]} | Importance: {row[5]}')
+
+        elif command == "move":
+            if len(sys.argv) < 4:
+                print("Usage: move <user_id> <new_path>")
+                return
+            router.move_shard(sys.argv[2], sys.argv[3])
+            print(f"✅ Shard for {sys.argv[2]} moved to {sys.argv[3]}")
+
+        elif command == "rebalance":
+            for user_id, count, size, action in router.rebalance():
+                print(f'  - {user_id}: {count} memories, {size / 1024:.1f} KB [{action}]')
+            print("✅ Rebalance complete")
+
+        else:
+            print(f"Unknown command: {command}")
+            print("Use: list, migrate, search, move, rebalance")
+
+    finally:
+        router.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Memory Store Snapshots
+Exports the memory database (memories, chunks and their embeddings, todos,
+stats and every other table) to a compact, columnar, versioned snapshot
+file, and bulk-loads one into a fresh database.
+
+Export first takes a consistent copy with the SQLite online backup API (a
+single read transaction in WAL mode, so writers are never blocked), then
+encodes that copy column by column in row groups. Import creates the
+tables, loads all rows, and only then builds indexes, triggers and FTS
+indexes, once each.
+
+File layout (little or big endian, as recorded in the footer):
+  MAGIC | segments (8-byte aligned) | footer JSON | u64 footer length | MAGIC
+The footer describes the schema, each table's columns and row groups, and
+the [offset, length, raw length, codec] of every segment. Segments written
+with codec 'none' can be used in place from an mmap.
+
+Usage:
+  python3 memory_snapshot.py export main.sqlite memory.msnap [--codec zlib|lzma|none]
+  python3 memory_snapshot.py import memory.msnap new.sqlite [--force]
+  python3 memory_snapshot.py info memory.msnap
+"""
+
+import os
+import re
+import sys
+import json
+import lzma
+import mmap
+import time
+import zlib
+import struct
+import sqlite3
+import argparse
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
+from datetime import datetime, timezone
+
+from memory_replica import backup_copy
+
+DB_PATH = "/home/openclaw/.openclaw/memory/main.sqlite"
+
+MAGIC = b"MSNAP\x00\x01\n"
+FORMAT_VERSION = 1
+ROW_GROUP_ROWS = 20000
+FOOTER_LENGTH = struct.Struct("<Q")
+
+# Value kinds, in SQLite's own type order
+NULL, INTEGER, REAL, TEXT, BLOB = range(5)
+KIND_OF = {type(None): NULL, int: INTEGER, float: REAL, str: TEXT, bytes: BLOB}
+
+CODECS = {
+    "none": (lambda data: data, lambda data: data),
+    "zlib": (lambda data: zlib.compress(data, 1), zlib.decompress),
+    "lzma": (lambda data: lzma.compress(data, preset=1), lzma.decompress),
+}
+
+FTS_CONTENT_RE = re.compile(r"\bcontent\s*=\s*'([^']*)'", re.IGNORECASE)
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+# --- column encoding -----------------------------------------------------
+
+def encode_column(values):
+    """(constant kind or None, {part: bytes}) for one column of a row group
+
+    A column is stored as up to five parts: a kind byte per row (omitted if
+    every value has the same kind), int64 and float64 arrays (one slot per
+    row), and offsets + concatenated bytes for text and blobs.
+    """
+    kinds = bytes(map(KIND_OF.__getitem__, map(type, values)))
+    present = set(kinds)
+    parts = {}
+    constant = kinds[0] if len(present) == 1 else None
+    if constant is None:
+        parts["kinds"] = kinds
+
+    if INTEGER in present:
+        parts["ints"] = array("q", values if constant == INTEGER else
+                              (v if type(v) is int else 0 for v in values)).tobytes()
+    if REAL in present:
+        parts["floats"] = array("d", values if constant == REAL else
+                                (v if type(v) is float else 0.0 for v in values)).tobytes()
+    if TEXT in present or BLOB in present:
+        if constant == TEXT:
+            encoded = [v.encode() for v in values]
+        else:
+            encoded = [v.encode() if type(v) is str else v if type(v) is bytes else b"" for v in values]
+        parts["offsets"] = array("q", accumulate(map(len, encoded), initial=0)).tobytes()
+        parts["data"] = b"".join(encoded)
+    return constant, parts
+
+
+def _array(typecode, data, swap):
+    values = array(typecode)
+    values.frombytes(data)
+    if swap:
+        values.byteswap()
+    return values
+
+
+def decode_column(rows, constant, parts, swap=False):
+    """List of values for one column of a row group (inverse of encode_column)"""
+    if constant == NULL:
+        return [None] * rows
+    ints = _array("q", parts["ints"], swap) if "ints" in parts else None
+    floats = _array("d", parts["floats"], swap) if "floats" in parts else None
+    offsets = _array("q", parts["offsets"], swap) if "offsets" in parts else None
+    data = parts.get("data")
+    if constant == INTEGER:
+        return ints.tolist()
+    if constant == REAL:
+        return floats.tolist()
+    if constant == TEXT:
+        return [str(data[a:b], "utf-8") for a, b in zip(offsets, offsets[1:])]
+    if constant == BLOB:
+        return [bytes(data[a:b]) for a, b in zip(offsets, offsets[1:])]
+
+    values = []
+    for i, kind in enumerate(parts["kinds"]):
+        if kind == NULL:
+            values.append(None)
+        elif kind == INTEGER:
+            values.append(ints[i])
+        elif kind == REAL:
+            values.append(floats[i])
+        elif kind == TEXT:
+            values.append(str(data[offsets[i]:offsets[i + 1]], "utf-8"))
+        else:
+            values.append(bytes(data[offsets[i]:offsets[i + 1]]))
+    return values
+
+
+# --- snapshot files ------------------------------------------------------
+
+class SnapshotWriter:
+    """Appends 8-byte aligned segments, then the footer
+
+    Compression runs on a thread pool (zlib and lzma release the GIL), so
+    one row group is compressed while the next is read and encoded.
+    """
+
+    def __init__(self, path, codec="zlib"):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec: {codec} (use {', '.join(CODECS)})")
+        self.path = path
+        self.codec = codec
+        self.pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="snapshot")
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self.offset = len(MAGIC)
+
+    def compress(self, data):
+        """(stored bytes, raw length, codec) for one segment"""
+        stored = CODECS[self.codec][0](data)
+        if len(stored) >= len(data):
+            # Incompressible (or tiny): keep it raw and mmap-able
+            return data, len(data), "none"
+        return stored, len(data), self.codec
+
+    def submit(self, parts):
+        """Start compressing a column's parts; pass the result to write()"""
+        return {part: self.pool.submit(self.compress, data) for part, data in parts.items()}
+
+    def write(self, pending):
+        """Write compressed parts in order; returns {part: [offset, length, raw length, codec]}"""
+        return {part: self.segment(*future.result()) for part, future in pending.items()}
+
+    def segment(self, stored, raw_length, codec):
+        padding = -self.offset % 8
+        self.file.write(b"\0" * padding)
+        self.offset += padding
+        ref = [self.offset, len(stored), raw_length, codec]
+        self.file.write(stored)
+        self.offset += len(stored)
+        return ref
+
+    def close(self, footer):
+        self.pool.shutdown()
+        raw = json.dumps(footer, separators=(",", ":")).encode()
+        self.file.write(raw)
+        self.file.write(FOOTER_LENGTH.pack(len(raw)))
+        self.file.write(MAGIC)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+
+class SnapshotReader:
+    """Memory-mapped snapshot file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        tail = len(MAGIC) + FOOTER_LENGTH.size
+        if len(self.map) < len(MAGIC) + tail or self.map[:len(MAGIC)] != MAGIC or self.map[-len(MAGIC):] != MAGIC:
+            raise ValueError(f"{path} is not a memory snapshot")
+        (length,) = FOOTER_LENGTH.unpack_from(self.map, len(self.map) - tail)
+        self.footer = json.loads(self.map[len(self.map) - tail - length:len(self.map) - tail])
+        if self.footer.get("version", 0) > FORMAT_VERSION:
+            raise ValueError(f"Snapshot version {self.footer['version']} is newer than this tool ({FORMAT_VERSION})")
+        self.swap = self.footer["byteorder"] != sys.byteorder
+
+    def segment(self, ref):
+        offset, length, _, codec = ref
+        view = memoryview(self.map)[offset:offset + length]
+        return view if codec == "none" else CODECS[codec][1](view)
+
+    def row_groups(self, table):
+        """Yield each row group of a table as a list of row tuples"""
+        for group in table["row_groups"]:
+            columns = [
+                decode_column(group["rows"], column["kind"],
+                              {part: self.segment(ref) for part, ref in column["parts"].items()},
+                              self.swap)
+                for column in group["columns"]
+            ]
+            yield list(zip(*columns))
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+# --- export ----------------------------------------------------------------
+
+def _data_tables(conn):
+    """[(name, kind, columns with rowid first if needed)] of tables whose rows are exported"""
+    tables = []
+    table_list = conn.execute("PRAGMA main.table_list").fetchall()
+    shadow = [row[1] for row in table_list if row[2] == "shadow"]
+    for _, name, table_type, _, without_rowid, _ in table_list:
+        if table_type not in ("table", "virtual") or name.startswith("sqlite_"):
+            continue
+        info = conn.execute(f"PRAGMA table_info({quote(name)})").fetchall()
+        columns = [row[1] for row in info]
+        if table_type == "virtual":
+            sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (name,)).fetchone()[0]
+            match = FTS_CONTENT_RE.search(sql or "")
+            if match:
+                # External content is rebuilt on import; contentless has no text to save
+                tables.append((name, "rebuild" if match.group(1) else "contentless", []))
+                continue
+            if not any(s.startswith(name + "_") for s in shadow):
+                # No shadow tables, no rows of its own (fts5vocab, table-valued views)
+                tables.append((name, "schema", []))
+                continue
+            tables.append((name, "virtual", ["rowid"] + columns))
+            continue
+        pks = [row for row in info if row[5]]
+        rowid_alias = len(pks) == 1 and pks[0][2].upper() == "INTEGER"
+        if not without_rowid and not rowid_alias:
+            columns = ["rowid"] + columns
+        tables.append((name, "table", columns))
+    return tables
+
+
+def export_snapshot(db_path, out_path, codec="zlib", tables=None, row_group_rows=ROW_GROUP_ROWS):
+    """Write a snapshot of db_path to out_path; returns the footer"""
+    copy_path = out_path + ".copy.sqlite"
+    wal = backup_copy(db_path, copy_path)
+    conn = sqlite3.connect(copy_path)
+    writer = SnapshotWriter(out_path + ".tmp", codec)
+    try:
+        footer = {
+            "format": "memory-snapshot",
+            "version": FORMAT_VERSION,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "source": os.path.abspath(db_path),
+            "sqlite_version": sqlite3.sqlite_version,
+            "byteorder": sys.byteorder,
+            "journal_mode": "wal" if wal else "delete",
+            "schema": [list(row) for row in conn.execute('''
+                SELECT type, name, tbl_name, sql FROM sqlite_master
+                WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\'
+                ORDER BY rowid
+            ''')],
+            "tables": [],
+        }
+        shadow = {name for _, name, kind, *_ in conn.execute("PRAGMA main.table_list") if kind == "shadow"}
+        footer["schema"] = [entry for entry in footer["schema"] if entry[1] not in shadow]
+
+        data_tables = _data_tables(conn)
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'").fetchone():
+            data_tables.append(("sqlite_sequence", "sequence", ["name", "seq"]))
+        for name, kind, columns in data_tables:
+            # Entries without rows (FTS rebuilds, sequences) are kept for any --tables
+            if tables and name not in tables and kind in ("table", "virtual"):
+                continue
+            entry = {"name": name, "kind": kind, "columns": columns, "rows": 0, "row_groups": []}
+            if columns:
+                cursor = conn.execute(f"SELECT {', '.join(quote(c) for c in columns)} FROM {quote(name)}")
+                pending = None
+                while True:
+                    rows = cursor.fetchmany(row_group_rows)
+                    group = None
+                    if rows:
+                        group = {"rows": len(rows), "columns": []}
+                        for values in zip(*rows):
+                            constant, parts = encode_column(values)
+                            group["columns"].append({"kind": constant, "parts": writer.submit(parts)})
+                    if pending:
+                        # Previous group: compressed meanwhile, written in order
+                        for column in pending["columns"]:
+                            column["parts"] = writer.write(column["parts"])
+                        entry["row_groups"].append(pending)
+                        entry["rows"] += pending["rows"]
+                    if not group:
+                        break
+                    pending = group
+            footer["tables"].append(entry)
+        writer.close(footer)
+        os.replace(out_path + ".tmp", out_path)
+        return footer
+    finally:
+        conn.close()
+        if not writer.file.closed:
+            writer.pool.shutdown(cancel_futures=True)
+            writer.file.close()
+            os.remove(out_path + ".tmp")
+        os.remove(copy_path)
+
+
+# --- import ----------------------------------------------------------------
+
+def import_snapshot(snapshot_path, db_path, force=False):
+    """Bulk-load a snapshot into a new database at db_path; returns {table: rows}"""
+    if os.path.exists(db_path) and not force:
+        raise FileExistsError(f"{db_path} exists (use force=True to replace it)")
+    reader = SnapshotReader(snapshot_path)
+    loading_path = db_path + ".loading"
+    for suffix in ("", "-journal"):
+        if os.path.exists(loading_path + suffix):
+            os.remove(loading_path + suffix)
+
+    conn = sqlite3.connect(loading_path, isolation_level=None)
+    loaded = {}
+    try:
+        # Nothing to protect until the file is renamed into place
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA locking_mode=EXCLUSIVE")
+        conn.execute("PRAGMA cache_size=-262144")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("BEGIN")
+
+        schema = reader.footer["schema"]
+        for kind, name, _, sql in schema:
+            if kind == "table":
+                try:
+                    conn.execute(sql)
+                except sqlite3.OperationalError as e:
+                    # e.g. a virtual table whose module (extension) isn't loaded here
+                    print(f"⚠️ Skipping {name}: {e}", file=sys.stderr)
+
+        for table in reader.footer["tables"]:
+            name, columns = table["name"], table["columns"]
+            if not columns:
+                continue
+            if table["kind"] == "sequence":
+                conn.execute("DELETE FROM sqlite_sequence")
+            insert = (f"INSERT INTO {quote(name)} ({', '.join(quote(c) for c in columns)}) "
+                      f"VALUES ({', '.join('?' for _ in columns)})")
+            try:
+                for rows in reader.row_groups(table):
+                    conn.executemany(insert, rows)
+            except sqlite3.OperationalError as e:
+                print(f"⚠️ Could not load {name}: {e}", file=sys.stderr)
+                continue
+            loaded[name] = table["rows"]
+
+        # Indexes, views and triggers once, after the data is in
+        for wanted in ("index", "view", "trigger"):
+            for kind, name, _, sql in schema:
+                if kind == wanted:
+                    conn.execute(sql)
+        for table in reader.footer["tables"]:
+            if table["kind"] == "rebuild":
+                conn.execute(f"INSERT INTO {quote(table['name'])}({quote(table['name'])}) VALUES ('rebuild')")
+        conn.execute("COMMIT")
+        conn.execute("ANALYZE")
+
+        conn.execute("PRAGMA locking_mode=NORMAL")
+        if reader.footer.get("journal_mode") == "wal":
+            conn.execute("PRAGMA journal_mode=WAL")
+        else:
+            conn.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        conn.close()
+        reader.close()
+
+    # A leftover -wal/-shm from a replaced database must not be replayed into this one
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    os.replace(loading_path, db_path)
+    return loaded
+
+
+def main():
+    """Command-line interface"""
+    parser = argparse.ArgumentParser(description="Columnar snapshots of the memory store")
+    parser.add_argument("action", choices=["export", "import", "info"], help="Action to perform")
+    parser.add_argument("source", help="Database (export) or snapshot (import, info)")
+    parser.add_argument("target", nargs="?", help="Snapshot (export) or new database (import)")
+    parser.add_argument("--codec", default="zlib", choices=sorted(CODECS), help="Segment compression (default: zlib)")
+    parser.add_argument("--tables", help="Comma-separated tables to export (default: all)")
+    parser.add_argument("--force", action="store_true", help="Replace an existing database on import")
+
+    args = parser.parse_args()
+    if args.action in ("export", "import") and not args.target:
+        parser.error(f"{args.action} needs a target")
+
+    start = time.perf_counter()
+    try:
+        if args.action == "export":
+            tables = args.tables.split(",") if args.tables else None
+            footer = export_snapshot(args.source, args.target, args.codec, tables)
+            rows = sum(t["rows"] for t in footer["tables"])
+            print(f"✅ Exported {rows} rows from {len(footer['tables'])} tables to {args.target} "
+                  f"({os.path.getsize(args.target) / 1e6:.1f} MB, {time.perf_counter() - start:.2f}s)")
+
+        elif args.action == "import":
+            loaded = import_snapshot(args.source, args.target, args.force)
+            print(f"✅ Loaded {sum(loaded.values())} rows into {len(loaded)} tables at {args.target} "
+                  f"({time.perf_counter() - start:.2f}s)")
+
+        elif args.action == "info":
+            reader = SnapshotReader(args.source)
+            footer = reader.footer
+            print(f"📦 {args.source}: format v{footer['version']}, {footer['created_at']}, from {footer['source']}")
+            for table in footer["tables"]:
+                stored = sum(ref[1] for group in table["row_groups"] for column in group["columns"]
+                             for ref in column["parts"].values())
+                raw = sum(ref[2] for group in table["row_groups"] for column in group["columns"]
+                          for ref in column["parts"].values())
+                print(f"  {table['name']:<28} {table['kind']:<11} {table['rows']:>9} rows "
+                      f"{stored / 1e6:>9.2f} MB (raw {raw / 1e6:.2f} MB)")
+            reader.close()
+
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Materialized Memory Statistics
+Keeps a small `stats` table current with INSERT/UPDATE/DELETE triggers, so
+stats and reports are primary-key lookups instead of full-table scans.
+
+Usage:
+  python3 memory_stats.py install   # create table + triggers and backfill
+  python3 memory_stats.py rebuild   # recount from scratch
+  python3 memory_stats.py show
+"""
+
+import sys
+import json
+
+import memory_metrics
+
+DB_PATH = "/home/openclaw/.openclaw/memory/main.sqlite"
+
+# table -> dimensions to count; 'a|b' is a composite (grouped) dimension,
+# whose values join the escaped column values with '|' (see composite_value).
+# Dimensions whose columns are missing from the live schema are skipped.
+STAT_DIMENSIONS = {
+    'memories': ['memory_type', 'importance', 'compression_status', 'source',
+                 'user_id', 'user_id|memory_type'],
+    'chunks': ['source'],
+    'todos': ['status', 'priority'],
+}
+TOTAL = '*'
+
+STATS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS stats (
+    table_name TEXT NOT NULL,
+    dimension TEXT NOT NULL,     -- column name, 'a|b' composite, or '*' for totals
+    value NOT NULL,              -- column value ('' for NULL), composite_value() for 'a|b'
+    count INTEGER NOT NULL DEFAULT 0,
+    importance_sum INTEGER NOT NULL DEFAULT 0,
+    access_sum INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (table_name, dimension, value)
+) WITHOUT ROWID
+'''
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def _dimensions(conn, table):
+    columns = _columns(conn, table)
+    if not columns:
+        return None, columns
+    dims = [d for d in STAT_DIMENSIONS[table] if all(c in columns for c in d.split('|'))]
+    return dims + [TOTAL], columns
+
+
+def composite_value(*parts):
+    """Stats value of a composite dimension: parts with '\\' and '|' escaped, joined by '|'"""
+    return "|".join(str(p).replace("\\", "\\\\").replace("|", "\\|") for p in parts)
+
+
+def split_value(value):
+    """Parts of a composite dimension value (inverse of composite_value)"""
+    parts, current = [], []
+    chars = iter(value)
+    for ch in chars:
+        if ch == "\\":
+            current.append(next(chars, ""))
+        elif ch == "|":
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    parts.append("".join(current))
+    return parts
+
+
+def _key_expr(dimension, alias):
+    if dimension == TOTAL:
+        return "''"
+    columns = dimension.split('|')
+    if len(columns) == 1:
+        return f"IFNULL({alias}.{columns[0]}, '')"
+    return " || '|' || ".join(
+        f"REPLACE(REPLACE(IFNULL({alias}.{c}, ''), '\\', '\\\\'), '|', '\\|')" for c in columns)
+
+
+def _upsert(table, dimension, alias, sign, columns):
+    importance = f"IFNULL({alias}.importance, 0)" if 'importance' in columns else "0"
+    access = f"IFNULL({alias}.access_count, 0)" if 'access_count' in columns else "0"
+    return f'''
+        INSERT INTO stats (table_name, dimension, value, count, importance_sum, access_sum)
+        VALUES ('{table}', '{dimension}', {_key_expr(dimension, alias)},
+                {sign}1, {sign}{importance}, {sign}{access})
+        ON CONFLICT (table_name, dimension, value) DO UPDATE SET
+            count = count + excluded.count,
+            importance_sum = importance_sum + excluded.importance_sum,
+            access_sum = access_sum + excluded.access_sum;'''
+
+
+def _triggers(table, dims, columns):
+    """{trigger name: CREATE TRIGGER sql} keeping table's stats current"""
+    watched = sorted({c for d in dims if d != TOTAL for c in d.split('|')}
+                     | ({'importance', 'access_count'} & columns))
+    triggers = {
+        f'stats_{table}_insert': f'''CREATE TRIGGER stats_{table}_insert AFTER INSERT ON {table} BEGIN
+            {"".join(_upsert(table, d, "NEW", "+", columns) for d in dims)}
+            END''',
+        f'stats_{table}_delete': f'''CREATE TRIGGER stats_{table}_delete AFTER DELETE ON {table} BEGIN
+            {"".join(_upsert(table, d, "OLD", "-", columns) for d in dims)}
+            END''',
+    }
+    if watched:
+        triggers[f'stats_{table}_update'] = f'''CREATE TRIGGER stats_{table}_update AFTER UPDATE OF {", ".join(watched)} ON {table} BEGIN
+            {"".join(_upsert(table, d, "OLD", "-", columns) for d in dims)}
+            {"".join(_upsert(table, d, "NEW", "+", columns) for d in dims)}
+            END'''
+    return triggers
+
+
+def install_stats(conn, tables=None, backfill=True):
+    """Create the stats table and the triggers of tables (default: all) (idempotent)"""
+    conn.execute(STATS_SCHEMA)
+    for table in tables or STAT_DIMENSIONS:
+        dims, columns = _dimensions(conn, table)
+        if dims is None:
+            continue
+        for event in ('insert', 'delete', 'update'):
+            conn.execute(f'DROP TRIGGER IF EXISTS stats_{table}_{event}')
+        for sql in _triggers(table, dims, columns).values():
+            conn.execute(sql)
+    if backfill:
+        rebuild_stats(conn, tables)
+    conn.commit()
+
+
+def rebuild_stats(conn, tables=None):
+    """Recount every dimension of tables (default: all) from the base tables"""
+    tables = list(tables or STAT_DIMENSIONS)
+    conn.execute('DELETE FROM stats WHERE table_name IN (SELECT value FROM json_each(?))',
+                 (json.dumps(tables),))
+    for table in tables:
+        dims, columns = _dimensions(conn, table)
+        if dims is None:
+            continue
+        importance = "IFNULL(SUM(importance), 0)" if 'importance' in columns else "0"
+        access = "IFNULL(SUM(access_count), 0)" if 'access_count' in columns else "0"
+        for dimension in dims:
+            key = _key_expr(dimension, table)
+            conn.execute(f'''
+                INSERT INTO stats (table_name, dimension, value, count, importance_sum, access_sum)
+                SELECT '{table}', '{dimension}', {key}, COUNT(*), {importance}, {access}
+                FROM {table} GROUP BY {key}
+            ''')
+    conn.commit()
+
+
+def ensure_stats(conn, tables=None):
+    """Install stats on first use, per table; cheap no-op afterwards
+
+    A table whose triggers are missing or differ from the current ones (new
+    table, new columns, changed value format) gets them installed and only
+    its own stats recounted.
+    """
+    installed = dict(conn.execute('''
+        SELECT name, sql FROM sqlite_master
+        WHERE name = 'stats' OR (type = 'trigger' AND name LIKE 'stats\\_%' ESCAPE '\\')
+    '''))
+    missing = []
+    for table in tables or STAT_DIMENSIONS:
+        dims, columns = _dimensions(conn, table)
+        if dims is None:
+            continue
+        if 'stats' not in installed or any(
+                installed.get(name) != sql for name, sql in _triggers(table, dims, columns).items()):
+            missing.append(table)
+    if missing:
+        install_stats(conn, missing)
+
+
+def get_counts(conn, table, dimension=TOTAL, prefix=None):
+    """[(value, count, importance_sum, access_sum)] for one dimension, count > 0
+
+    prefix narrows a composite dimension to one first part, e.g. prefix='jeff'
+    on 'user_id|memory_type'; split_value() takes such values apart.
+    """
+    sql = '''
+        SELECT value, count, importance_sum, access_sum FROM stats
+        WHERE table_name = ? AND dimension = ? AND count > 0
+    '''
+    params = [table, dimension]
+    if prefix is not None:
+        sql += " AND value >= ? AND value < ?"
+        prefix = composite_value(prefix)
+        params.extend([f"{prefix}|", f"{prefix}}}"])
+    return conn.execute(sql + " ORDER BY value", params).fetchall()
+
+
+def get_total(conn, table):
+    """(count, importance_sum, access_sum) for a whole table"""
+    rows = get_counts(conn, table)
+    return tuple(rows[0][1:]) if rows else (0, 0, 0)
+
+
+def main():
+    """Command-line interface"""
+    if len(sys.argv) < 2:
+        print("Usage: python3 memory_stats.py [command]")
+        print("\nCommands:")
+        print("  install - Create stats table and triggers, then backfill")
+        print("  rebuild - Recount all statistics")
+        print("  show - Print materialized statistics")
+        return
+
+    command = sys.argv[1]
+    conn = memory_metrics.connect(DB_PATH)
+
+    try:
+        if command == "install":
+            install_stats(conn)
+            print("✅ Stats table and triggers installed")
+
+        elif command == "rebuild":
+            rebuild_stats(conn)
+            print("✅ Stats rebuilt")
+
+        elif command == "show":
+            ensure_stats(conn)
+            for table, dimension, value, count in conn.execute('''
+                SELECT table_name, dimension, value, count FROM stats
+                WHERE count > 0 ORDER BY table_name, dimension, value
+            '''):
+                print(f'  {table}.{dimension} = {value!r}: {count}')
+
+        else:
+            print(f"Unknown command: {command}")
+            print("Use: install, rebuild, show")
+
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
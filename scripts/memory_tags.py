@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Normalized Memory Tags
+memories.tags holds a JSON array (prototype, compressor), comma-separated
+text (integrator) or whatever was typed on the command line (writer), so a
+tag filter meant FTS over that column or json.loads in Python. This keeps
+a `tags` table and a `memory_tags` join table (indexed both ways) current
+with triggers that parse either format, so tag filters are indexed joins
+and facet counts are lookups.
+
+Tags are matched trimmed of spaces and '#', ASCII-lowercased (like
+SQLite's lower()).
+
+Usage:
+  python3 memory_tags.py migrate        # create tables + triggers, index existing rows
+  python3 memory_tags.py rebuild        # re-index every memory from memories.tags
+  python3 memory_tags.py facets [--limit 20]
+  python3 memory_tags.py find --all sqlite,cron [--any a,b] [--none c]
+"""
+
+import time
+import argparse
+
+import memory_metrics
+from memory_records import parse_tags
+
+DB_PATH = "/home/openclaw/.openclaw/memory/main.sqlite"
+
+FACET_LIMIT = 20
+
+TAGS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,          -- normalized tag
+    count INTEGER NOT NULL DEFAULT 0    -- memories carrying it
+);
+CREATE TABLE IF NOT EXISTS memory_tags (
+    memory_id INTEGER NOT NULL,
+    tag_id INTEGER NOT NULL,
+    PRIMARY KEY (memory_id, tag_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_memory_tags_tag ON memory_tags(tag_id, memory_id);
+'''
+
+ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def normalize_tag(tag):
+    """Tag as stored in the tags table (mirrors tag_name_sql)"""
+    return str(tag).strip(" #").translate(ASCII_LOWER)
+
+
+def tag_list(tags):
+    """Normalized, de-duplicated tags from a list or a JSON/CSV string (None -> [])"""
+    if not tags:
+        return []
+    if isinstance(tags, str):
+        tags = parse_tags(tags)
+    names = []
+    for tag in tags:
+        name = normalize_tag(tag)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def tags_json_sql(expr):
+    """SQL expression: a tags value as a JSON array ('[]' if it can't be read)
+
+    JSON arrays pass through; anything else is split on commas. Pure SQL,
+    so the triggers work from every connection.
+    """
+    escaped = expr
+    for old, new in ((r"'\'", r"'\\'"), ("'\"'", r"'\"'"),
+                     ("char(10)", "' '"), ("char(13)", "' '"), ("char(9)", "' '")):
+        escaped = f"replace({escaped}, {old}, {new})"
+    as_json = f'''(CASE
+        WHEN {expr} IS NULL THEN '[]'
+        WHEN json_valid({expr}) AND json_type({expr}) = 'array' THEN {expr}
+        ELSE '["' || replace({escaped}, ',', '","') || '"]' END)'''
+    return f"(CASE WHEN json_valid({as_json}) THEN {as_json} ELSE '[]' END)"
+
+
+def tag_name_sql(value):
+    """SQL expression normalizing one json_each value (mirrors normalize_tag)"""
+    return f"lower(trim(CAST({value} AS TEXT), ' #'))"
+
+
+def _link_sql(memory_id, tags_expr, rows=''):
+    """Statements creating the tags in tags_expr and linking them to memory_id
+
+    rows ('memories m, ') turns them into a bulk insert over a table.
+    """
+    name = tag_name_sql("j.value")
+    return f'''
+        INSERT OR IGNORE INTO tags (name)
+        SELECT {name} FROM {rows}json_each({tags_json_sql(tags_expr)}) j
+        WHERE j.atom IS NOT NULL AND {name} != '';
+        INSERT OR IGNORE INTO memory_tags (memory_id, tag_id)
+        SELECT {memory_id}, t.id FROM {rows}json_each({tags_json_sql(tags_expr)}) j
+        JOIN tags t ON t.name = {name}
+        WHERE j.atom IS NOT NULL;
+    '''
+
+
+def install_tags(conn):
+    """Create tags/memory_tags, index every memory and install triggers (idempotent)
+
+    Returns the number of memory -> tag links.
+    """
+    conn.executescript(TAGS_SCHEMA)
+    for trigger in ('tags_memories_insert', 'tags_memories_update', 'tags_memories_delete',
+                    'tags_link_insert', 'tags_link_delete'):
+        conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+
+    # Backfill in bulk, then count once, before the per-row triggers exist
+    for statement in _link_sql('m.id', 'm.tags', rows='memories m, ').split(';')[:-1]:
+        conn.execute(statement)
+    conn.execute('''
+        UPDATE tags SET count = (SELECT COUNT(*) FROM memory_tags WHERE tag_id = tags.id)
+    ''')
+
+    conn.execute(f'''
+        CREATE TRIGGER tags_memories_insert AFTER INSERT ON memories BEGIN
+            {_link_sql('NEW.id', 'NEW.tags')}
+        END''')
+    conn.execute(f'''
+        CREATE TRIGGER tags_memories_update AFTER UPDATE OF tags ON memories BEGIN
+            DELETE FROM memory_tags WHERE memory_id = OLD.id;
+            {_link_sql('NEW.id', 'NEW.tags')}
+        END''')
+    conn.execute('''
+        CREATE TRIGGER tags_memories_delete AFTER DELETE ON memories BEGIN
+            DELETE FROM memory_tags WHERE memory_id = OLD.id;
+        END''')
+    conn.execute('''
+        CREATE TRIGGER tags_link_insert AFTER INSERT ON memory_tags BEGIN
+            UPDATE tags SET count = count + 1 WHERE id = NEW.tag_id;
+        END''')
+    conn.execute('''
+        CREATE TRIGGER tags_link_delete AFTER DELETE ON memory_tags BEGIN
+            UPDATE tags SET count = count - 1 WHERE id = OLD.tag_id;
+        END''')
+    conn.commit()
+    return conn.execute('SELECT COUNT(*) FROM memory_tags').fetchone()[0]
+
+
+def rebuild_tags(conn):
+    """Drop every link and re-index all memories from memories.tags"""
+    conn.executescript(TAGS_SCHEMA)
+    conn.execute('DELETE FROM memory_tags')
+    conn.execute('DELETE FROM tags')
+    return install_tags(conn)
+
+
+def ensure_tags(conn):
+    """Install tags on first use; cheap no-op afterwards"""
+    installed = conn.execute('''
+        SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name = 'tags_memories_insert'
+    ''').fetchone()[0]
+    if not installed:
+        install_tags(conn)
+
+
+def tag_filter_sql(tags_all=None, tags_any=None, tags_none=None, column='m.id', schema=None):
+    """(' AND ...', params) keeping memories (by id `column`) with all / any / none of the tags
+
+    Each tag argument is a list or a JSON/CSV string. Every condition is an
+    index lookup on memory_tags; `schema` qualifies the tables (e.g. an
+    attached shard).
+    """
+    prefix = f'{schema}.' if schema else ''
+    sql = ''
+    params = []
+
+    def tagged(names):
+        marks = ', '.join('?' * len(names))
+        return (f'SELECT mt.memory_id FROM {prefix}memory_tags mt '
+                f'JOIN {prefix}tags t ON t.id = mt.tag_id WHERE t.name IN ({marks})')
+
+    names = tag_list(tags_all)
+    if names:
+        sql += f' AND {column} IN ({tagged(names)} GROUP BY mt.memory_id HAVING COUNT(*) = ?)'
+        params.extend(names + [len(names)])
+    names = tag_list(tags_any)
+    if names:
+        sql += f' AND {column} IN ({tagged(names)})'
+        params.extend(names)
+    names = tag_list(tags_none)
+    if names:
+        sql += f' AND {column} NOT IN ({tagged(names)})'
+        params.extend(names)
+    return sql, params
+
+
+def tag_facets(conn, ids_sql=None, params=(), limit=FACET_LIMIT):
+    """[(tag, count)] most used first, over all memories or those whose ids ids_sql selects"""
+    if ids_sql is None:
+        return conn.execute('''
+            SELECT name, count FROM tags WHERE count > 0 ORDER BY count DESC, name LIMIT ?
+        ''', (limit,)).fetchall()
+    return conn.execute(f'''
+        SELECT t.name, COUNT(*) AS n
+        FROM memory_tags mt JOIN tags t ON t.id = mt.tag_id
+        WHERE mt.memory_id IN ({ids_sql})
+        GROUP BY t.id ORDER BY n DESC, t.name LIMIT ?
+    ''', [*params, limit]).fetchall()
+
+
+def main():
+    """Command-line interface"""
+    parser = argparse.ArgumentParser(description="Normalized memory tags")
+    parser.add_argument("action", choices=["migrate", "rebuild", "facets", "find"], help="Action to perform")
+    parser.add_argument("--all", dest="tags_all", help="'find': memories with all of these tags (comma-separated)")
+    parser.add_argument("--any", dest="tags_any", help="'find': memories with any of these tags")
+    parser.add_argument("--none", dest="tags_none", help="'find': memories with none of these tags")
+    parser.add_argument("--limit", type=int, default=FACET_LIMIT, help=f"Maximum results (default: {FACET_LIMIT})")
+    parser.add_argument("--db", default=DB_PATH, help=f"Database (default: {DB_PATH})")
+
+    args = parser.parse_args()
+    conn = memory_metrics.connect(args.db)
+
+    try:
+        if args.action in ("migrate", "rebuild"):
+            start = time.perf_counter()
+            links = install_tags(conn) if args.action == "migrate" else rebuild_tags(conn)
+            tags = conn.execute('SELECT COUNT(*) FROM tags WHERE count > 0').fetchone()[0]
+            print(f"✅ {tags} tags, {links} memory links ({time.perf_counter() - start:.2f}s)")
+
+        elif args.action == "facets":
+            ensure_tags(conn)
+            print('🏷️ Tags:')
+            for name, count in tag_facets(conn, limit=args.limit):
+                print(f'  {count:>6}  {name}')
+
+        elif args.action == "find":
+            ensure_tags(conn)
+            where, params = tag_filter_sql(args.tags_all, args.tags_any, args.tags_none)
+            rows = conn.execute(f'''
+                SELECT m.id, m.tags, m.content FROM memories m
+                WHERE 1=1{where} ORDER BY m.id DESC LIMIT ?
+            ''', params + [args.limit]).fetchall()
+            print(f'🏷️ {len(rows)} memories:')
+            for memory_id, tags, content in rows:
+                print(f'  #{memory_id} [{", ".join(parse_tags(tags))}] {" ".join(str(content).split())[:80]}')
+
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
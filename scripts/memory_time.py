@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Normalized Memory Time
+The tables store time in mixed formats: aware ISO text (prototype), naive
+local ISO text (datetime.now() in the writers), SQLite CURRENT_TIMESTAMP
+and integer milliseconds (chunks.updated_at). Text comparison across those
+is wrong and can't use an index. This adds an integer epoch-ms `time_ms`
+column per table, backfilled and kept current by triggers, with an index
+so time ranges and per-day histograms are index range scans.
+
+Naive text is read as local time, like the writers that produced it.
+Numbers below 1e11 are epoch seconds, anything larger epoch milliseconds.
+
+Usage:
+  python3 memory_time.py migrate     # add time_ms + index + triggers, backfill
+  python3 memory_time.py histogram [memories|chunks|todos] [--days 30]   # read from the replica
+  python3 memory_time.py check       # rows whose time could not be parsed
+"""
+
+import re
+import time
+import argparse
+from datetime import date, datetime, timedelta
+
+import memory_metrics
+from memory_replica import open_replica
+
+DB_PATH = "/home/openclaw/.openclaw/memory/main.sqlite"
+
+TIME_COLUMN = "time_ms"
+# table -> column time_ms is derived from
+TIME_SOURCES = {
+    'memories': 'timestamp',
+    'chunks': 'updated_at',
+    'todos': 'created_at',
+}
+DAY_MS = 86400 * 1000
+SECONDS_CUTOFF = 100_000_000_000  # 1e11: below is seconds (until year 5138), above ms
+
+RELATIVE_RE = re.compile(r'^(\d+)\s*([mhdw])$')
+RELATIVE_UNITS = {'m': 60 * 1000, 'h': 3600 * 1000, 'd': DAY_MS, 'w': 7 * DAY_MS}
+
+
+def epoch_ms_sql(expr):
+    """SQL expression converting a stored time value to epoch ms (NULL if unparseable)
+
+    Pure SQL (no Python function), so triggers work from every connection.
+    julianday(x, 'utc') reads naive text as local time and leaves text with
+    an explicit offset or 'Z' alone.
+    """
+    return f'''(CASE
+        WHEN typeof({expr}) IN ('integer', 'real')
+             OR ({expr} GLOB '[0-9]*' AND {expr} NOT GLOB '*[^0-9.]*')
+        THEN CAST(CASE WHEN {expr} + 0 >= {SECONDS_CUTOFF} THEN {expr} + 0
+                       ELSE ({expr} + 0) * 1000 END AS INTEGER)
+        ELSE CAST(round((julianday({expr}, 'utc') - 2440587.5) * {DAY_MS}) AS INTEGER)
+    END)'''
+
+
+def to_epoch_ms(value):
+    """Epoch ms for an int/float, datetime, date or ISO/relative string (None passes through)
+
+    Mirrors epoch_ms_sql for stored values; relative strings ('90m', '12h',
+    '7d', '2w') count back from now, and 'today' / 'yesterday' are local
+    midnights.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"Not a time: {value!r}")
+    if isinstance(value, (int, float)):
+        return int(value if value >= SECONDS_CUTOFF else value * 1000)
+    if isinstance(value, datetime):
+        return int(round(value.astimezone().timestamp() * 1000))
+    if isinstance(value, date):
+        return to_epoch_ms(datetime.combine(value, datetime.min.time()))
+
+    text = str(value).strip()
+    if re.fullmatch(r'\d+(\.\d*)?', text):
+        return to_epoch_ms(float(text))
+    if text in ('today', 'yesterday'):
+        day = date.today() - timedelta(days=text == 'yesterday')
+        return to_epoch_ms(day)
+    match = RELATIVE_RE.match(text)
+    if match:
+        return int(time.time() * 1000) - int(match.group(1)) * RELATIVE_UNITS[match.group(2)]
+    try:
+        return to_epoch_ms(datetime.fromisoformat(text))
+    except ValueError:
+        raise ValueError(f"Unrecognized time: {value!r}") from None
+
+
+def resolve_range(since=None, until=None, last_days=None):
+    """(start_ms, end_ms) for since/until (end exclusive) or the last N days; None = open"""
+    start = to_epoch_ms(since)
+    end = to_epoch_ms(until)
+    if last_days is not None:
+        start = int(time.time() * 1000) - int(last_days * DAY_MS)
+    return start, end
+
+
+def range_sql(start, end, column=TIME_COLUMN):
+    """(' AND column >= ? AND column < ?', params) for whichever bounds are set"""
+    sql = ''
+    params = []
+    if start is not None:
+        sql += f' AND {column} >= ?'
+        params.append(start)
+    if end is not None:
+        sql += f' AND {column} < ?'
+        params.append(end)
+    return sql, params
+
+
+def format_ms(ms, fmt='%Y-%m-%d %H:%M'):
+    """Local time string for epoch ms ('' for None)"""
+    return '' if ms is None else time.strftime(fmt, time.localtime(ms / 1000))
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def time_sql(conn, table, alias=None):
+    """SQL for a row's epoch ms: time_ms once migrated, else computed from the source column
+
+    For read paths, which must not migrate the schema (chunks belongs to
+    the gateway): an unmigrated table gives the same values, just without
+    the index.
+    """
+    prefix = f'{alias}.' if alias else ''
+    columns = _columns(conn, table)
+    if TIME_COLUMN in columns:
+        return f'{prefix}{TIME_COLUMN}'
+    if TIME_SOURCES[table] in columns:
+        return epoch_ms_sql(f'{prefix}{TIME_SOURCES[table]}')
+    return 'NULL'
+
+
+def install_time_columns(conn, tables=None):
+    """Add time_ms, its index and maintenance triggers; backfill NULLs (idempotent)
+
+    Returns {table: rows backfilled}. Tables (or source columns) missing
+    from the live schema are skipped.
+    """
+    backfilled = {}
+    for table in tables or TIME_SOURCES:
+        source = TIME_SOURCES[table]
+        columns = _columns(conn, table)
+        if source not in columns:
+            continue
+        if TIME_COLUMN not in columns:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {TIME_COLUMN} INTEGER')
+
+        # Writers that don't know about time_ms leave it NULL; fill it in
+        conn.execute(f'DROP TRIGGER IF EXISTS time_{table}_insert')
+        conn.execute(f'DROP TRIGGER IF EXISTS time_{table}_update')
+        conn.execute(f'''
+            CREATE TRIGGER time_{table}_insert AFTER INSERT ON {table}
+            WHEN NEW.{TIME_COLUMN} IS NULL BEGIN
+                UPDATE {table} SET {TIME_COLUMN} = {epoch_ms_sql(f"NEW.{source}")}
+                WHERE rowid = NEW.rowid;
+            END''')
+        conn.execute(f'''
+            CREATE TRIGGER time_{table}_update AFTER UPDATE OF {source} ON {table} BEGIN
+                UPDATE {table} SET {TIME_COLUMN} = {epoch_ms_sql(f"NEW.{source}")}
+                WHERE rowid = NEW.rowid;
+            END''')
+
+        backfilled[table] = conn.execute(f'''
+            UPDATE {table} SET {TIME_COLUMN} = {epoch_ms_sql(source)}
+            WHERE {TIME_COLUMN} IS NULL AND {source} IS NOT NULL
+        ''').rowcount
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{TIME_COLUMN} ON {table}({TIME_COLUMN})')
+    conn.commit()
+    return backfilled
+
+
+def ensure_time_columns(conn, tables=None):
+    """Install time_ms on first use; cheap no-op afterwards (writers only, see time_sql)"""
+    tables = tables or TIME_SOURCES
+    installed = {name for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'time\\_%\\_insert' ESCAPE '\\'")}
+    missing = [t for t in tables if f'time_{t}_insert' not in installed]
+    if missing:
+        install_time_columns(conn, missing)
+
+
+def day_histogram(conn, table, start=None, end=None, where='', params=()):
+    """[(YYYY-MM-DD, count)] per local day for rows of table in [start, end)
+
+    `where` adds conditions (starting with ' AND ') on the table. The range
+    is an index range scan on time_ms; only matching rows are bucketed.
+    """
+    if table not in TIME_SOURCES:
+        raise ValueError(f"No time column for table: {table}")
+    range_clause, range_params = range_sql(start, end)
+    return conn.execute(f'''
+        SELECT date({TIME_COLUMN} / 1000, 'unixepoch', 'localtime') AS day, COUNT(*)
+        FROM {table}
+        WHERE {TIME_COLUMN} IS NOT NULL{range_clause}{where}
+        GROUP BY day ORDER BY day
+    ''', range_params + list(params)).fetchall()
+
+
+def main():
+    """Command-line interface"""
+    parser = argparse.ArgumentParser(description="Normalized time columns and time-range queries")
+    parser.add_argument("action", choices=["migrate", "histogram", "check"], help="Action to perform")
+    parser.add_argument("table", nargs="?", default="memories", choices=sorted(TIME_SOURCES),
+                        help="Table for 'histogram' (default: memories)")
+    parser.add_argument("--days", type=float, default=30, help="Histogram window in days (default: 30)")
+    parser.add_argument("--db", default=DB_PATH, help=f"Database (default: {DB_PATH})")
+
+    args = parser.parse_args()
+    conn = memory_metrics.connect(args.db)
+
+    try:
+        if args.action == "migrate":
+            start = time.perf_counter()
+            backfilled = install_time_columns(conn)
+            for table, rows in backfilled.items():
+                print(f"✅ {table}.{TIME_COLUMN}: {rows} rows backfilled")
+            print(f"   done in {time.perf_counter() - start:.2f}s")
+
+        elif args.action == "histogram":
+            ensure_time_columns(conn)
+            start, end = resolve_range(last_days=args.days)
+            replica = open_replica(args.db)
+            try:
+                rows = day_histogram(replica, args.table, start, end)
+            finally:
+                replica.close()
+            peak = max((count for _, count in rows), default=0)
+            print(f"📅 {args.table} per day, last {args.days:g} days:")
+            for day, count in rows:
+                print(f"  {day} {count:>7} {'█' * max(1, round(40 * count / peak))}")
+
+        elif args.action == "check":
+            ensure_time_columns(conn)
+            for table, source in TIME_SOURCES.items():
+                if TIME_COLUMN not in _columns(conn, table):
+                    continue
+                bad = conn.execute(f'''
+                    SELECT COUNT(*) FROM {table} WHERE {TIME_COLUMN} IS NULL AND {source} IS NOT NULL
+                ''').fetchone()[0]
+                print(f"  {table}: {bad} rows with an unparseable {source}")
+
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,18 @@ SQLite Memory Writer Tool
 Add new memories to SQLite database (replaces .md file editing)
 """
 
-import sqlite3
 import datetime
 import sys
 
+import memory_metrics
+from memory_graph import ensure_graph, index_memory
+
 DB_PATH = "/home/openclaw/.openclaw/memory/main.sqlite"
 
 def add_memory(text, source="manual", tags=None, importance=3):
     """Add a new memory entry to SQLite"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = memory_metrics.connect(DB_PATH)
+    ensure_graph(conn)
     cursor = conn.cursor()
     
     now = datetime.datetime.now().isoformat()
@@ -33,6 +36,7 @@ def add_memory(text, source="manual", tags=None, importance=3):
     ))
     
     memory_id = cursor.lastrowid
+    index_memory(conn, memory_id, text)
     conn.commit()
     conn.close()
     
@@ -43,7 +47,7 @@ def add_chunk(text, path="manual", source="user", start_line=1, end_line=1):
     """Add a text chunk to SQLite (for structured content)"""
     import hashlib
     
-    conn = sqlite3.connect(DB_PATH)
+    conn = memory_metrics.connect(DB_PATH)
     cursor = conn.cursor()
     
     now = datetime.datetime.now().isoformat()
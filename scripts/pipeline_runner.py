@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Dependency-Driven Pipeline Runner for the Daily Feedback Loop
+Runs thinking → research → action → integration (plus compression and
+memory integration) as a DAG: each stage starts as soon as the stages it
+needs have finished and produced their outputs, and independent stages run
+in parallel. Timings and artifacts of every stage are recorded.
+
+Stages are defined in cron/pipeline.json and use the same payloads as
+cron_scheduler.py, plus a "wait" payload for outputs produced elsewhere
+(e.g. the thinking file written by the agent's thinking job):
+
+  {"id": "research", "needs": ["thinking"],
+   "payload": {"kind": "command", "argv": ["bash", "scripts/research_executor.sh"]},
+   "outputs": ["research/{date}/research_summary.md"]}
+
+Only {name} with a known variable name is substituted; other braces (JSON,
+awk programs) are left alone, and {{name}} stands for a literal {name}.
+
+Usage:
+  python3 pipeline_runner.py run [--date 2026-02-26] [--resume]
+  python3 pipeline_runner.py plan            # show stages in dependency order
+  python3 pipeline_runner.py report [date]   # timings of a recorded run
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import date as date_type, datetime
+from pathlib import Path
+from typing import List, Dict, Any
+
+from cron_scheduler import REPO_ROOT, execute_payload, install_output_capture, now_ms
+
+# Configuration
+PIPELINE_PATH = os.environ.get("CLAW_PIPELINE", str(REPO_ROOT / "cron" / "pipeline.json"))
+RECORD_DIR = REPO_ROOT / "cron" / "logs" / "pipeline"
+WORKERS = 4
+WAIT_POLL_INTERVAL = 10.0  # seconds between checks for a "wait" stage's outputs
+WAIT_TIMEOUT = 3600  # seconds a "wait" stage waits by default
+
+VARIABLE_RE = re.compile(r"\{\{(\w+)\}\}|\{(\w+)\}")  # {{escaped}} or {name}
+
+
+class PipelineError(Exception):
+    """Invalid pipeline definition or failed run"""
+
+
+def _substitute(text: str, variables: Dict[str, str]) -> str:
+    """Replace {name} in text with its variable; PipelineError for an unknown name"""
+    def replace(match):
+        escaped, name = match.groups()
+        if escaped is not None:
+            return "{" + escaped + "}"
+        if name not in variables:
+            raise PipelineError(f"Unknown variable {{{name}}} in {text!r} "
+                                f"(write {{{{{name}}}}} for a literal {{{name}}})")
+        return variables[name]
+    return VARIABLE_RE.sub(replace, text)
+
+
+def _render(value, variables: Dict[str, str]):
+    """Substitute {date}, {root}, ... into every string of a payload"""
+    if isinstance(value, str):
+        return _substitute(value, variables)
+    if isinstance(value, list):
+        return [_render(item, variables) for item in value]
+    if isinstance(value, dict):
+        return {key: _render(item, variables) for key, item in value.items()}
+    return value
+
+
+class Pipeline:
+    """A validated stage DAG for one run date"""
+
+    def __init__(self, definition: Dict[str, Any], run_date: date_type = None):
+        self.name = definition.get("name", "pipeline")
+        self.run_date = run_date or date_type.today()
+        self.variables = {"root": str(REPO_ROOT), **definition.get("vars", {}),
+                          "date": self.run_date.isoformat(),
+                          "date_compact": self.run_date.strftime("%Y%m%d")}
+        self.variables = {key: _substitute(str(value), self.variables)
+                          for key, value in self.variables.items()}
+        self.delivery = definition.get("delivery", {})
+
+        self.stages = {}
+        for stage in definition.get("stages", []):
+            if stage["id"] in self.stages:
+                raise PipelineError(f"Duplicate stage id: {stage['id']}")
+            self.stages[stage["id"]] = _render(stage, self.variables)
+        for stage in self.stages.values():
+            for need in stage.get("needs", []):
+                if need not in self.stages:
+                    raise PipelineError(f"Stage {stage['id']} needs unknown stage {need}")
+        self.order = self._topological_order()
+
+    @classmethod
+    def load(cls, path: str = None, run_date: date_type = None) -> "Pipeline":
+        with open(path or PIPELINE_PATH) as f:
+            return cls(json.load(f), run_date)
+
+    def _topological_order(self) -> List[str]:
+        waiting = {stage_id: len(stage.get("needs", [])) for stage_id, stage in self.stages.items()}
+        ready = [stage_id for stage_id, count in waiting.items() if count == 0]
+        order = []
+        while ready:
+            stage_id = ready.pop(0)
+            order.append(stage_id)
+            for dependent in self.dependents(stage_id):
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) != len(self.stages):
+            cycle = sorted(set(self.stages) - set(order))
+            raise PipelineError(f"Dependency cycle among stages: {', '.join(cycle)}")
+        return order
+
+    def dependents(self, stage_id: str) -> List[str]:
+        return [other for other, stage in self.stages.items() if stage_id in stage.get("needs", [])]
+
+    def resolve(self, path: str) -> Path:
+        path = Path(path)
+        return path if path.is_absolute() else REPO_ROOT / path
+
+    def critical_path(self, durations: Dict[str, int]) -> tuple:
+        """(total ms, [stage ids]) of the longest dependency chain by duration"""
+        best = {}
+        for stage_id in self.order:
+            needs = self.stages[stage_id].get("needs", [])
+            before = max((best[need] for need in needs), default=(0, []))
+            best[stage_id] = (before[0] + durations.get(stage_id, 0), before[1] + [stage_id])
+        return max(best.values(), default=(0, []))
+
+
+class PipelineRunner:
+    """Runs a Pipeline on a worker pool and records a run manifest"""
+
+    def __init__(self, pipeline: Pipeline, workers: int = WORKERS, resume: bool = False,
+                 record_dir: Path = None):
+        self.pipeline = pipeline
+        self.workers = workers
+        self.resume = resume
+        self.record_dir = Path(record_dir or RECORD_DIR)
+        self.record_path = self.record_dir / f"{pipeline.name}-{pipeline.run_date.isoformat()}.json"
+        self.log_dir = self.record_dir / pipeline.run_date.isoformat()
+
+    def _artifacts(self, stage) -> tuple:
+        """([artifact info], [missing outputs]) for a stage's declared outputs"""
+        artifacts, missing = [], []
+        for output in stage.get("outputs", []):
+            path = self.pipeline.resolve(output)
+            if path.exists():
+                info = path.stat()
+                artifacts.append({"path": str(path), "bytes": info.st_size,
+                                  "mtimeMs": int(info.st_mtime * 1000)})
+            else:
+                missing.append(str(path))
+        return artifacts, missing
+
+    def run_stage(self, stage_id: str) -> Dict[str, Any]:
+        """Run one stage (on the calling thread) and describe the outcome"""
+        stage = self.pipeline.stages[stage_id]
+        payload = stage.get("payload", {"kind": "wait"})
+        started = now_ms()
+        result = None
+
+        missing_inputs = [str(self.pipeline.resolve(p)) for p in stage.get("inputs", [])
+                          if not self.pipeline.resolve(p).exists()]
+        if missing_inputs:
+            status, output = "error", f"Missing inputs: {', '.join(missing_inputs)}\n"
+        elif payload.get("kind") == "wait":
+            deadline = time.monotonic() + payload.get("timeoutSeconds", WAIT_TIMEOUT)
+            interval = payload.get("pollSeconds", WAIT_POLL_INTERVAL)
+            while self._artifacts(stage)[1] and time.monotonic() < deadline:
+                time.sleep(interval)
+            status, output = "ok", ""
+        else:
+            status, output, result = execute_payload(payload)
+
+        artifacts, missing = self._artifacts(stage)
+        if status == "ok" and missing:
+            status = "error"
+            output += f"Outputs not produced: {', '.join(missing)}\n"
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.log_dir / f"{stage_id}.log", "w") as f:
+            f.write(output)
+        record = {"status": status, "startedAtMs": started, "durationMs": now_ms() - started,
+                  "artifacts": artifacts}
+        if result is not None:
+            record["result"] = result if isinstance(result, (int, float, str, bool)) else repr(result)
+        return record
+
+    def _previous(self) -> Dict[str, Any]:
+        if not (self.resume and self.record_path.exists()):
+            return {}
+        with open(self.record_path) as f:
+            stages = json.load(f).get("stages", {})
+        return {stage_id: info for stage_id, info in stages.items()
+                if info.get("status") == "ok" and stage_id in self.pipeline.stages
+                and not self._artifacts(self.pipeline.stages[stage_id])[1]}
+
+    def run(self) -> Dict[str, Any]:
+        """Run every stage as soon as its needs are satisfied; returns the run record"""
+        install_output_capture()
+        pipeline = self.pipeline
+        results = self._previous()
+        for stage_id in results:
+            print(f"↩️ {stage_id}: already done, skipping")
+
+        started = now_ms()
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pipeline") as pool:
+            while True:
+                for stage_id in pipeline.order:
+                    if stage_id in results or stage_id in pending.values():
+                        continue
+                    needs = pipeline.stages[stage_id].get("needs", [])
+                    failed = [need for need in needs if need in results and results[need]["status"] != "ok"]
+                    if failed:
+                        results[stage_id] = {"status": "blocked", "blockedBy": failed,
+                                             "durationMs": 0, "artifacts": []}
+                        print(f"⛔ {stage_id}: blocked by {', '.join(failed)}")
+                    elif all(need in results for need in needs):
+                        print(f"▶️ {stage_id}: starting")
+                        pending[pool.submit(self.run_stage, stage_id)] = stage_id
+
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage_id = pending.pop(future)
+                    try:
+                        results[stage_id] = future.result()
+                    except Exception as e:
+                        results[stage_id] = {"status": "error", "error": str(e),
+                                             "durationMs": 0, "artifacts": []}
+                    icon = "✅" if results[stage_id]["status"] == "ok" else "❌"
+                    print(f"{icon} {stage_id}: {results[stage_id]['status']} "
+                          f"in {results[stage_id]['durationMs'] / 1000:.1f}s")
+
+        durations = {stage_id: info.get("durationMs", 0) for stage_id, info in results.items()}
+        critical_ms, critical = pipeline.critical_path(durations)
+        record = {
+            "pipeline": pipeline.name,
+            "date": pipeline.run_date.isoformat(),
+            "startedAtMs": started,
+            "wallMs": now_ms() - started,
+            "serialMs": sum(durations.values()),
+            "criticalPathMs": critical_ms,
+            "criticalPath": critical,
+            "status": "ok" if all(info["status"] == "ok" for info in results.values()) else "error",
+            "stages": {stage_id: results[stage_id] for stage_id in pipeline.order},
+        }
+
+        self.record_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.record_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(record, f, indent=2)
+        os.replace(tmp_path, self.record_path)
+        self._announce(record)
+        return record
+
+    def _announce(self, record):
+        """Queue a run summary for Slack when the pipeline asks for delivery"""
+        delivery = self.pipeline.delivery
+        if delivery.get("mode") != "announce" or delivery.get("channel") != "slack":
+            return
+        try:
+            import slack_outbox
+            slack_outbox.enqueue_message(format_report(record), delivery.get("to"))
+        except Exception as e:
+            if not delivery.get("bestEffort"):
+                raise
+            print(f"⚠️ Pipeline announce failed: {e}")
+
+
+def format_report(record: Dict[str, Any]) -> str:
+    icon = "✅" if record["status"] == "ok" else "❌"
+    lines = [f"{icon} *{record['pipeline']}* {record['date']}: {record['status']} "
+             f"in {record['wallMs'] / 1000:.1f}s "
+             f"(critical path {record['criticalPathMs'] / 1000:.1f}s, serial {record['serialMs'] / 1000:.1f}s)"]
+    for stage_id, info in record["stages"].items():
+        artifacts = ", ".join(Path(a["path"]).name for a in info.get("artifacts", []))
+        critical = " *" if stage_id in record["criticalPath"] else ""
+        lines.append(f"  {stage_id}: {info['status']} {info.get('durationMs', 0) / 1000:.1f}s{critical}"
+                     + (f" → {artifacts}" if artifacts else ""))
+    return "\n".join(lines)
+
+def run_pipeline(pipeline_path: str = None, run_date: str = None, resume: bool = False,
+                 workers: int = WORKERS) -> Dict[str, Any]:
+    """Entry point for cron_scheduler ("pipeline_runner:run_pipeline"); raises if a stage failed"""
+    day = datetime.strptime(run_date, "%Y-%m-%d").date() if run_date else None
+    record = PipelineRunner(Pipeline.load(pipeline_path, day), workers, resume).run()
+    print(format_report(record))
+    if record["status"] != "ok":
+        raise PipelineError(f"Pipeline {record['pipeline']} failed")
+    return record
+
+def main():
+    """Command-line interface"""
+    parser = argparse.ArgumentParser(description="Dependency-driven pipeline runner")
+    parser.add_argument("action", choices=["run", "plan", "report"], help="Action to perform")
+    parser.add_argument("target", nargs="?", help="Date for 'report' (default: today)")
+    parser.add_argument("--pipeline", default=PIPELINE_PATH, help=f"Pipeline file (default: {PIPELINE_PATH})")
+    parser.add_argument("--date", help="Run date, YYYY-MM-DD (default: today)")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Concurrent stages")
+    parser.add_argument("--resume", action="store_true", help="Skip stages that already succeeded today")
+
+    args = parser.parse_args()
+
+    if args.action == "run":
+        try:
+            run_pipeline(args.pipeline, args.date, args.resume, args.workers)
+        except PipelineError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+    elif args.action == "plan":
+        day = datetime.strptime(args.date, "%Y-%m-%d").date() if args.date else None
+        try:
+            pipeline = Pipeline.load(args.pipeline, day)
+        except PipelineError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        for stage_id in pipeline.order:
+            stage = pipeline.stages[stage_id]
+            needs = ", ".join(stage.get("needs", [])) or "-"
+            print(f"  {stage_id} [{stage.get('payload', {}).get('kind', 'wait')}] needs: {needs}")
+            for output in stage.get("outputs", []):
+                print(f"      → {output}")
+
+    elif args.action == "report":
+        try:
+            pipeline = Pipeline.load(args.pipeline)
+        except PipelineError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        day = args.target or date_type.today().isoformat()
+        path = RECORD_DIR / f"{pipeline.name}-{day}.json"
+        if not path.exists():
+            print(f"❌ No recorded run at {path}")
+            sys.exit(1)
+        with open(path) as f:
+            print(format_report(json.load(f)))
+
+if __name__ == "__main__":
+    main()
@@ -6,14 +6,20 @@ Handles message chunking, file uploads, and reliable delivery.
 Usage:
   python3 robust_slack_messenger.py send "message" --channel "#general"
   python3 robust_slack_messenger.py file "/path/to/file.pdf" --channel "#general"
+  python3 robust_slack_messenger.py send "message" --queue   # via slack_outbox.py
   python3 robust_slack_messenger.py test
 """
 
 import os
+import re
 import sys
 import json
 import time
+import random
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 import argparse
@@ -21,55 +27,294 @@ import argparse
 # Configuration
 SLACK_BOT_TOKEN = os.environ.get("SLACK_BOT_TOKEN", "")
 SLACK_CHANNEL = os.environ.get("SLACK_CHANNEL", "#general")
+SLACK_API_BASE = os.environ.get("SLACK_API_BASE", "https://slack.com/api")
 MAX_MESSAGE_LENGTH = 3500  # Under Slack's 4000 limit for safety
 MAX_RETRIES = 3
-RETRY_DELAY = 2  # seconds
+RETRY_DELAY = 2  # seconds, base for exponential backoff
+MAX_RETRY_DELAY = 30  # seconds, backoff cap
+POOL_SIZE = 8  # keep-alive connections per host
+UPLOAD_CONCURRENCY = int(os.environ.get("SLACK_UPLOAD_CONCURRENCY", "4"))
+CHUNK_HEADER_RESERVE = 12  # room for the "(i/n)\n" prefix on multi-part messages
+SNIPPET_MIN_CHUNKS = int(os.environ.get("SLACK_SNIPPET_CHUNKS", "0"))  # opt in: send as one snippet from here
+MIN_WRAP_WIDTH = 2  # widest single character (an emoji is 2 UTF-16 units)
+
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+LIST_ITEM_RE = re.compile(r"^\s*(?:[-*+•]|\d+[.)])\s+")
+
+# Slack rate tiers as (requests per second, burst). chat.postMessage is a
+# "special" tier of roughly one message per second per channel.
+RATE_TIERS = {
+    1: (1 / 60, 1),
+    2: (20 / 60, 3),
+    3: (50 / 60, 5),
+    4: (100 / 60, 10),
+    "post": (1.0, 3),
+}
+METHOD_TIERS = {
+    "chat.postMessage": "post",
+    "auth.test": 4,
+    "files.upload": 2,
+    "files.getUploadURLExternal": 4,
+    "files.completeUploadExternal": 4,
+    "conversations.list": 2,
+}
+DEFAULT_TIER = 3
+NO_RETRY_ERRORS = ["not_authed", "invalid_auth", "account_inactive"]
+CHANNEL_ID_RE = re.compile(r"^[CGD][A-Z0-9]{6,}$")
+CHANNEL_PAGE_SIZE = 1000  # conversations.list maximum
+# The upload URL is pre-signed; the session's bearer token must not go there
+# (None removes a session header from a request)
+UPLOAD_HEADERS = {"Authorization": None}
+
+
+class TokenBucket:
+    """Thread-safe token bucket that can also be paused for Retry-After"""
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """Block until a token is available; returns seconds waited"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+    
+    def pause(self, seconds: float):
+        """Hold all callers for `seconds` (server said Retry-After)"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+def slack_length(text: str) -> int:
+    """Message length as Slack counts it (UTF-16 code units, so emoji count 2)"""
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-16-le")) // 2
+
+def _wrap_line(line: str, width: int):
+    """Hard-wrap one line into (piece, length) pieces, preferring spaces"""
+    if width < MIN_WRAP_WIDTH:
+        raise ValueError(f"Cannot wrap to width {width} (minimum {MIN_WRAP_WIDTH})")
+    size = slack_length(line)
+    while size > width:
+        cut = width
+        while slack_length(line[:cut]) > width:
+            cut -= max(1, (slack_length(line[:cut]) - width) // 2)
+        space = line.rfind(" ", cut // 2, cut)
+        if space > 0:
+            cut = space + 1
+        piece, line = line[:cut], line[cut:]
+        yield piece, slack_length(piece)
+        size = slack_length(line)
+    yield line, size
+
+def _pack(pieces, limit: int, skip_blank: bool = True) -> List[tuple]:
+    """Greedily join (text, length) pieces with newlines into (chunk, length) <= limit
+    
+    Pieces are collected in lists and joined once per chunk, so packing is
+    linear in the size of the text.
+    """
+    chunks = []
+    current = []
+    used = 0
+    for text, size in pieces:
+        if current and used + 1 + size > limit:
+            chunks.append(("\n".join(current), used))
+            current, used = [], 0
+        if not current and skip_blank and not text.strip():
+            continue
+        used += size + (1 if current else 0)
+        current.append(text)
+    if current:
+        chunks.append(("\n".join(current), used))
+    return chunks
+
+def _segments(lines: List[str]):
+    """Group lines into ('code' | 'list' | 'text', lines) markdown blocks"""
+    i, n = 0, len(lines)
+    while i < n:
+        line = lines[i]
+        fence = FENCE_RE.match(line)
+        if fence:
+            marker = fence.group(1)
+            j = i + 1
+            while j < n and not lines[j].lstrip().startswith(marker):
+                j += 1
+            j = min(j + 1, n)
+            yield "code", lines[i:j]
+        elif not line.strip():
+            j = i + 1
+            yield "text", lines[i:j]
+        else:
+            is_list = bool(LIST_ITEM_RE.match(line))
+            j = i + 1
+            while j < n and lines[j].strip() and not FENCE_RE.match(lines[j]):
+                item = LIST_ITEM_RE.match(lines[j])
+                if is_list and not (item or lines[j][:1].isspace()):
+                    break
+                if not is_list and item:
+                    break
+                j += 1
+            yield ("list" if is_list else "text"), lines[i:j]
+        i = j
+
+def _block_pieces(kind: str, lines: List[str], sizes: List[int], limit: int):
+    """(text, length) pieces for one block, each no longer than limit"""
+    total = sum(sizes) + len(sizes) - 1
+    if total <= limit:
+        yield "\n".join(lines), total
+    elif kind == "code":
+        # Split inside the fence, closing and reopening it around every piece
+        opening = lines[0].strip()
+        marker = FENCE_RE.match(opening).group(1)
+        closed = len(lines) > 1 and lines[-1].strip().startswith(marker)
+        body = lines[1:-1] if closed else lines[1:]
+        room = limit - slack_length(opening) - len(marker) - 2
+        if room < MIN_WRAP_WIDTH:
+            # No room inside a fence: split the lines as plain text
+            yield from _block_pieces("text", lines, sizes, limit)
+            return
+        pieces = (piece for line in body for piece in _wrap_line(line, room))
+        for text, size in _pack(pieces, room, skip_blank=False):
+            yield f"{opening}\n{text}\n{marker}", size + slack_length(opening) + len(marker) + 2
+    elif kind == "list":
+        # Keep each item (with its continuation lines) together where it fits
+        start = 0
+        for end in range(1, len(lines) + 1):
+            if end == len(lines) or LIST_ITEM_RE.match(lines[end]):
+                yield from _block_pieces("text", lines[start:end], sizes[start:end], limit)
+                start = end
+    else:
+        for line, size in zip(lines, sizes):
+            if size <= limit:
+                yield line, size
+            else:
+                yield from _wrap_line(line, limit)
+
+def split_markdown(text: str, limit: int) -> List[str]:
+    """Split text into chunks of at most `limit` Slack characters
+    
+    Breaks between markdown blocks where possible: fenced code blocks are
+    closed and reopened across chunks, list items stay whole, and lines
+    longer than the limit are hard-wrapped. Raises ValueError for a limit
+    below MIN_WRAP_WIDTH.
+    """
+    if limit < MIN_WRAP_WIDTH:
+        raise ValueError(f"Chunk limit {limit} is below the minimum of {MIN_WRAP_WIDTH}")
+    lines = text.split("\n")
+    sizes = [slack_length(line) for line in lines]
+    pieces = []
+    offset = 0
+    for kind, block in _segments(lines):
+        block_sizes = sizes[offset:offset + len(block)]
+        offset += len(block)
+        pieces.extend(_block_pieces(kind, block, block_sizes, limit))
+    return [chunk.rstrip() for chunk, _ in _pack(pieces, limit)]
 
 class RobustSlackMessenger:
     """Robust Slack messaging with chunking and file upload support"""
     
-    def __init__(self, token: str = None, default_channel: str = None):
-        """Initialize with Slack token and default channel"""
+    def __init__(self, token: str = None, default_channel: str = None, api_base: str = None):
+        """Initialize with Slack token, default channel and optional API base URL"""
         self.token = token or SLACK_BOT_TOKEN
         self.default_channel = default_channel or SLACK_CHANNEL
+        self.api_base = (api_base or SLACK_API_BASE).rstrip("/")
         
         if not self.token:
             raise ValueError("Slack bot token required. Set SLACK_BOT_TOKEN environment variable.")
-    
-    def _split_message(self, text: str, max_length: int = MAX_MESSAGE_LENGTH) -> List[str]:
-        """Split long messages into chunks that fit Slack's limits"""
-        if len(text) <= max_length:
-            return [text]
         
-        chunks = []
-        lines = text.split('\n')
-        current_chunk = ""
-        
-        for line in lines:
-            # If adding this line would exceed limit, start new chunk
-            if len(current_chunk) + len(line) + 1 > max_length:
-                if current_chunk:
-                    chunks.append(current_chunk)
-                    current_chunk = ""
-            
-            # Add line to current chunk
-            if current_chunk:
-                current_chunk += "\n" + line
-            else:
-                current_chunk = line
+        # One pooled keep-alive session for every API call
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {self.token}"
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        self._limiters = {}
+        self._limiters_lock = threading.Lock()
+        self._channel_ids = {}
+        self._channel_ids_lock = threading.Lock()
+    
+    def _limiter(self, method: str, channel: str = None) -> TokenBucket:
+        """Token bucket for the rate tier of an API method (per channel for posts)"""
+        tier = METHOD_TIERS.get(method, DEFAULT_TIER)
+        key = (tier, channel if tier == "post" else None)
+        with self._limiters_lock:
+            if key not in self._limiters:
+                self._limiters[key] = TokenBucket(*RATE_TIERS[tier])
+            return self._limiters[key]
+    
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for a retry attempt"""
+        return random.uniform(0, min(MAX_RETRY_DELAY, RETRY_DELAY * (2 ** attempt)))
+    
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+    
+    def channel_id(self, channel: str) -> Optional[str]:
+        """Conversation ID for a channel ID or name ("#general"); None if not found
         
-        # Add final chunk
-        if current_chunk:
-            chunks.append(current_chunk)
+        Names are resolved through conversations.list (all pages, once) and
+        cached for the life of the messenger.
+        """
+        if CHANNEL_ID_RE.match(channel):
+            return channel
+        name = channel.lstrip("#")
+        with self._channel_ids_lock:
+            if name not in self._channel_ids:
+                self._channel_ids.update(self._list_channel_ids())
+                self._channel_ids.setdefault(name, None)  # don't re-list for a missing name
+            return self._channel_ids.get(name)
+    
+    def _list_channel_ids(self) -> Dict[str, str]:
+        """{name: id} of every conversation the token can see"""
+        ids = {}
+        cursor = None
+        while True:
+            params = {"types": "public_channel,private_channel", "exclude_archived": "true",
+                      "limit": CHANNEL_PAGE_SIZE}
+            if cursor:
+                params["cursor"] = cursor
+            response = self._post("conversations.list", True, timeout=30, data=params)
+            if not response.get("ok"):
+                return ids
+            ids.update((c["name"], c["id"]) for c in response.get("channels", []))
+            cursor = (response.get("response_metadata") or {}).get("next_cursor")
+            if not cursor:
+                return ids
+    
+    def _split_message(self, text: str, max_length: int = MAX_MESSAGE_LENGTH) -> List[str]:
+        """Split long messages into chunks that fit Slack's limits
         
-        return chunks
+        Chunks leave room for the "(i/n)" prefix send_message adds, and are
+        split on markdown block boundaries (see split_markdown).
+        """
+        if slack_length(text) <= max_length:
+            return [text]
+        return split_markdown(text, max_length - CHUNK_HEADER_RESERVE)
     
     def send_message(self, 
                     text: str, 
                     channel: str = None,
                     thread_ts: str = None,
                     as_user: bool = True,
-                    retry: bool = True) -> Dict[str, Any]:
+                    retry: bool = True,
+                    as_snippet: bool = None) -> Dict[str, Any]:
         """
         Send message to Slack with automatic chunking and retry logic
         
@@ -79,6 +324,9 @@ class RobustSlackMessenger:
             thread_ts: Thread timestamp to reply in thread
             as_user: Send as user (True) or as bot (False)
             retry: Enable retry on failure
+            as_snippet: Upload as one snippet instead of chunks; by default
+                only when SNIPPET_MIN_CHUNKS is set and the text needs that
+                many chunks. Falls back to chunked posts if the upload fails
         
         Returns:
             Dictionary with response data
@@ -88,6 +336,14 @@ class RobustSlackMessenger:
         # Split message if too long
         chunks = self._split_message(text)
         
+        if as_snippet or (as_snippet is None and SNIPPET_MIN_CHUNKS
+                          and len(chunks) >= SNIPPET_MIN_CHUNKS):
+            response = self.upload_snippet(text, channel, thread_ts, retry=retry)
+            if response.get("ok"):
+                return response
+            print(f"⚠️ Snippet upload failed ({response.get('error')}), "
+                  f"sending {len(chunks)} chunks instead")
+        
         responses = []
         last_thread_ts = thread_ts
         
@@ -129,6 +385,10 @@ class RobustSlackMessenger:
         """
         Upload file to Slack with retry logic
         
+        Uses the external upload flow (files.getUploadURLExternal, a streamed
+        POST of the file body, then files.completeUploadExternal), so the
+        file is never read fully into memory.
+        
         Args:
             file_path: Path to file to upload
             channel: Slack channel (defaults to configured channel)
@@ -141,42 +401,177 @@ class RobustSlackMessenger:
             Dictionary with response data
         """
         channel = channel or self.default_channel
+        uploaded = self._upload_external(file_path, title, retry)
+        if not uploaded.get("ok"):
+            return uploaded
+        return self._complete_uploads([uploaded], channel, thread_ts, initial_comment, retry)
+    
+    def upload_snippet(self,
+                       text: str,
+                       channel: str = None,
+                       thread_ts: str = None,
+                       title: str = None,
+                       initial_comment: str = None,
+                       retry: bool = True) -> Dict[str, Any]:
+        """
+        Post a long report as a single markdown snippet
         
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"File not found: {file_path}")
+        Args:
+            text: Snippet content
+            channel: Slack channel (defaults to configured channel)
+            thread_ts: Thread timestamp to reply in thread
+            title: Snippet title (defaults to the report's first line)
+            initial_comment: Comment shown with the snippet (defaults to title)
+            retry: Enable retry on failure
         
-        filename = os.path.basename(file_path)
-        title = title or filename
+        Returns:
+            Completion response; "ts" is set when Slack reports the share
+        """
+        channel = channel or self.default_channel
+        if title is None:
+            first_line = next((line for line in text.split("\n", 20) if line.strip()), "Report")
+            title = first_line.strip().lstrip("#").strip(" *_")[:80] or "Report"
+        
+        uploaded = self._upload_external(None, title, retry, content=text.encode("utf-8"),
+                                         filename="report.md", snippet_type="markdown")
+        if not uploaded.get("ok"):
+            return uploaded
+        response = self._complete_uploads([uploaded], channel, thread_ts,
+                                          initial_comment or title, retry)
+        if response.get("ok") and "ts" not in response:
+            ts = self._share_ts(response.get("file", {}))
+            if ts:
+                response["ts"] = ts
+        return response
+    
+    def upload_files_concurrently(self,
+                                  file_paths: List[str],
+                                  channel: str = None,
+                                  thread_ts: str = None,
+                                  initial_comment: str = None,
+                                  max_concurrency: int = UPLOAD_CONCURRENCY) -> Dict[str, Any]:
+        """
+        Upload several files in parallel and share them in one completion call
         
-        # Read file
-        with open(file_path, 'rb') as f:
-            file_data = f.read()
+        Args:
+            file_paths: Files to upload
+            channel: Slack channel (defaults to configured channel)
+            thread_ts: Thread timestamp to reply in thread
+            initial_comment: Comment to include with the files
+            max_concurrency: Maximum simultaneous uploads
         
-        # Prepare payload
-        files = {
-            'file': (filename, file_data)
-        }
+        Returns:
+            Completion response, plus a "failed" list of (path, error)
+        """
+        channel = channel or self.default_channel
+        uploaded = []
+        failed = []
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+            futures = {pool.submit(self._upload_external, path): path for path in file_paths}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"ok": False, "error": str(e)}
+                if result.get("ok"):
+                    uploaded.append(result)
+                else:
+                    print(f"❌ Failed to upload {path}: {result.get('error')}")
+                    failed.append((path, result.get("error")))
         
-        data = {
-            'channels': channel,
-            'title': title,
-            'filename': filename
-        }
+        if not uploaded:
+            return {"ok": False, "error": "No files uploaded", "failed": failed}
         
-        if initial_comment:
-            data['initial_comment'] = initial_comment
+        # Keep the caller's file order in the shared message
+        order = {path: i for i, path in enumerate(file_paths)}
+        uploaded.sort(key=lambda u: order.get(u["path"], 0))
+        response = self._complete_uploads(uploaded, channel, thread_ts, initial_comment)
+        response["failed"] = failed
+        return response
+    
+    def _upload_external(self, file_path: Optional[str], title: str = None,
+                         retry: bool = True, content: bytes = None,
+                         filename: str = None, snippet_type: str = None) -> Dict[str, Any]:
+        """Reserve an upload URL and stream the file body (or `content`) to it"""
+        if content is None:
+            if not os.path.exists(file_path):
+                raise FileNotFoundError(f"File not found: {file_path}")
+            filename = filename or os.path.basename(file_path)
+            length = os.path.getsize(file_path)
+        else:
+            filename = filename or "snippet.txt"
+            length = len(content)
+        
+        params = {"filename": filename, "length": length}
+        if snippet_type:
+            params["snippet_type"] = snippet_type
+        reserved = self._post("files.getUploadURLExternal", retry, timeout=30, data=params)
+        if not reserved.get("ok"):
+            return reserved
+        
+        attempts = MAX_RETRIES if retry else 1
+        for attempt in range(attempts):
+            try:
+                if content is None:
+                    # requests streams a file object in blocks rather than loading it
+                    with open(file_path, 'rb') as f:
+                        response = self.session.post(reserved["upload_url"], data=f, timeout=300,
+                                                     headers={**UPLOAD_HEADERS,
+                                                              "Content-Length": str(length)})
+                else:
+                    response = self.session.post(reserved["upload_url"], data=content, timeout=300,
+                                                 headers=UPLOAD_HEADERS)
+                response.raise_for_status()
+                return {"ok": True, "id": reserved["file_id"], "title": title or filename,
+                        "path": file_path}
+            except requests.exceptions.RequestException as e:
+                print(f"❌ Upload of {filename} failed ({attempt+1}/{attempts}): {e}")
+            if attempt < attempts - 1:
+                time.sleep(self._backoff(attempt))
         
-        if thread_ts:
-            data['thread_ts'] = thread_ts
+        return {"ok": False, "error": "Max retries exceeded"}
+    
+    @staticmethod
+    def _share_ts(file_info: Dict[str, Any]) -> Optional[str]:
+        """Message ts of a file's first share, if Slack included it"""
+        for shares in (file_info.get("shares") or {}).values():
+            for channel_shares in shares.values():
+                if channel_shares:
+                    return channel_shares[0].get("ts")
+        return None
+    
+    def _complete_uploads(self, uploaded: List[Dict[str, Any]], channel: str,
+                          thread_ts: str = None, initial_comment: str = None,
+                          retry: bool = True) -> Dict[str, Any]:
+        """Share uploaded files to a channel with files.completeUploadExternal
         
-        # Upload with retry logic
-        return self._send_slack_api_files("files.upload", data, files, retry)
+        The method only takes a channel ID, so a name is resolved first.
+        """
+        channel_id = self.channel_id(channel)
+        if not channel_id:
+            print(f"❌ Slack channel {channel} not found (or not visible to the bot)")
+            return {"ok": False, "error": "channel_not_found"}
+        payload = {
+            "files": [{"id": u["id"], "title": u["title"]} for u in uploaded],
+            "channel_id": channel_id,
+        }
+        if initial_comment:
+            payload["initial_comment"] = initial_comment
+        if thread_ts:
+            payload["thread_ts"] = thread_ts
+        response = self._post("files.completeUploadExternal", retry, timeout=60, json=payload)
+        if response.get("ok") and response.get("files") and "file" not in response:
+            response["file"] = response["files"][0]
+        return response
     
     def send_message_with_files(self,
                                text: str,
                                file_paths: List[str],
                                channel: str = None,
-                               thread_ts: str = None) -> Dict[str, Any]:
+                               thread_ts: str = None,
+                               max_concurrency: int = UPLOAD_CONCURRENCY) -> Dict[str, Any]:
         """
         Send message with multiple files attached
         
@@ -185,6 +580,7 @@ class RobustSlackMessenger:
             file_paths: List of file paths to upload
             channel: Slack channel
             thread_ts: Thread timestamp
+            max_concurrency: Maximum simultaneous uploads
         
         Returns:
             Dictionary with response data
@@ -198,12 +594,10 @@ class RobustSlackMessenger:
         # Get thread timestamp from message response
         thread_ts = response.get("ts", thread_ts)
         
-        # Upload each file in the thread
-        for file_path in file_paths:
-            try:
-                self.upload_file(file_path, channel, thread_ts)
-            except Exception as e:
-                print(f"❌ Failed to upload {file_path}: {e}")
+        # Upload all files concurrently into the thread
+        if file_paths:
+            self.upload_files_concurrently(file_paths, channel, thread_ts,
+                                           max_concurrency=max_concurrency)
         
         return response
     
@@ -212,66 +606,55 @@ class RobustSlackMessenger:
                        payload: Dict[str, Any],
                        retry: bool = True) -> Dict[str, Any]:
         """Send request to Slack API with retry logic"""
-        url = f"https://slack.com/api/{method}"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json"
-        }
+        return self._post(method, retry, timeout=30, json=payload)
+    
+    def _post(self, method: str, retry: bool, timeout: int, **request_kwargs) -> Dict[str, Any]:
+        """POST to a Slack method through the pooled session
         
-        for attempt in range(MAX_RETRIES if retry else 1):
+        Each attempt takes a token from the method's rate-tier bucket. A 429
+        (or a 'ratelimited' error) pauses that bucket for Retry-After seconds;
+        other failures back off exponentially with full jitter.
+        """
+        url = f"{self.api_base}/{method}"
+        channel = (request_kwargs.get("json") or request_kwargs.get("data") or {}).get("channel")
+        limiter = self._limiter(method, channel)
+        attempts = MAX_RETRIES if retry else 1
+        
+        for attempt in range(attempts):
+            limiter.acquire()
+            rate_limited = False
             try:
-                response = requests.post(url, headers=headers, json=payload, timeout=30)
-                response.raise_for_status()
-                data = response.json()
+                response = self.session.post(url, timeout=timeout, **request_kwargs)
                 
-                if data.get("ok"):
-                    return data
+                if response.status_code == 429:
+                    retry_after = float(response.headers.get("Retry-After", RETRY_DELAY))
+                    print(f"⏳ Slack rate limited {method} ({attempt+1}/{attempts}), "
+                          f"retrying after {retry_after:g}s")
+                    limiter.pause(retry_after)
+                    rate_limited = True
                 else:
+                    response.raise_for_status()
+                    data = response.json()
+                    
+                    if data.get("ok"):
+                        return data
+                    
                     error = data.get("error", "Unknown error")
-                    print(f"❌ Slack API error ({attempt+1}/{MAX_RETRIES}): {error}")
+                    print(f"❌ Slack API error on {method} ({attempt+1}/{attempts}): {error}")
                     
                     # Don't retry on certain errors
-                    if error in ["not_authed", "invalid_auth", "account_inactive"]:
-                        break
+                    if error in NO_RETRY_ERRORS:
+                        return {"ok": False, "error": error}
+                    if error == "ratelimited":
+                        limiter.pause(float(response.headers.get("Retry-After", RETRY_DELAY)))
+                        rate_limited = True
             
-            except requests.exceptions.RequestException as e:
-                print(f"❌ Request failed ({attempt+1}/{MAX_RETRIES}): {e}")
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"❌ Request to {method} failed ({attempt+1}/{attempts}): {e}")
             
-            # Wait before retry
-            if attempt < MAX_RETRIES - 1:
-                time.sleep(RETRY_DELAY * (attempt + 1))  # Exponential backoff
-        
-        return {"ok": False, "error": "Max retries exceeded"}
-    
-    def _send_slack_api_files(self,
-                             method: str,
-                             data: Dict[str, Any],
-                             files: Dict[str, Any],
-                             retry: bool = True) -> Dict[str, Any]:
-        """Send file upload request to Slack API with retry logic"""
-        url = f"https://slack.com/api/{method}"
-        headers = {
-            "Authorization": f"Bearer {self.token}"
-        }
-        
-        for attempt in range(MAX_RETRIES if retry else 1):
-            try:
-                response = requests.post(url, headers=headers, data=data, files=files, timeout=60)
-                response.raise_for_status()
-                data = response.json()
-                
-                if data.get("ok"):
-                    return data
-                else:
-                    error = data.get("error", "Unknown error")
-                    print(f"❌ Slack API file upload error ({attempt+1}/{MAX_RETRIES}): {error}")
-            
-            except requests.exceptions.RequestException as e:
-                print(f"❌ File upload request failed ({attempt+1}/{MAX_RETRIES}): {e}")
-            
-            # Wait before retry
-            if attempt < MAX_RETRIES - 1:
-                time.sleep(RETRY_DELAY * (attempt + 1))
+            # Wait before retry (rate-limited attempts wait in the bucket instead)
+            if attempt < attempts - 1 and not rate_limited:
+                time.sleep(self._backoff(attempt))
         
         return {"ok": False, "error": "Max retries exceeded"}
     
@@ -312,10 +695,33 @@ def main():
     parser.add_argument("--thread", "-t", help="Thread timestamp")
     parser.add_argument("--title", help="File title (for uploads)")
     parser.add_argument("--comment", help="Initial comment (for uploads)")
+    parser.add_argument("--attach", "-a", action="append", default=[],
+                       help="File to upload into the message thread (repeatable, for 'send')")
+    parser.add_argument("--snippet", action="store_true",
+                       help="Send a long message as one markdown snippet (for 'send')")
+    parser.add_argument("--queue", "-q", action="store_true",
+                       help="Queue in the durable outbox instead of sending now (for 'send'/'file')")
     parser.add_argument("--token", help="Slack bot token (overrides env var)")
+    parser.add_argument("--api-base", default=SLACK_API_BASE,
+                       help="Slack API base URL (e.g. a local stub server)")
     
     args = parser.parse_args()
     
+    if args.queue and args.action in ("send", "file"):
+        # Hand off to the outbox; a dispatcher delivers it (see slack_outbox.py)
+        import slack_outbox
+        if not args.target:
+            print(f"❌ Error: Target required for '{args.action}' action")
+            sys.exit(1)
+        if args.action == "send":
+            outbox_id = slack_outbox.enqueue_message(args.target, args.channel, args.thread)
+        else:
+            outbox_id = slack_outbox.enqueue_file(args.target, args.channel, args.thread, args.comment)
+        for path in args.attach if args.action == "send" else []:
+            slack_outbox.enqueue_file(path, args.channel, args.thread)
+        print(f"📮 Queued #{outbox_id} for {args.channel}")
+        return
+    
     # Use provided token or environment variable
     token = args.token or SLACK_BOT_TOKEN
     if not token:
@@ -323,7 +729,7 @@ def main():
         print("   Set SLACK_BOT_TOKEN environment variable or use --token")
         sys.exit(1)
     
-    messenger = RobustSlackMessenger(token, args.channel)
+    messenger = RobustSlackMessenger(token, args.channel, args.api_base)
     
     if args.action == "test":
         # Test connection
@@ -345,7 +751,12 @@ def main():
             print("❌ Error: Message text required for 'send' action")
             sys.exit(1)
         
-        response = messenger.send_message(args.target, args.channel, args.thread)
+        if args.attach:
+            response = messenger.send_message_with_files(args.target, args.attach,
+                                                         args.channel, args.thread)
+        else:
+            response = messenger.send_message(args.target, args.channel, args.thread,
+                                              as_snippet=args.snippet or None)
         if response.get("ok"):
             print(f"✅ Message sent successfully")
             print(f"   Timestamp: {response.get('ts')}")
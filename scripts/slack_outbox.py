@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+Durable Slack Outbox for OpenClaw
+Producers append to a local SQLite queue and return immediately; a
+dispatcher batches, coalesces and delivers in the background, retrying with
+backoff and dead-lettering what cannot be delivered.
+
+Usage:
+  python3 slack_outbox.py enqueue "message" --channel "#general"
+  python3 slack_outbox.py enqueue-file "/path/to/report.md" --channel "#general"
+  python3 slack_outbox.py dispatch          # deliver until the queue is idle
+  python3 slack_outbox.py dispatch --forever
+  python3 slack_outbox.py status
+  python3 slack_outbox.py dead              # list dead-lettered messages
+  python3 slack_outbox.py requeue [id ...]  # retry dead-lettered messages
+  python3 slack_outbox.py purge --days 7    # drop delivered messages
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import threading
+from typing import Optional, List, Dict
+
+# Configuration
+OUTBOX_PATH = os.environ.get("SLACK_OUTBOX_PATH", "/home/openclaw/.openclaw/memory/outbox.sqlite")
+SLACK_CHANNEL = os.environ.get("SLACK_CHANNEL", "#general")
+BATCH_SIZE = 50  # rows claimed per dispatch round
+MAX_ATTEMPTS = 8  # deliveries tried before a message is dead-lettered
+RETRY_BASE = 30  # seconds, base for exponential backoff between rounds
+MAX_RETRY_DELAY = 3600  # seconds, backoff cap
+LEASE_SECONDS = 300  # a claimed row is reclaimed if its dispatcher dies
+POLL_INTERVAL = 5.0  # seconds between idle polls of the queue
+BATCH_SEPARATOR = "\n\n"
+
+OUTBOX_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL DEFAULT 'message',   -- 'message' or 'file'
+    channel TEXT NOT NULL,
+    thread_ts TEXT,
+    body TEXT NOT NULL,                     -- message text or file path
+    comment TEXT,                           -- initial comment for files
+    coalesce_key TEXT,                      -- newer pending message replaces older
+    status TEXT NOT NULL DEFAULT 'pending', -- pending, sending, sent, dead
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,          -- due time, or lease expiry while sending
+    last_error TEXT,
+    ts TEXT,                                -- Slack ts (or file id); first chunk's ts while partial
+    chunks_sent INTEGER NOT NULL DEFAULT 0, -- chunks of an oversized message already posted
+    created_at REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS idx_outbox_coalesce ON outbox(coalesce_key) WHERE coalesce_key IS NOT NULL;
+'''
+
+
+class SlackOutbox:
+    """SQLite-backed queue of outbound Slack messages and files"""
+
+    def __init__(self, db_path: str = None):
+        """Open (and create if needed) the outbox database"""
+        self.db_path = db_path or OUTBOX_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        # Autocommit; WAL keeps producers from blocking behind the dispatcher
+        self.conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None,
+                                    check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(OUTBOX_SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(outbox)")}
+        if "chunks_sent" not in columns:  # outbox created before chunk progress was tracked
+            self.conn.execute("ALTER TABLE outbox ADD COLUMN chunks_sent INTEGER NOT NULL DEFAULT 0")
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+
+    def close(self):
+        self.conn.close()
+
+    def enqueue(self, text: str, channel: str = None, thread_ts: str = None,
+                coalesce_key: str = None, delay: float = 0.0) -> int:
+        """
+        Queue a message for delivery and return its outbox id
+
+        Args:
+            text: Message text (chunked at delivery if too long)
+            channel: Slack channel (defaults to configured channel)
+            thread_ts: Thread timestamp to reply in thread
+            coalesce_key: Pending messages with the same key are replaced,
+                so only the latest status/progress update is delivered
+            delay: Seconds to hold the message before it becomes due
+        """
+        return self._insert("message", text, channel, thread_ts, None, coalesce_key, delay)
+
+    def enqueue_file(self, file_path: str, channel: str = None, thread_ts: str = None,
+                     comment: str = None, delay: float = 0.0) -> int:
+        """Queue a file upload for delivery and return its outbox id"""
+        return self._insert("file", os.path.abspath(file_path), channel, thread_ts,
+                            comment, None, delay)
+
+    def _insert(self, kind, body, channel, thread_ts, comment, coalesce_key, delay) -> int:
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if coalesce_key is not None:
+                    self.conn.execute(
+                        "DELETE FROM outbox WHERE coalesce_key = ? AND status = 'pending'",
+                        (coalesce_key,))
+                cursor = self.conn.execute('''
+                    INSERT INTO outbox (kind, channel, thread_ts, body, comment, coalesce_key,
+                                        next_attempt_at, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (kind, channel or SLACK_CHANNEL, thread_ts, body, comment, coalesce_key,
+                      now + delay, now))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        self.wakeup.set()
+        return cursor.lastrowid
+
+    def claim(self, limit: int = BATCH_SIZE) -> List[sqlite3.Row]:
+        """Lease up to `limit` due rows (including rows whose lease expired)"""
+        now = time.time()
+        with self.lock:
+            self.conn.row_factory = sqlite3.Row
+            try:
+                rows = self.conn.execute('''
+                    UPDATE outbox SET status = 'sending', next_attempt_at = ?
+                    WHERE id IN (
+                        SELECT id FROM outbox
+                        WHERE status IN ('pending', 'sending') AND next_attempt_at <= ?
+                        ORDER BY id LIMIT ?
+                    )
+                    RETURNING *
+                ''', (now + LEASE_SECONDS, now, limit)).fetchall()
+            finally:
+                self.conn.row_factory = None
+        return sorted(rows, key=lambda row: row["id"])
+
+    def mark_sent(self, ids: List[int], ts: str = None):
+        """Record successful delivery"""
+        with self.lock:
+            self.conn.executemany('''
+                UPDATE outbox SET status = 'sent', sent_at = ?, ts = ?, last_error = NULL
+                WHERE id = ?
+            ''', [(time.time(), ts, i) for i in ids])
+
+    def mark_progress(self, outbox_id: int, chunks_sent: int, ts: str):
+        """Record chunks posted so far (and the first chunk's ts), renewing the lease"""
+        with self.lock:
+            self.conn.execute('''
+                UPDATE outbox SET chunks_sent = ?, ts = ?, next_attempt_at = ? WHERE id = ?
+            ''', (chunks_sent, ts, time.time() + LEASE_SECONDS, outbox_id))
+
+    def mark_failed(self, ids: List[int], error: str, permanent: bool = False):
+        """Schedule a retry with backoff, or dead-letter after MAX_ATTEMPTS"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for i in ids:
+                    row = self.conn.execute("SELECT attempts FROM outbox WHERE id = ?", (i,)).fetchone()
+                    if row is None:
+                        continue
+                    attempts = row[0] + 1
+                    if permanent or attempts >= MAX_ATTEMPTS:
+                        self.conn.execute('''
+                            UPDATE outbox SET status = 'dead', attempts = ?, last_error = ? WHERE id = ?
+                        ''', (attempts, error, i))
+                    else:
+                        delay = random.uniform(0.5, 1.0) * min(MAX_RETRY_DELAY, RETRY_BASE * 2 ** (attempts - 1))
+                        self.conn.execute('''
+                            UPDATE outbox SET status = 'pending', attempts = ?, last_error = ?,
+                                              next_attempt_at = ?
+                            WHERE id = ?
+                        ''', (attempts, error, now + delay, i))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def next_due(self) -> Optional[float]:
+        """Seconds until the next pending row is due (None if the queue is empty)"""
+        with self.lock:
+            row = self.conn.execute('''
+                SELECT MIN(next_attempt_at) FROM outbox WHERE status IN ('pending', 'sending')
+            ''').fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def counts(self) -> Dict[str, int]:
+        """Row count per status"""
+        with self.lock:
+            return dict(self.conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status"))
+
+    def dead_letters(self, limit: int = 50) -> List[tuple]:
+        """[(id, kind, channel, attempts, last_error, body)] for dead-lettered rows"""
+        with self.lock:
+            return self.conn.execute('''
+                SELECT id, kind, channel, attempts, last_error, body FROM outbox
+                WHERE status = 'dead' ORDER BY id DESC LIMIT ?
+            ''', (limit,)).fetchall()
+
+    def requeue(self, ids: List[int] = None) -> int:
+        """Move dead-lettered rows (all, or the given ids) back to pending"""
+        sql = '''
+            UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = ?
+            WHERE status = 'dead'
+        '''
+        params = [time.time()]
+        if ids:
+            sql += " AND id IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps(ids))
+        with self.lock:
+            count = self.conn.execute(sql, params).rowcount
+        self.wakeup.set()
+        return count
+
+    def purge(self, days: float = 7) -> int:
+        """Delete delivered rows older than `days`"""
+        with self.lock:
+            return self.conn.execute(
+                "DELETE FROM outbox WHERE status = 'sent' AND sent_at < ?",
+                (time.time() - days * 86400,)).rowcount
+
+
+class OutboxDispatcher:
+    """Delivers queued rows through RobustSlackMessenger
+
+    Consecutive messages for the same channel and thread are joined into one
+    chat.postMessage while they fit in a single Slack message, and queued
+    files for the same destination share one concurrent upload.
+    """
+
+    def __init__(self, outbox: SlackOutbox, messenger=None):
+        # Imported here so producers that only enqueue never load requests
+        import robust_slack_messenger
+
+        self.outbox = outbox
+        self.slack = robust_slack_messenger
+        self.messenger = messenger or robust_slack_messenger.RobustSlackMessenger()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _batches(self, rows) -> List[List[sqlite3.Row]]:
+        """Group claimed rows into deliveries, preserving queue order"""
+        batches = []
+        open_batches = {}
+        for row in rows:
+            if row["kind"] == "file":
+                key = ("file", row["channel"], row["thread_ts"], row["comment"])
+            else:
+                key = ("message", row["channel"], row["thread_ts"])
+            batch = open_batches.get(key)
+            if batch is not None and row["kind"] == "message":
+                # Slack counts UTF-16 code units, like the splitter
+                size = (sum(self.slack.slack_length(r["body"]) + len(BATCH_SEPARATOR) for r in batch)
+                        + self.slack.slack_length(row["body"]))
+                if size > self.slack.MAX_MESSAGE_LENGTH:
+                    batch = None
+            if batch is None:
+                batch = open_batches[key] = []
+                batches.append(batch)
+            batch.append(row)
+        return batches
+
+    def _deliver_messages(self, batch):
+        ids = [row["id"] for row in batch]
+        first = batch[0]
+        text = BATCH_SEPARATOR.join(row["body"] for row in batch)
+
+        if self.slack.slack_length(text) <= self.slack.MAX_MESSAGE_LENGTH:
+            payload = {"channel": first["channel"], "text": text, "as_user": True}
+            if first["thread_ts"]:
+                payload["thread_ts"] = first["thread_ts"]
+            response = self.messenger._send_slack_api("chat.postMessage", payload, retry=False)
+        else:
+            # A single oversized message (batches stop growing at the limit)
+            response = self._deliver_chunks(first)
+
+        if response.get("ok"):
+            self.outbox.mark_sent(ids, response.get("ts"))
+        else:
+            error = response.get("error", "send failed")
+            self.outbox.mark_failed(ids, error, permanent=error in self.slack.NO_RETRY_ERRORS)
+
+    def _deliver_chunks(self, row):
+        """Post an oversized message as a thread of "(i/n)" chunks
+        
+        Progress is saved after every chunk, so a retry resumes at the first
+        chunk not yet posted instead of reposting or dropping the others.
+        """
+        chunks = self.messenger._split_message(row["body"])
+        first_ts = row["ts"]
+        for i in range(row["chunks_sent"], len(chunks)):
+            payload = {"channel": row["channel"], "text": f"({i+1}/{len(chunks)})\n{chunks[i]}",
+                       "as_user": True}
+            thread_ts = row["thread_ts"] if i == 0 else row["thread_ts"] or first_ts
+            if thread_ts:
+                payload["thread_ts"] = thread_ts
+            response = self.messenger._send_slack_api("chat.postMessage", payload, retry=False)
+            if not response.get("ok"):
+                return response
+            if i == 0:
+                first_ts = response.get("ts")
+            self.outbox.mark_progress(row["id"], i + 1, first_ts)
+        return {"ok": True, "ts": first_ts}
+
+    def _deliver_files(self, batch):
+        first = batch[0]
+        missing = [row for row in batch if not os.path.exists(row["body"])]
+        if missing:
+            self.outbox.mark_failed([row["id"] for row in missing], "file not found", permanent=True)
+        batch = [row for row in batch if os.path.exists(row["body"])]
+        if not batch:
+            return
+
+        paths = list(dict.fromkeys(row["body"] for row in batch))
+        response = self.messenger.upload_files_concurrently(paths, first["channel"],
+                                                            first["thread_ts"], first["comment"])
+        errors = dict(response.get("failed", []))
+        if not response.get("ok"):
+            errors = {path: errors.get(path, response.get("error", "upload failed")) for path in paths}
+
+        for row in batch:
+            if row["body"] in errors:
+                error = errors[row["body"]] or "upload failed"
+                self.outbox.mark_failed([row["id"]], error,
+                                        permanent=error in self.slack.NO_RETRY_ERRORS)
+            else:
+                self.outbox.mark_sent([row["id"]], (response.get("file") or {}).get("id"))
+
+    def run_once(self) -> int:
+        """Claim and deliver one round of due rows; returns rows attempted"""
+        rows = self.outbox.claim()
+        for batch in self._batches(rows):
+            try:
+                if batch[0]["kind"] == "file":
+                    self._deliver_files(batch)
+                else:
+                    self._deliver_messages(batch)
+            except Exception as e:
+                self.outbox.mark_failed([row["id"] for row in batch], str(e))
+        return len(rows)
+
+    def drain(self, timeout: float = None) -> Dict[str, int]:
+        """Deliver until nothing is due now (retries left for later rounds)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.run_once():
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        return self.outbox.counts()
+
+    def run_forever(self, poll_interval: float = POLL_INTERVAL):
+        """Deliver until stop() is called, sleeping until work is due or enqueued"""
+        while not self._stop.is_set():
+            self.outbox.wakeup.clear()
+            if self.run_once():
+                continue
+            due = self.outbox.next_due()
+            self.outbox.wakeup.wait(poll_interval if due is None else min(due, poll_interval))
+
+    def start(self) -> threading.Thread:
+        """Run the dispatcher on a background daemon thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="slack-outbox", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the background thread after its current round"""
+        self._stop.set()
+        self.outbox.wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+# Convenience functions
+_outbox = None
+
+def get_outbox() -> SlackOutbox:
+    """Process-wide outbox at OUTBOX_PATH"""
+    global _outbox
+    if _outbox is None:
+        _outbox = SlackOutbox()
+    return _outbox
+
+def enqueue_message(text: str, channel: str = None, thread_ts: str = None,
+                    coalesce_key: str = None) -> int:
+    """Queue a message without touching the network"""
+    return get_outbox().enqueue(text, channel, thread_ts, coalesce_key)
+
+def enqueue_file(file_path: str, channel: str = None, thread_ts: str = None,
+                 comment: str = None) -> int:
+    """Queue a file upload without touching the network"""
+    return get_outbox().enqueue_file(file_path, channel, thread_ts, comment)
+
+def main():
+    """Command-line interface"""
+    parser = argparse.ArgumentParser(description="Durable Slack Outbox")
+    parser.add_argument("action", choices=["enqueue", "enqueue-file", "dispatch", "status",
+                                           "dead", "requeue", "purge"],
+                       help="Action to perform")
+    parser.add_argument("target", nargs="*", help="Message text, file path, or ids to requeue")
+    parser.add_argument("--channel", "-c", default=SLACK_CHANNEL,
+                       help=f"Slack channel (default: {SLACK_CHANNEL})")
+    parser.add_argument("--thread", "-t", help="Thread timestamp")
+    parser.add_argument("--comment", help="Initial comment (for files)")
+    parser.add_argument("--coalesce", help="Replace pending messages with this key")
+    parser.add_argument("--db", default=OUTBOX_PATH, help=f"Outbox database (default: {OUTBOX_PATH})")
+    parser.add_argument("--forever", action="store_true", help="Keep dispatching (for 'dispatch')")
+    parser.add_argument("--timeout", type=float, help="Stop draining after this many seconds")
+    parser.add_argument("--days", type=float, default=7, help="Age of sent rows to purge")
+    parser.add_argument("--token", help="Slack bot token (overrides env var)")
+    parser.add_argument("--api-base", help="Slack API base URL (e.g. a local stub server)")
+
+    args = parser.parse_args()
+    outbox = SlackOutbox(args.db)
+
+    try:
+        if args.action in ("enqueue", "enqueue-file"):
+            if len(args.target) != 1:
+                print(f"❌ Error: exactly one message or file path required for '{args.action}'")
+                sys.exit(1)
+            if args.action == "enqueue":
+                outbox_id = outbox.enqueue(args.target[0], args.channel, args.thread, args.coalesce)
+            else:
+                outbox_id = outbox.enqueue_file(args.target[0], args.channel, args.thread, args.comment)
+            print(f"📮 Queued #{outbox_id} for {args.channel}")
+
+        elif args.action == "dispatch":
+            import robust_slack_messenger
+            token = args.token or robust_slack_messenger.SLACK_BOT_TOKEN
+            if not token:
+                print("❌ Error: Slack bot token required.")
+                print("   Set SLACK_BOT_TOKEN environment variable or use --token")
+                sys.exit(1)
+            messenger = robust_slack_messenger.RobustSlackMessenger(token, args.channel, args.api_base)
+            dispatcher = OutboxDispatcher(outbox, messenger)
+            try:
+                if args.forever:
+                    print(f"📬 Dispatching from {outbox.db_path} (Ctrl-C to stop)")
+                    dispatcher.run_forever()
+                else:
+                    counts = dispatcher.drain(args.timeout)
+                    print(f"📬 Outbox drained: {counts}")
+            except KeyboardInterrupt:
+                pass
+            finally:
+                messenger.close()
+
+        elif args.action == "status":
+            counts = outbox.counts()
+            print(f"📊 Outbox {outbox.db_path}")
+            for status in ("pending", "sending", "sent", "dead"):
+                print(f"   {status}: {counts.get(status, 0)}")
+            due = outbox.next_due()
+            if due is not None:
+                print(f"   next due in: {due:.1f}s")
+
+        elif args.action == "dead":
+            rows = outbox.dead_letters()
+            if not rows:
+                print("✅ No dead-lettered messages")
+            for outbox_id, kind, channel, attempts, error, body in rows:
+                preview = body[:60].replace("\n", " ")
+                print(f"  #{outbox_id} {kind} → {channel} ({attempts} attempts, {error}): {preview}")
+
+        elif args.action == "requeue":
+            ids = [int(i) for i in args.target]
+            print(f"🔁 Requeued {outbox.requeue(ids)} message(s)")
+
+        elif args.action == "purge":
+            print(f"🧹 Purged {outbox.purge(args.days)} delivered message(s)")
+
+    finally:
+        outbox.close()
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,19 @@ SQLite Memory Integrator Tool
 Replaces memory_integrator.sh - integrates insights into SQLite database
 """
 
-import sqlite3
 import datetime
 import sys
 import os
 
+import memory_metrics
+from memory_graph import ensure_graph, index_memory
+
 DB_PATH = "/home/openclaw/.openclaw/memory/main.sqlite"
 
 def integrate_insight(insight_text, source="integration", category="insight", importance=4):
     """Integrate an insight into SQLite memory"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = memory_metrics.connect(DB_PATH)
+    ensure_graph(conn)
     cursor = conn.cursor()
     
     now = datetime.datetime.now().isoformat()
@@ -33,7 +36,8 @@ def integrate_insight(insight_text, source="integration", category="insight", im
         now,
         now
     ))
-    
+    index_memory(conn, cursor.lastrowid, insight_text)
+
     # Also add as chunk for searchability
     import hashlib
     chunk_hash = hashlib.sha256(insight_text.encode()).hexdigest()
@@ -59,8 +63,11 @@ def integrate_insight(insight_text, source="integration", category="insight", im
     print(f"✅ Insight integrated with ID: {memory_id}")
     return memory_id
 
-def integrate_from_file(file_path):
-    """Integrate insights from a thinking file"""
+def integrate_from_file(file_path, notify=None):
+    """Integrate insights from a thinking file
+    
+    notify: Slack channel to queue a summary for (via the outbox)
+    """
     if not os.path.exists(file_path):
         print(f"❌ File not found: {file_path}")
         return 0
@@ -90,6 +97,15 @@ def integrate_from_file(file_path):
             integrated += 1
     
     print(f"✅ Integrated {integrated} insights from {file_path}")
+    if notify and integrated:
+        try:
+            import slack_outbox
+            summary = "\n".join(f"• {insight}" for insight in insights if len(insight) > 10)
+            slack_outbox.enqueue_message(
+                f"🧠 *Thinking* - {integrated} insights from {os.path.basename(file_path)}\n{summary}",
+                notify)
+        except Exception as e:
+            print(f"⚠️ Could not queue summary for {notify}: {e}")
     return integrated
 
 def main():
@@ -98,7 +114,7 @@ def main():
         print("Usage: python3 sqlite_memory_integrator.py [command]")
         print("\nCommands:")
         print("  insight \"text\" [category] - Integrate single insight")
-        print("  file <path> - Integrate insights from file")
+        print("  file <path> [channel] - Integrate insights from file, queue a summary for channel")
         print("  test - Test integration")
         return
     
@@ -115,11 +131,12 @@ def main():
     
     elif command == "file":
         if len(sys.argv) < 3:
-            print("Usage: file <path>")
+            print("Usage: file <path> [channel]")
             return
         
         file_path = sys.argv[2]
-        integrate_from_file(file_path)
+        channel = sys.argv[3] if len(sys.argv) > 3 else None
+        integrate_from_file(file_path, channel)
     
     elif command == "test":
         # Test integration
@@ -4,24 +4,218 @@ Task Management Helper Script
 Provides command-line interface to SQLite task system
 """
 
-import sqlite3
+import csv
 import json
 import datetime
+import heapq
+import re
 import sys
-from pathlib import Path
+
+import memory_metrics
+from memory_records import Task, record_factory
+from memory_time import ensure_time_columns, range_sql, resolve_range
 
 DB_PATH = "/home/openclaw/.openclaw/memory/main.sqlite"
 
+TASK_SCHEMA = [
+    'CREATE INDEX IF NOT EXISTS idx_todos_status_priority_due ON todos(status, priority, due_date)',
+    '''
+    CREATE TABLE IF NOT EXISTS task_dependencies (
+        task_id INTEGER NOT NULL,        -- the task that waits
+        depends_on_id INTEGER NOT NULL,  -- the task it waits for
+        created_at TEXT,
+        PRIMARY KEY (task_id, depends_on_id)
+    ) WITHOUT ROWID
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_task_dependencies_on ON task_dependencies(depends_on_id)',
+]
+
+OPEN_STATUSES = ('pending', 'in_progress', 'blocked')
+
+
+class TaskGraph:
+    """In-memory dependency graph over open todos
+    
+    The graph is loaded once and then kept current: a change of PRAGMA
+    data_version (another connection committed) triggers a reload. Commits
+    on our own connection don't change data_version, so every TaskManager
+    write patches the graph in place or calls reload(). Derived results (topological order, critical path)
+    are memoized until the graph changes.
+    """
+    
+    def __init__(self, conn):
+        self.conn = conn
+        self.data_version = None
+        self.tasks = {}      # id -> (status, priority, due_date, weight)
+        self.deps = {}       # id -> set of ids it depends on
+        self.dependents = {} # id -> set of ids waiting on it
+        self._order = None
+        self._critical = None
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(todos)')}
+        self.weight_column = 'estimated_hours' if 'estimated_hours' in columns else None
+    
+    def refresh(self):
+        """Reload if another connection changed the database"""
+        version = self.conn.execute('PRAGMA data_version').fetchone()[0]
+        if version == self.data_version:
+            return
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        self.tasks = {
+            row[0]: row[1:]
+            for row in cursor.execute(
+                f'SELECT id, status, priority, due_date, {self._weight_sql()} FROM todos')
+        }
+        self.deps = {}
+        self.dependents = {}
+        for task_id, depends_on_id in cursor.execute(
+                'SELECT task_id, depends_on_id FROM task_dependencies'):
+            self.deps.setdefault(task_id, set()).add(depends_on_id)
+            self.dependents.setdefault(depends_on_id, set()).add(task_id)
+        self.data_version = version
+        self._invalidate()
+    
+    def _weight_sql(self):
+        return f'COALESCE({self.weight_column}, 1)' if self.weight_column else '1'
+    
+    def weight(self, task_id):
+        """A task's weight as the loader reads it (estimated_hours, else 1)"""
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        row = cursor.execute(f'SELECT {self._weight_sql()} FROM todos WHERE id = ?',
+                             (task_id,)).fetchone()
+        return row[0] if row else 1
+    
+    def reload(self):
+        """Reload from the database on next refresh (after a local bulk write)"""
+        self.data_version = None
+    
+    def _invalidate(self):
+        self._order = None
+        self._critical = None
+    
+    def _is_open(self, task_id):
+        task = self.tasks.get(task_id)
+        return task is not None and task[0] != 'completed'
+    
+    def add_edge(self, task_id, depends_on_id):
+        self.deps.setdefault(task_id, set()).add(depends_on_id)
+        self.dependents.setdefault(depends_on_id, set()).add(task_id)
+        self._invalidate()
+    
+    def remove_edge(self, task_id, depends_on_id):
+        self.deps.get(task_id, set()).discard(depends_on_id)
+        self.dependents.get(depends_on_id, set()).discard(task_id)
+        self._invalidate()
+    
+    def add_task(self, task_id, status, priority, due_date, weight=1):
+        self.tasks[task_id] = (status, priority, due_date, weight)
+        self._invalidate()
+    
+    def update_task(self, task_id, status=None, priority=None):
+        if task_id in self.tasks:
+            old_status, old_priority, *rest = self.tasks[task_id]
+            self.tasks[task_id] = (old_status if status is None else status,
+                                   old_priority if priority is None else priority, *rest)
+            self._invalidate()
+    
+    def reaches(self, start, target):
+        """True if target is reachable from start by following dependencies"""
+        stack, seen = [start], set()
+        while stack:
+            node = stack.pop()
+            if node == target:
+                return True
+            if node not in seen:
+                seen.add(node)
+                stack.extend(self.deps.get(node, ()))
+        return False
+    
+    def open_dependencies(self, task_id):
+        return sorted(d for d in self.deps.get(task_id, ()) if self._is_open(d))
+    
+    def ready(self):
+        """Open, unblocked tasks whose dependencies are all completed"""
+        ready = [
+            task_id for task_id, task in self.tasks.items()
+            if task[0] in ('pending', 'in_progress') and not self.open_dependencies(task_id)
+        ]
+        return sorted(ready, key=lambda t: (-(self.tasks[t][1] or 0), self.tasks[t][2] or '9999'))
+    
+    def topological_order(self):
+        """Open tasks ordered so every task follows its dependencies (Kahn)"""
+        if self._order is not None:
+            return self._order
+        open_ids = [t for t in self.tasks if self._is_open(t)]
+        indegree = {t: sum(1 for d in self.deps.get(t, ()) if self._is_open(d)) for t in open_ids}
+        key = lambda t: (-(self.tasks[t][1] or 0), self.tasks[t][2] or '9999', t)
+        frontier = [key(t) for t, n in indegree.items() if n == 0]
+        heapq.heapify(frontier)
+        order = []
+        while frontier:
+            task_id = heapq.heappop(frontier)[2]
+            order.append(task_id)
+            for dependent in self.dependents.get(task_id, ()):
+                if dependent in indegree:
+                    indegree[dependent] -= 1
+                    if indegree[dependent] == 0:
+                        heapq.heappush(frontier, key(dependent))
+        if len(order) != len(open_ids):
+            cyclic = sorted(set(open_ids) - set(order))
+            raise ValueError(f"Dependency cycle among tasks: {cyclic}")
+        self._order = order
+        return order
+    
+    def critical_path(self):
+        """Longest chain of open tasks by weight (estimated_hours, else 1 each)"""
+        if self._critical is not None:
+            return self._critical
+        best = {}  # id -> (total weight, predecessor)
+        for task_id in self.topological_order():
+            weight = self.tasks[task_id][3] or 0
+            prev = max(((best[d][0], d) for d in self.deps.get(task_id, ()) if d in best),
+                       default=(0, None))
+            best[task_id] = (prev[0] + weight, prev[1])
+        if not best:
+            self._critical = (0, [])
+            return self._critical
+        end = max(best, key=lambda t: best[t][0])
+        path = []
+        node = end
+        while node is not None:
+            path.append(node)
+            node = best[node][1]
+        self._critical = (best[end][0], list(reversed(path)))
+        return self._critical
+
+
 class TaskManager:
     def __init__(self):
-        self.conn = sqlite3.connect(DB_PATH)
-        self.conn.row_factory = sqlite3.Row
+        self.conn = memory_metrics.connect(DB_PATH)
+        self.conn.row_factory = record_factory(Task)
         self.cursor = self.conn.cursor()
+        for statement in TASK_SCHEMA:
+            self.cursor.execute(statement)
+        self.conn.commit()
+        ensure_time_columns(self.conn, ['todos'])
+        self._graph = None
     
-    def list_tasks(self, status=None, priority=None, category=None):
-        """List tasks with optional filters"""
-        query = "SELECT * FROM todos WHERE 1=1"
-        params = []
+    @property
+    def graph(self):
+        """Dependency graph, refreshed only when the database changed"""
+        if self._graph is None:
+            self._graph = TaskGraph(self.conn)
+        self._graph.refresh()
+        return self._graph
+    
+    def list_tasks(self, status=None, priority=None, category=None, as_tuples=False,
+                   since=None, until=None, last_days=None):
+        """List tasks with optional filters (plain tuples with as_tuples=True)
+        
+        since/until/last_days keep tasks created in that window (time_ms).
+        """
+        time_clause, params = range_sql(*resolve_range(since, until, last_days))
+        query = f"SELECT * FROM todos WHERE 1=1{time_clause}"
         
         if status:
             query += " AND status = ?"
@@ -37,8 +231,11 @@ class TaskManager:
         
         query += " ORDER BY priority DESC, due_date ASC, created_at ASC"
         
-        self.cursor.execute(query, params)
-        return self.cursor.fetchall()
+        cursor = self.conn.cursor()
+        if as_tuples:
+            cursor.row_factory = None
+        cursor.execute(query, params)
+        return cursor.fetchall()
     
     def add_task(self, title, description, category="general", priority=3, 
                  due_date=None, project_path=None, project_file=None,
@@ -59,37 +256,240 @@ class TaskManager:
         
         self.conn.commit()
         task_id = self.cursor.lastrowid
+        if self._graph is not None:
+            self._graph.add_task(task_id, 'pending', priority, due_date,
+                                 self._graph.weight(task_id))
         print(f"✅ Task added with ID: {task_id}")
         return task_id
     
     def update_status(self, task_id, status, progress_percent=None, notes=None):
         """Update task status and progress"""
+        self.bulk_update(task_ids=[task_id], status=status,
+                         progress_percent=progress_percent, notes=notes)
+        print(f"✅ Task {task_id} updated to status: {status}")
+    
+    def bulk_update(self, task_ids=None, filter_expr=None, status=None, priority=None,
+                    progress_percent=None, notes=None):
+        """Update every task matching task_ids and/or filter_expr in one statement
+        
+        Returns the number of tasks changed. Progress follows the same rules
+        as update_status: completed -> 100, in_progress -> 50, otherwise 0,
+        unless progress_percent is given.
+        """
+        if task_ids is None and not filter_expr:
+            raise ValueError("bulk_update needs task_ids or a filter expression")
+        
         now = datetime.datetime.now().isoformat()
+        assignments = ["last_updated = ?"]
+        params = [now]
         
-        if status == 'completed':
-            self.cursor.execute('''
-                UPDATE todos 
-                SET status = ?, progress_percent = 100, completed_at = ?, last_updated = ?
-                WHERE id = ?
-            ''', (status, now, now, task_id))
-        else:
-            if progress_percent is None:
+        if status is not None:
+            if status == 'completed':
+                progress_percent = 100
+                assignments.append("completed_at = ?")
+                params.append(now)
+            elif progress_percent is None:
                 # Auto-set progress based on status
                 progress_percent = 50 if status == 'in_progress' else 0
-            
-            self.cursor.execute('''
-                UPDATE todos 
-                SET status = ?, progress_percent = ?, last_updated = ?
-                WHERE id = ?
-            ''', (status, progress_percent, now, task_id))
-        
+            assignments.append("status = ?")
+            params.append(status)
+        if progress_percent is not None:
+            assignments.append("progress_percent = ?")
+            params.append(progress_percent)
+        if priority is not None:
+            assignments.append("priority = ?")
+            params.append(priority)
         if notes:
-            self.cursor.execute('''
-                UPDATE todos SET notes = ? WHERE id = ?
-            ''', (notes, task_id))
+            assignments.append("notes = ?")
+            params.append(notes)
         
+        where_sql, where_params = self._where(task_ids, filter_expr)
+        self.cursor.execute(f'''
+            UPDATE todos SET {", ".join(assignments)}
+            WHERE {where_sql}
+        ''', params + where_params)
+        changed = self.cursor.rowcount
         self.conn.commit()
-        print(f"✅ Task {task_id} updated to status: {status}")
+        
+        if self._graph is not None and (status is not None or priority is not None):
+            if filter_expr:
+                self._graph.reload()
+            else:
+                for task_id in task_ids:
+                    self._graph.update_task(int(task_id), status, priority)
+        return changed
+    
+    def _where(self, task_ids=None, filter_expr=None):
+        """WHERE clause for an ID list and/or filter expression"""
+        clauses = []
+        params = []
+        if task_ids is not None:
+            # One bound JSON array instead of one variable per ID
+            clauses.append("id IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps([int(t) for t in task_ids]))
+        if filter_expr:
+            filter_sql, filter_params = parse_filter(filter_expr)
+            clauses.append(filter_sql)
+            params.extend(filter_params)
+        return " AND ".join(clauses) or "1=1", params
+    
+    def export_tasks(self, path, filter_expr=None):
+        """Write matching todos to a .csv or .json file; returns the row count"""
+        where_sql, params = self._where(filter_expr=filter_expr)
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(f'SELECT * FROM todos WHERE {where_sql} ORDER BY id', params)
+        columns = [desc[0] for desc in cursor.description]
+        
+        count = 0
+        with open(path, 'w', newline='') as f:
+            if path.endswith('.json'):
+                f.write('[\n')
+                for row in cursor:
+                    f.write((',\n' if count else '') + json.dumps(dict(zip(columns, row))))
+                    count += 1
+                f.write('\n]\n')
+            else:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                for row in cursor:
+                    writer.writerow(row)
+                    count += 1
+        return count
+    
+    def import_tasks(self, path):
+        """Insert (or update by id) todos from a .csv or .json file in one transaction"""
+        with open(path, newline='') as f:
+            if path.endswith('.json'):
+                records = json.load(f)
+            else:
+                records = list(csv.DictReader(f))
+        if not records:
+            return 0
+        
+        known = {row[1] for row in self.conn.execute('PRAGMA table_info(todos)')}
+        columns = [c for c in records[0] if c in known]
+        if 'title' not in columns:
+            raise ValueError("Import file needs at least a 'title' column")
+        
+        now = datetime.datetime.now().isoformat()
+        rows = []
+        for record in records:
+            values = {c: (record.get(c) if record.get(c) != '' else None) for c in columns}
+            if values.get('status') is None:
+                values['status'] = 'pending'  # also for a blank cell
+            rows.append(values)
+        for extra, default in (('status', 'pending'), ('created_at', now), ('last_updated', now)):
+            if extra not in columns:
+                columns.append(extra)
+                for values in rows:
+                    values.setdefault(extra, default)
+        
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c not in ('id', 'created_at'))
+        self.cursor.executemany(f'''
+            INSERT INTO todos ({", ".join(columns)})
+            VALUES ({", ".join(":" + c for c in columns)})
+            ON CONFLICT(id) DO UPDATE SET {updates}
+        ''', rows)
+        self.conn.commit()
+        if self._graph is not None:
+            self._graph.reload()
+        return len(rows)
+    
+    def add_dependency(self, task_id, depends_on_id):
+        """Record that task_id cannot start until depends_on_id is completed"""
+        graph = self.graph
+        for tid in (task_id, depends_on_id):
+            if tid not in graph.tasks:
+                raise ValueError(f"Task {tid} not found")
+        if task_id == depends_on_id or graph.reaches(depends_on_id, task_id):
+            raise ValueError(f"Task {task_id} -> {depends_on_id} would create a dependency cycle")
+        
+        self.cursor.execute('''
+            INSERT OR IGNORE INTO task_dependencies (task_id, depends_on_id, created_at)
+            VALUES (?, ?, ?)
+        ''', (task_id, depends_on_id, datetime.datetime.now().isoformat()))
+        self.conn.commit()
+        graph.add_edge(task_id, depends_on_id)
+        print(f"✅ Task {task_id} now depends on task {depends_on_id}")
+    
+    def remove_dependency(self, task_id, depends_on_id):
+        """Drop a dependency edge"""
+        self.cursor.execute('''
+            DELETE FROM task_dependencies WHERE task_id = ? AND depends_on_id = ?
+        ''', (task_id, depends_on_id))
+        self.conn.commit()
+        if self._graph is not None:
+            self._graph.remove_edge(task_id, depends_on_id)
+        print(f"✅ Task {task_id} no longer depends on task {depends_on_id}")
+    
+    def migrate_dependencies(self):
+        """One-time import of task IDs mentioned in blocked_by / dependencies text"""
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(todos)')}
+        sources = [c for c in ('blocked_by', 'dependencies') if c in columns]
+        if not sources:
+            return 0
+        
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        known = {row[0] for row in cursor.execute('SELECT id FROM todos')}
+        edges = []
+        for row in cursor.execute(f'SELECT id, {", ".join(sources)} FROM todos').fetchall():
+            task_id = row[0]
+            for text in row[1:]:
+                text = str(text or '')
+                if re.fullmatch(r'[\[\]\d,#\s]+', text):
+                    # Plain ID list or JSON array: "12, 14" / "[12, 14]"
+                    refs = re.findall(r'\d+', text)
+                else:
+                    # Free text: only explicit references like "#12" or "task 12"
+                    refs = re.findall(r'(?:#|\btask\s*#?)(\d+)\b', text, re.IGNORECASE)
+                for ref in refs:
+                    depends_on_id = int(ref)
+                    if depends_on_id in known and depends_on_id != task_id:
+                        edges.append((task_id, depends_on_id))
+        
+        now = datetime.datetime.now().isoformat()
+        self.cursor.executemany('''
+            INSERT OR IGNORE INTO task_dependencies (task_id, depends_on_id, created_at)
+            VALUES (?, ?, ?)
+        ''', [(t, d, now) for t, d in edges])
+        self.conn.commit()
+        if self._graph is not None:
+            self._graph.reload()
+        return len(edges)
+    
+    def ready_tasks(self):
+        """Open tasks with every dependency completed, highest priority first"""
+        self.cursor.execute('''
+            SELECT t.* FROM todos t
+            WHERE t.status IN ('pending', 'in_progress')
+            AND NOT EXISTS (
+                SELECT 1 FROM task_dependencies d
+                JOIN todos p ON p.id = d.depends_on_id
+                WHERE d.task_id = t.id AND p.status != 'completed'
+            )
+            ORDER BY t.priority DESC, t.due_date ASC, t.created_at ASC
+        ''')
+        return self.cursor.fetchall()
+    
+    def _fetch_tasks(self, task_ids):
+        """Fetch tasks by id, preserving the given order"""
+        if not task_ids:
+            return []
+        placeholders = ", ".join("?" for _ in task_ids)
+        self.cursor.execute(f'SELECT * FROM todos WHERE id IN ({placeholders})', task_ids)
+        by_id = {task['id']: task for task in self.cursor.fetchall()}
+        return [by_id[t] for t in task_ids if t in by_id]
+    
+    def task_order(self):
+        """Open tasks in dependency-respecting order"""
+        return self._fetch_tasks(self.graph.topological_order())
+    
+    def critical_path(self):
+        """(total weight, tasks) of the longest open dependency chain"""
+        total, path = self.graph.critical_path()
+        return total, self._fetch_tasks(path)
     
     def show_task(self, task_id):
         """Show detailed information about a task"""
@@ -122,6 +522,10 @@ class TaskManager:
         if task['blocked_by']:
             print(f"\n🚫 Blocked by: {task['blocked_by']}")
         
+        waiting_on = self.graph.open_dependencies(task_id)
+        if waiting_on:
+            print(f"\n🔗 Waiting on tasks: {', '.join(f'#{d}' for d in waiting_on)}")
+        
         print(f"\n⏰ Created: {task['created_at']}")
         print(f"   Updated: {task['last_updated']}")
         if task['completed_at']:
@@ -133,6 +537,61 @@ class TaskManager:
         """Close database connection"""
         self.conn.close()
 
+FILTER_FIELDS = {
+    'id': 'id', 'status': 'status', 'priority': 'priority', 'category': 'category',
+    'due': 'due_date', 'due_date': 'due_date', 'assigned': 'assigned_to',
+    'assigned_to': 'assigned_to', 'project': 'project_path', 'project_path': 'project_path',
+    'progress': 'progress_percent', 'created': 'created_at', 'tag': 'tags', 'tags': 'tags',
+}
+FILTER_TERM = re.compile(r'^(\w+)(<=|>=|!=|=|<|>|~)(.*)$')
+
+def parse_filter(expr):
+    """Compile 'status=pending category=research priority<=2 due<2026-03-01' to SQL
+    
+    Terms are ANDed. '~' is a substring match, and 'a|b' on '=' matches any
+    of the listed values. Only whitelisted columns are accepted.
+    """
+    clauses = []
+    params = []
+    for term in expr.split():
+        match = FILTER_TERM.match(term)
+        if not match or match.group(1) not in FILTER_FIELDS:
+            raise ValueError(f"Invalid filter term: {term}")
+        field, op, value = FILTER_FIELDS[match.group(1)], match.group(2), match.group(3)
+        
+        if op == '~':
+            clauses.append(f"{field} LIKE ?")
+            params.append(f"%{value}%")
+        elif op == '=' and '|' in value:
+            values = value.split('|')
+            clauses.append(f"{field} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+        else:
+            clauses.append(f"{field} {op} ?")
+            if field in ('id', 'priority', 'progress_percent'):
+                try:
+                    value = int(value)
+                except ValueError:
+                    raise ValueError(f"Invalid filter term: {term} ({field} takes a number)") from None
+            params.append(value)
+    return " AND ".join(clauses) or "1=1", params
+
+def parse_selection(arg):
+    """Split a CLI selector into (task_ids, filter_expr): '1,4,7-9' or 'status=pending'"""
+    if re.fullmatch(r'[\d,\-\s]+', arg):
+        task_ids = []
+        for part in arg.replace(' ', '').split(','):
+            try:
+                if '-' in part:
+                    start, end = part.split('-', 1)
+                    task_ids.extend(range(int(start), int(end) + 1))
+                elif part:
+                    task_ids.append(int(part))
+            except ValueError:
+                raise ValueError(f"Invalid task ID range: {part}") from None
+        return task_ids, None
+    return None, arg
+
 def print_tasks_table(tasks):
     """Print tasks in a formatted table"""
     if not tasks:
@@ -168,6 +627,17 @@ def main():
         print("  add \"title\" \"description\" [category] [priority] - Add task")
         print("  update [id] [status] [progress%] - Update task status")
         print("  show [id] - Show task details")
+        print("  depend [id] [depends_on_id] - Add a dependency")
+        print("  undepend [id] [depends_on_id] - Remove a dependency")
+        print("  ready - List tasks whose dependencies are done")
+        print("  order - List open tasks in dependency order")
+        print("  critical - Show the critical path")
+        print("  migrate-deps - Import task IDs from blocked_by text")
+        print("  bulk-update [ids|filter] [status] [progress%] - Update many tasks at once")
+        print("  complete [ids|filter] - Mark many tasks completed")
+        print("  reprioritize [ids|filter] [priority] - Set priority on many tasks")
+        print("  export [file.csv|file.json] [filter] - Export todos")
+        print("  import [file.csv|file.json] - Import todos (upsert by id)")
         print("  help - Show this help")
         return
     
@@ -222,6 +692,96 @@ def main():
             task_id = int(sys.argv[2])
             manager.show_task(task_id)
         
+        elif command in ("depend", "undepend"):
+            if len(sys.argv) < 4:
+                print(f"Usage: {command} [id] [depends_on_id]")
+                return
+            
+            task_id = int(sys.argv[2])
+            depends_on_id = int(sys.argv[3])
+            if command == "depend":
+                try:
+                    manager.add_dependency(task_id, depends_on_id)
+                except ValueError as e:
+                    print(f"❌ {e}")
+            else:
+                manager.remove_dependency(task_id, depends_on_id)
+        
+        elif command == "ready":
+            tasks = manager.ready_tasks()
+            print_tasks_table(tasks)
+            print(f"\n🚦 {len(tasks)} tasks ready to start")
+        
+        elif command == "order":
+            try:
+                print_tasks_table(manager.task_order())
+            except ValueError as e:
+                print(f"❌ {e}")
+        
+        elif command == "critical":
+            try:
+                total, tasks = manager.critical_path()
+            except ValueError as e:
+                print(f"❌ {e}")
+                return
+            print_tasks_table(tasks)
+            chain = ' → '.join(f"#{t['id']}" for t in tasks)
+            print(f"\n🧭 Critical path: {chain} (weight {total:g})")
+        
+        elif command == "migrate-deps":
+            migrated = manager.migrate_dependencies()
+            print(f"✅ Imported {migrated} dependency edges from blocked_by")
+        
+        elif command in ("bulk-update", "complete", "reprioritize"):
+            needed = {"bulk-update": 4, "complete": 3, "reprioritize": 4}[command]
+            if len(sys.argv) < needed:
+                usage = {"bulk-update": "bulk-update [ids|filter] [status] [progress%]",
+                         "complete": "complete [ids|filter]",
+                         "reprioritize": "reprioritize [ids|filter] [priority]"}[command]
+                print(f"Usage: {usage}")
+                print('  ids: 1,4,7-9 | filter: "status=pending category=research due<2026-03-01"')
+                return
+            
+            try:
+                task_ids, filter_expr = parse_selection(sys.argv[2])
+                if command == "bulk-update":
+                    progress = int(sys.argv[4]) if len(sys.argv) > 4 else None
+                    changed = manager.bulk_update(task_ids, filter_expr, status=sys.argv[3],
+                                                  progress_percent=progress)
+                elif command == "complete":
+                    changed = manager.bulk_update(task_ids, filter_expr, status='completed')
+                else:
+                    changed = manager.bulk_update(task_ids, filter_expr, priority=int(sys.argv[3]))
+            except ValueError as e:
+                print(f"❌ {e}")
+                return
+            print(f"✅ {changed} tasks updated")
+        
+        elif command == "export":
+            if len(sys.argv) < 3:
+                print("Usage: export [file.csv|file.json] [filter]")
+                return
+            
+            filter_expr = sys.argv[3] if len(sys.argv) > 3 else None
+            try:
+                count = manager.export_tasks(sys.argv[2], filter_expr)
+            except ValueError as e:
+                print(f"❌ {e}")
+                return
+            print(f"✅ Exported {count} tasks to {sys.argv[2]}")
+        
+        elif command == "import":
+            if len(sys.argv) < 3:
+                print("Usage: import [file.csv|file.json]")
+                return
+            
+            try:
+                count = manager.import_tasks(sys.argv[2])
+            except ValueError as e:
+                print(f"❌ {e}")
+                return
+            print(f"✅ Imported {count} tasks from {sys.argv[2]}")
+        
         elif command == "help":
             print("Task Management System Helper")
             print("\nDatabase:", DB_PATH)
@@ -233,6 +793,8 @@ def main():
             print("  python3 task_helper.py add \"Research topic\" \"Detailed description\" research 4")
             print("  python3 task_helper.py update 1 in_progress 50")
             print("  python3 task_helper.py show 1")
+            print("  python3 task_helper.py complete 12,14,20-25")
+            print("  python3 task_helper.py reprioritize \"category=research status=pending\" 2")
         
         else:
             print(f"Unknown command: {command}")
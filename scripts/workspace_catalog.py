@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Workspace File Catalog
+A persistent index of workspace files by date, type and status, so daily
+jobs can ask "files for date D" with an indexed lookup instead of globbing
+the whole workspace.
+
+The catalog lives in <workspace>/.workspace_catalog.sqlite. `watch` keeps it
+current with inotify (Linux, via libc; no extra packages) and falls back to
+periodic rescans elsewhere. When no watcher is running, callers refresh just
+the directories they read before querying.
+
+A file's date comes from a YYYY-MM-DD or YYYYMMDD stamp in its name, or
+from its modification time (UTC) when the name has none.
+
+Usage:
+  python3 workspace_catalog.py scan [--workspace PATH]
+  python3 workspace_catalog.py watch [--poll]
+  python3 workspace_catalog.py files 2026-02-26 [--status new]
+  python3 workspace_catalog.py stats
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import select
+import struct
+import sqlite3
+import argparse
+import threading
+import ctypes
+import ctypes.util
+from datetime import date, datetime, timezone
+from typing import List, Dict, Iterable
+
+WORKSPACE_PATH = os.environ.get("CLAW_WORKSPACE", "/home/openclaw/.openclaw/workspace")
+CATALOG_NAME = ".workspace_catalog.sqlite"
+EXCLUDED_DIRS = {"node_modules", "__pycache__", "venv", ".venv"}
+POLL_INTERVAL = 60.0  # seconds between rescans without inotify
+HEARTBEAT_INTERVAL = 30.0  # seconds; a watcher silent for 2x this is presumed dead
+
+DATE_RE = re.compile(r"(?<!\d)(\d{4})-?(\d{2})-?(\d{2})(?!\d)")
+
+CATALOG_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,             -- relative to the workspace
+    dir TEXT NOT NULL,                 -- parent directory ('' for the top level)
+    file_date TEXT NOT NULL,           -- YYYY-MM-DD
+    date_source TEXT NOT NULL,         -- 'name' or 'mtime'
+    file_type TEXT NOT NULL,           -- lowercased extension, '' if none
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'new', -- new, compressed, deleted
+    indexed_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_files_date ON files(file_date, dir, status);
+CREATE INDEX IF NOT EXISTS idx_files_type ON files(file_type, file_date);
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    key TEXT PRIMARY KEY,
+    value
+) WITHOUT ROWID;
+'''
+
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def file_date(name: str, mtime_ns: int) -> tuple:
+    """(YYYY-MM-DD, 'name' | 'mtime') for a file"""
+    for match in DATE_RE.finditer(name):
+        try:
+            return date(*map(int, match.groups())).isoformat(), "name"
+        except ValueError:
+            continue
+    return datetime.fromtimestamp(mtime_ns / 1e9, timezone.utc).date().isoformat(), "mtime"
+
+
+class Inotify:
+    """Recursive inotify watch over a directory tree (Linux only)"""
+
+    def __init__(self, root: str, skip, mask: int = WATCH_MASK):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name or not sys.platform.startswith("linux"):
+            raise OSError("inotify is not available on this platform")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.root = root
+        self.skip = skip
+        self.mask = mask
+        self.dirs = {}
+        self.add_tree("")
+
+    def add_tree(self, rel_dir: str) -> List[str]:
+        """Watch rel_dir and every directory under it; returns the directories added"""
+        added = []
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            path = os.path.join(self.root, current).encode()
+            wd = self.libc.inotify_add_watch(self.fd, path, self.mask)
+            if wd < 0:
+                continue
+            self.dirs[wd] = current
+            added.append(current)
+            try:
+                with os.scandir(os.path.join(self.root, current)) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False) and not self.skip(entry.name):
+                            stack.append(os.path.join(current, entry.name))
+            except OSError:
+                pass
+        return added
+
+    def read(self, timeout: float) -> List[tuple]:
+        """[(mask, relative path)] for events within timeout seconds"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode(errors="surrogateescape")
+            offset += length
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            directory = self.dirs.get(wd)
+            if directory is None and not mask & IN_Q_OVERFLOW:
+                continue
+            events.append((mask, os.path.join(directory or "", name)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class WorkspaceCatalog:
+    """Date/type/status index of the files in a workspace"""
+
+    def __init__(self, workspace_path: str = None, db_path: str = None):
+        self.root = os.path.abspath(workspace_path or WORKSPACE_PATH)
+        self.db_path = db_path or os.path.join(self.root, CATALOG_NAME)
+        self.conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(CATALOG_SCHEMA)
+        self.lock = threading.Lock()
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def skip(name: str) -> bool:
+        """Hidden entries (including the catalog itself) and tool directories"""
+        return name.startswith(".") or name in EXCLUDED_DIRS
+
+    # --- indexing --------------------------------------------------------
+
+    def _row(self, rel_path: str, stat: os.stat_result) -> tuple:
+        directory, name = os.path.split(rel_path)
+        day, source = file_date(name, stat.st_mtime_ns)
+        file_type = os.path.splitext(name)[1].lstrip(".").lower()
+        return (rel_path, directory, day, source, file_type, stat.st_size, stat.st_mtime_ns, time.time())
+
+    def _upsert(self, rows: List[tuple]):
+        # A changed file is new again; an unchanged one keeps its status
+        self.conn.executemany('''
+            INSERT INTO files (path, dir, file_date, date_source, file_type, size, mtime_ns, indexed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (path) DO UPDATE SET
+                dir = excluded.dir, file_date = excluded.file_date,
+                date_source = excluded.date_source, file_type = excluded.file_type, status = 'new',
+                size = excluded.size, mtime_ns = excluded.mtime_ns, indexed_at = excluded.indexed_at
+            WHERE files.status = 'deleted' OR files.size != excluded.size
+               OR files.mtime_ns != excluded.mtime_ns
+        ''', rows)
+
+    def _walk(self, rel_dir: str, recursive: bool) -> Iterable[tuple]:
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(os.path.join(self.root, current)) as entries:
+                    for entry in entries:
+                        if self.skip(entry.name):
+                            continue
+                        rel_path = os.path.join(current, entry.name)
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                stack.append(rel_path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield rel_path, entry.stat(follow_symlinks=False)
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+
+    def scan(self, dirs: Iterable[str] = None) -> Dict[str, int]:
+        """Reconcile the catalog with disk (the whole tree, or just `dirs` non-recursively)
+
+        Only files whose size or mtime differ from the catalog are re-indexed.
+        """
+        recursive = dirs is None
+        dirs = [""] if dirs is None else list(dirs)
+        with self.lock:
+            if recursive:
+                known = self.conn.execute("SELECT path, size, mtime_ns FROM files WHERE status != 'deleted'")
+            else:
+                known = self.conn.execute(
+                    "SELECT path, size, mtime_ns FROM files WHERE status != 'deleted' "
+                    "AND dir IN (SELECT value FROM json_each(?))",
+                    (json_list(dirs),))
+            known = {path: (size, mtime_ns) for path, size, mtime_ns in known}
+
+            files = 0
+            rows = []
+            for rel_dir in dirs:
+                for rel_path, stat in self._walk(rel_dir, recursive):
+                    files += 1
+                    if known.pop(rel_path, None) != (stat.st_size, stat.st_mtime_ns):
+                        rows.append(self._row(rel_path, stat))
+            self._upsert(rows)
+
+            # Whatever is left in `known` is no longer on disk
+            self.conn.executemany("UPDATE files SET status = 'deleted' WHERE path = ?",
+                                  [(path,) for path in known])
+            if recursive:
+                self._set_meta("last_full_scan", time.time())
+            self.conn.commit()
+        return {"files": files, "changed": len(rows), "deleted": len(known)}
+
+    def refresh_paths(self, rel_paths: Iterable[str]):
+        """Re-stat specific files (e.g. from watcher events)"""
+        with self.lock:
+            rows, gone = [], []
+            for rel_path in set(rel_paths):
+                try:
+                    stat = os.stat(os.path.join(self.root, rel_path), follow_symlinks=False)
+                except FileNotFoundError:
+                    gone.append((rel_path,))
+                    continue
+                if os.path.isfile(os.path.join(self.root, rel_path)):
+                    rows.append(self._row(rel_path, stat))
+            self._upsert(rows)
+            self.conn.executemany("UPDATE files SET status = 'deleted' WHERE path = ?", gone)
+            self.conn.commit()
+
+    def forget_dir(self, rel_dir: str):
+        """Mark everything under a removed directory deleted"""
+        with self.lock:
+            prefix = rel_dir.rstrip("/") + "/"
+            self.conn.execute('''
+                UPDATE files SET status = 'deleted'
+                WHERE path >= ? AND path < ? AND status != 'deleted'
+            ''', (prefix, prefix[:-1] + "0"))
+            self.conn.commit()
+
+    # --- watching --------------------------------------------------------
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO catalog_meta (key, value) VALUES (?, ?)", (key, value))
+
+    def heartbeat(self):
+        with self.lock:
+            self._set_meta("watcher_heartbeat", time.time())
+            self.conn.commit()
+
+    def watcher_alive(self) -> bool:
+        row = self.conn.execute("SELECT value FROM catalog_meta WHERE key = 'watcher_heartbeat'").fetchone()
+        return row is not None and time.time() - row[0] < 2 * HEARTBEAT_INTERVAL
+
+    def watch(self, use_inotify: bool = True, poll_interval: float = POLL_INTERVAL,
+              stop_event: threading.Event = None):
+        """Keep the catalog current until stop_event is set"""
+        stop_event = stop_event or threading.Event()
+        watcher = None
+        if use_inotify:
+            try:
+                watcher = Inotify(self.root, self.skip)
+            except OSError as e:
+                print(f"⚠️ inotify unavailable ({e}); polling every {poll_interval:g}s")
+        # Full reconcile after the watches exist, so nothing falls in between
+        result = self.scan()
+        print(f"📂 Catalog of {self.root}: {result['files']} files, {result['changed']} changed")
+
+        last_heartbeat = 0.0
+        try:
+            while not stop_event.is_set():
+                if watcher is None:
+                    stop_event.wait(poll_interval)
+                    self.scan()
+                else:
+                    self._apply(watcher, watcher.read(min(HEARTBEAT_INTERVAL, 1.0)))
+                if time.monotonic() - last_heartbeat >= HEARTBEAT_INTERVAL:
+                    self.heartbeat()
+                    last_heartbeat = time.monotonic()
+        finally:
+            if watcher is not None:
+                watcher.close()
+            with self.lock:
+                self.conn.execute("DELETE FROM catalog_meta WHERE key = 'watcher_heartbeat'")
+                self.conn.commit()
+
+    def _apply(self, watcher: Inotify, events: List[tuple]):
+        paths = []
+        for mask, rel_path in events:
+            if mask & IN_Q_OVERFLOW:
+                self.scan()
+                return
+            if self.skip(os.path.basename(rel_path)) or any(
+                    self.skip(part) for part in rel_path.split(os.sep)[:-1]):
+                continue
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    for rel_dir in watcher.add_tree(rel_path):
+                        self.scan([rel_dir])
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    self.forget_dir(rel_path)
+            elif not mask & IN_DELETE_SELF:
+                paths.append(rel_path)
+        if paths:
+            self.refresh_paths(paths)
+
+    # --- queries ---------------------------------------------------------
+
+    def files_for_date(self, day, dirs: Iterable[str] = None, status: str = None,
+                       file_type: str = None) -> List[str]:
+        """Absolute paths of files dated `day` (optionally only in `dirs`)"""
+        sql = "SELECT path FROM files WHERE file_date = ? AND status != 'deleted'"
+        params = [day.isoformat() if isinstance(day, date) else day]
+        if dirs is not None:
+            sql += " AND dir IN (SELECT value FROM json_each(?))"
+            params.append(json_list(dirs))
+        if status:
+            sql += " AND status = ?"
+            params.append(status)
+        if file_type:
+            sql += " AND file_type = ?"
+            params.append(file_type)
+        rows = self.conn.execute(sql + " ORDER BY path", params).fetchall()
+        return [os.path.join(self.root, path) for (path,) in rows]
+
+    def mark(self, paths: Iterable[str], status: str):
+        """Set the status of files given by absolute or workspace-relative path"""
+        rel_paths = [(status, os.path.relpath(p, self.root) if os.path.isabs(p) else p) for p in paths]
+        with self.lock:
+            self.conn.executemany("UPDATE files SET status = ? WHERE path = ?", rel_paths)
+            self.conn.commit()
+
+    def stats(self) -> List[tuple]:
+        return self.conn.execute('''
+            SELECT status, file_type, COUNT(*), SUM(size) FROM files
+            GROUP BY status, file_type ORDER BY status, COUNT(*) DESC
+        ''').fetchall()
+
+
+def json_list(values: Iterable[str]) -> str:
+    return json.dumps(list(values))
+
+def main():
+    """Command-line interface"""
+    parser = argparse.ArgumentParser(description="Workspace file catalog")
+    parser.add_argument("action", choices=["scan", "watch", "files", "stats"], help="Action to perform")
+    parser.add_argument("target", nargs="?", help="Date for 'files' (YYYY-MM-DD)")
+    parser.add_argument("--workspace", default=WORKSPACE_PATH, help=f"Workspace (default: {WORKSPACE_PATH})")
+    parser.add_argument("--poll", action="store_true", help="Poll instead of using inotify")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="Polling interval in seconds")
+    parser.add_argument("--status", help="Only files with this status (for 'files')")
+    parser.add_argument("--type", help="Only files with this extension (for 'files')")
+
+    args = parser.parse_args()
+    catalog = WorkspaceCatalog(args.workspace)
+
+    try:
+        if args.action == "scan":
+            start = time.perf_counter()
+            result = catalog.scan()
+            print(f"✅ Scanned {result['files']} files in {time.perf_counter() - start:.2f}s "
+                  f"({result['changed']} changed, {result['deleted']} deleted)")
+
+        elif args.action == "watch":
+            try:
+                catalog.watch(use_inotify=not args.poll, poll_interval=args.interval)
+            except KeyboardInterrupt:
+                pass
+
+        elif args.action == "files":
+            if not args.target:
+                print("❌ Error: date required for 'files'")
+                sys.exit(1)
+            for path in catalog.files_for_date(args.target, status=args.status, file_type=args.type):
+                print(path)
+
+        elif args.action == "stats":
+            print(f"📊 Catalog {catalog.db_path} (watcher {'running' if catalog.watcher_alive() else 'not running'})")
+            for status, file_type, count, size in catalog.stats():
+                print(f"   {status:<10} {file_type or '(none)':<8} {count:>7} files {size or 0:>12} bytes")
+
+    finally:
+        catalog.close()
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,22 @@ Implements indexed memory storage for faster search and retrieval
 import sqlite3
 import json
 import os
+import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scripts"))
+from memory_fts_query import compile_query
+from memory_fuzzy import QueryExpander, ensure_fuzzy
+from memory_graph import ensure_graph, index_memory, related_memories
+from memory_records import CHARS_PER_TOKEN, Memory, apply_budget, record_factory, sql_literal
+from memory_stats import ensure_stats, get_counts, split_value
+from memory_tags import ensure_tags, tag_facets, tag_filter_sql
+from memory_time import ensure_time_columns, range_sql, resolve_range, to_epoch_ms
+
+MEMORY_COLUMNS = ("id", "timestamp", "user_id", "memory_type", "content", "category",
+                  "tags", "importance", "access_count", "last_accessed", "created_at", "time_ms")
+
 class SQLiteMemorySystem:
     """SQLite-based memory system for AI assistant"""
     
@@ -46,6 +59,7 @@ class SQLiteMemorySystem:
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_type ON memories(user_id, memory_type)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON memories(timestamp)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_category ON memories(category)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_type_importance ON memories(memory_type, importance)')
         
         # Create full-text search virtual table
         cursor.execute('''
@@ -53,19 +67,35 @@ class SQLiteMemorySystem:
         USING fts5(content, tags, content='memories', content_rowid='id')
         ''')
         
+        # Trigger-maintained counts for get_memory_stats
+        ensure_stats(self.conn)
+        
+        # Integer epoch-ms time_ms + index for time-range queries
+        ensure_time_columns(self.conn, ['memories'])
+
+        # Entity/link graph, filled in at ingest
+        ensure_graph(self.conn)
+
+        # tags + memory_tags join table, kept current by triggers
+        ensure_tags(self.conn)
+
+        # Term vocabulary + trigram index for spelling suggestions, synonyms
+        ensure_fuzzy(self.conn)
+
         self.conn.commit()
         print(f"SQLite memory database initialized at {self.db_path}")
     
     def store_memory(self, user_id, memory_type, content, category=None, tags=None, importance=1):
         """Store a memory with indexing"""
-        timestamp = datetime.now(timezone.utc).isoformat()
+        now = datetime.now(timezone.utc)
+        timestamp = now.isoformat()
         tags_json = json.dumps(tags) if tags else '[]'
         
         cursor = self.conn.cursor()
         cursor.execute('''
-        INSERT INTO memories (timestamp, user_id, memory_type, content, category, tags, importance)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (timestamp, user_id, memory_type, content, category, tags_json, importance))
+        INSERT INTO memories (timestamp, user_id, memory_type, content, category, tags, importance, time_ms)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (timestamp, user_id, memory_type, content, category, tags_json, importance, to_epoch_ms(now)))
         
         memory_id = cursor.lastrowid
         
@@ -74,90 +104,171 @@ class SQLiteMemorySystem:
         INSERT INTO memories_fts (rowid, content, tags)
         VALUES (?, ?, ?)
         ''', (memory_id, content, tags_json))
-        
+
+        index_memory(self.conn, memory_id, content)
+
         self.conn.commit()
         return memory_id
     
     def search_memories(self, user_id=None, query=None, memory_type=None, 
-                       category=None, limit=10, offset=0):
-        """Search memories with various filters"""
-        cursor = self.conn.cursor()
+                       category=None, limit=10, offset=0, columns=None,
+                       snippet_tokens=None, highlight=('[', ']'),
+                       max_bytes=None, max_tokens=None, as_tuples=False, as_records=False,
+                       since=None, until=None, last_days=None,
+                       tags_all=None, tags_any=None, tags_none=None, fuzzy=True):
+        """Search memories with various filters
+        
+        columns limits the projection (default: every column). With
+        snippet_tokens set, content is replaced by an FTS5 snippet() of that
+        many tokens (or a prefix when there is no query), and max_bytes /
+        max_tokens cap the total size of the returned rows.
+        
+        Rows come back as dicts (tags parsed into a list). as_records=True
+        returns Memory records instead (tags parsed lazily on access, no
+        dict per row), as_tuples=True plain tuples in projection order.
         
+        since/until (epoch, datetime, ISO date or '7d'-style; until is
+        exclusive) or last_days restrict results to a time window, e.g.
+        search_memories(query="sqlite", memory_type="thought", last_days=7).
+        
+        tags_all / tags_any / tags_none (lists or "a,b") keep memories with
+        all, any or none of those tags, via the memory_tags index.
+        
+        query is compiled by memory_fts_query, so it may mix "phrases",
+        prefix*, OR, -exclusions and NEAR with type:, category:, tag:,
+        importance>=N and since: filters, which run as SQL predicates.
+        With fuzzy, plain words also match their synonyms and, if not in the
+        index, their closest spellings, within the same MATCH.
+        """
+        compiled = compile_query(query, expand=QueryExpander(self.conn) if fuzzy else None)
+        if query and not (compiled.match or compiled.where):
+            return []  # nothing searchable in it (e.g. only punctuation)
+        query = compiled.match
+        cursor = self.conn.cursor()
+        if not as_tuples:
+            cursor.row_factory = record_factory(Memory)
+        select_list = self._projection(columns, query, snippet_tokens, highlight)
+        time_clause, time_params = range_sql(*resolve_range(since, until, last_days), column='m.time_ms')
+        tag_clause, tag_params = tag_filter_sql(tags_all, tags_any, tags_none)
+        tag_clause += compiled.where
+        tag_params += compiled.params
+
         if query:
+            if time_clause:
+                # Ids grow with insertion time, so the window's id span (an
+                # index range scan on time_ms) lets FTS5 skip everything else
+                low, high = self.conn.execute(
+                    f"SELECT MIN(id), MAX(id) FROM memories m WHERE 1=1{time_clause}",
+                    time_params).fetchone()
+                if low is None:
+                    return []
+                time_clause += " AND memories_fts.rowid BETWEEN ? AND ?"
+                time_params = time_params + [low, high]
+
             # Use full-text search for content queries
-            cursor.execute('''
-            SELECT m.*
+            cursor.execute(f'''
+            SELECT {select_list}
             FROM memories m
-            JOIN memories_fts fts ON m.id = fts.rowid
+            JOIN memories_fts ON m.id = memories_fts.rowid
             WHERE memories_fts MATCH ?
             AND (? IS NULL OR m.user_id = ?)
-            AND (? IS NULL OR m.memory_type = ?)
+            AND (? IS NULL OR m.memory_type = ?){time_clause}{tag_clause}
             ORDER BY rank
             LIMIT ? OFFSET ?
-            ''', (query, user_id, user_id, memory_type, memory_type, limit, offset))
+            ''', (query, user_id, user_id, memory_type, memory_type, *time_params, *tag_params,
+                  limit, offset))
         else:
             # Regular filtered search
             conditions = []
             params = []
             
             if user_id:
-                conditions.append("user_id = ?")
+                conditions.append("m.user_id = ?")
                 params.append(user_id)
             if memory_type:
-                conditions.append("memory_type = ?")
+                conditions.append("m.memory_type = ?")
                 params.append(memory_type)
             if category:
-                conditions.append("category = ?")
+                conditions.append("m.category = ?")
                 params.append(category)
             
             where_clause = " AND ".join(conditions) if conditions else "1=1"
-            params.extend([limit, offset])
+            params.extend(time_params + tag_params + [limit, offset])
             
             cursor.execute(f'''
-            SELECT * FROM memories
-            WHERE {where_clause}
-            ORDER BY timestamp DESC, importance DESC
+            SELECT {select_list} FROM memories m
+            WHERE {where_clause}{time_clause}{tag_clause}
+            ORDER BY m.time_ms DESC, m.importance DESC
             LIMIT ? OFFSET ?
             ''', params)
         
-        columns = [desc[0] for desc in cursor.description]
-        results = []
-        for row in cursor.fetchall():
-            result = dict(zip(columns, row))
-            if 'tags' in result and result['tags']:
-                result['tags'] = json.loads(result['tags'])
-            results.append(result)
+        results = cursor.fetchall()
         
+        if max_bytes is not None or max_tokens is not None:
+            results = apply_budget(results, max_bytes, max_tokens)
+        if not (as_tuples or as_records):
+            results = [memory.as_dict() for memory in results]
         return results
     
+    def _projection(self, columns, query, snippet_tokens, highlight):
+        """Build the SELECT list for search_memories"""
+        columns = list(columns) if columns else list(MEMORY_COLUMNS)
+        unknown = [c for c in columns if c not in MEMORY_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown memory columns: {', '.join(unknown)}")
+        
+        select = []
+        for column in columns:
+            if column == 'content' and snippet_tokens:
+                start, end = (highlight or ('', ''))
+                if query:
+                    select.append("snippet(memories_fts, 0, {}, {}, '...', {}) AS content".format(
+                        sql_literal(start), sql_literal(end), int(snippet_tokens)))
+                else:
+                    select.append(f"substr(m.content, 1, {int(snippet_tokens) * CHARS_PER_TOKEN}) AS content")
+            else:
+                select.append(f"m.{column}")
+        return ", ".join(select)
+    
+    def get_tag_facets(self, user_id=None, query=None, memory_type=None, category=None,
+                       tags_all=None, tags_any=None, tags_none=None,
+                       since=None, until=None, last_days=None, limit=20):
+        """[(tag, count)] over the memories a search with these filters matches, most used first"""
+        compiled = compile_query(query)
+        conditions = compiled.where
+        params = list(compiled.params)
+        if compiled.match:
+            conditions += " AND m.id IN (SELECT rowid FROM memories_fts WHERE memories_fts MATCH ?)"
+            params.append(compiled.match)
+        for column, value in (("user_id", user_id), ("memory_type", memory_type), ("category", category)):
+            if value:
+                conditions += f" AND m.{column} = ?"
+                params.append(value)
+        time_clause, time_params = range_sql(*resolve_range(since, until, last_days), column='m.time_ms')
+        tag_clause, tag_params = tag_filter_sql(tags_all, tags_any, tags_none)
+        conditions += time_clause + tag_clause
+        if not conditions:
+            return tag_facets(self.conn, limit=limit)
+        return tag_facets(self.conn, f"SELECT m.id FROM memories m WHERE 1=1{conditions}",
+                          params + time_params + tag_params, limit)
+
+    def get_related(self, memory_ids=(), entities=(), hops=1, limit=10):
+        """Memories within `hops` shared entities of the given memories or entity names
+
+        [(id, depth, importance, timestamp, content)], nearest first.
+        """
+        return related_memories(self.conn, memory_ids, entities, hops, limit)
+
     def get_memory_stats(self, user_id=None):
-        """Get memory statistics"""
-        cursor = self.conn.cursor()
+        """Get memory statistics (read from the trigger-maintained stats table)"""
+        rows = get_counts(self.conn, 'memories', 'user_id|memory_type', prefix=user_id)
         
-        if user_id:
-            cursor.execute('''
-            SELECT 
-                memory_type,
-                COUNT(*) as count,
-                AVG(importance) as avg_importance,
-                SUM(access_count) as total_accesses
-            FROM memories
-            WHERE user_id = ?
-            GROUP BY memory_type
-            ''', (user_id,))
-        else:
-            cursor.execute('''
-            SELECT 
-                user_id,
-                memory_type,
-                COUNT(*) as count,
-                AVG(importance) as avg_importance,
-                SUM(access_count) as total_accesses
-            FROM memories
-            GROUP BY user_id, memory_type
-            ''')
-        
-        return cursor.fetchall()
+        stats = []
+        for value, count, importance_sum, access_sum in rows:
+            row_user, memory_type = split_value(value)
+            row = (memory_type, count, importance_sum / count, access_sum)
+            stats.append(row if user_id else (row_user,) + row)
+        return stats
     
     def import_from_files(self, file_paths):
         """Import memories from existing text files"""